@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from cache_store import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# AI回复库的总容量上限，超出后按最近最少使用（LRU）淘汰；可通过环境变量调整（单位 MB）
+AI_CACHE_MAX_BYTES = int(os.environ.get("FINANCE_AI_CACHE_MAX_MB", "64")) * 1024 * 1024
+AI_CACHE_PATH = os.path.join(CACHE_DIR, "ai_responses.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,
+    model       TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    settings    TEXT NOT NULL,
+    response    TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    last_access REAL NOT NULL
+)
+"""
+
+
+def prompt_fingerprint(model: str, prompt: str, settings: dict = None) -> tuple:
+    """(模型名, 提示词哈希, 生成参数JSON) -> 唯一键；提示词本身不落盘，只保存哈希"""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    settings_json = json.dumps(settings or {}, sort_keys=True, default=str)
+    key = hashlib.sha1(f"{model}\n{prompt_hash}\n{settings_json}".encode("utf-8")).hexdigest()
+    return key, prompt_hash, settings_json
+
+
+class AIResponseStore:
+    """
+    持久化的AI回复库（SQLite 单文件，位于 CACHE_DIR 下）：
+    - 以 (模型名, 提示词哈希, 生成参数) 为键，进程重启后已生成过的报告可直接复用；
+    - 总字节数超过 max_bytes 时按 last_access 淘汰最久未用的回复；
+    - stats() 返回命中/未命中/淘汰次数和当前容量。
+    """
+
+    def __init__(self, path: str = AI_CACHE_PATH, max_bytes: int = AI_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        # 调用方已持有 self._lock；连接在第一次使用时才创建
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(_SCHEMA)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, model: str, prompt: str, settings: dict = None):
+        key, _, _ = prompt_fingerprint(model, prompt, settings)
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self._counters["misses"] += 1
+                    return None
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("读取AI回复库失败: %s", e)
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+            return row[0]
+
+    def put(self, model: str, prompt: str, response: str, settings: dict = None) -> None:
+        key, prompt_hash, settings_json = prompt_fingerprint(model, prompt, settings)
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, model, prompt_hash, settings_json, response, size, now, now),
+                )
+                self._counters["writes"] += 1
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("写入AI回复库失败: %s", e)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """总容量超限时，从最久未访问的回复开始删除，直到回到上限以内"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._counters["evictions"] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> dict:
+        """hits / misses / writes / evictions / entries / bytes / max_bytes"""
+        with self._lock:
+            stats = dict(self._counters)
+            try:
+                entries, total = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            except sqlite3.Error:
+                entries, total = 0, 0
+        stats.update(entries=entries, bytes=total, max_bytes=self.max_bytes)
+        return stats
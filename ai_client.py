@@ -0,0 +1,169 @@
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, as_completed
+
+from telemetry import telemetry
+
+GEMINI_MODEL = "gemini-2.0-flash"
+# 并发生成报告时，同时在途的模型请求数上限（整个进程共享）
+AI_MAX_CONCURRENCY = 4
+
+MISSING_KEY_MESSAGE = "错误：未找到Google AI的API密钥。请在.streamlit/secrets.toml中配置。"
+BLOCKED_MESSAGE = "AI模型因为安全设置阻止了本次回复。这通常是因为Prompt或返回内容中可能包含了敏感信息。请尝试调整问题或检查数据。"
+
+
+def _error_message(error: Exception) -> str:
+    return f"调用AI模型时发生错误: {error}"
+
+
+def _record_call(mode: str, started: float, text: str = "", error: bool = False, scope: tuple = None) -> None:
+    """一次模型调用的埋点：mode 为 generate / stream / async，字节数按回复文本计"""
+    telemetry.record("gemini", mode, time.perf_counter() - started,
+                     bytes=len(text.encode("utf-8")) if text else 0, error=error, scope=scope)
+
+
+def _completed(text: str) -> Future:
+    future = Future()
+    future.set_result(text)
+    return future
+
+
+class GeminiClient:
+    """
+    包装 Gemini 模型的三种调用方式：
+    - generate(prompt)：同步等待完整回复；
+    - stream(prompt)：逐段产出文本，配合 st.write_stream 边生成边显示；
+    - generate_many({key: prompt})：在后台事件循环里用 generate_content_async 并发生成多份报告，
+      受 AI_MAX_CONCURRENCY 限制，按完成顺序产出 (key, text)。
+    model_factory(model_name, generation_config) 在第一次调用时才执行（延迟导入 google.generativeai）；
+    缺少密钥时返回提示文本而不是抛错。
+    传入 store（AIResponseStore）时，成功的回复按 (模型, 提示词, 生成参数) 持久化，
+    同一提示词再次请求（无论哪种方式）直接从回复库返回，不再调用模型。
+    """
+
+    def __init__(self, model_factory, model_name: str = GEMINI_MODEL, generation_config: dict = None,
+                 store=None, max_concurrency: int = AI_MAX_CONCURRENCY):
+        self._model_factory = model_factory
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+        self.store = store
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._max_concurrency = max_concurrency
+        self._semaphore = None
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    def _get_model(self):
+        with self._model_lock:
+            if self._model is None:
+                self._model = self._model_factory(self.model_name, self.generation_config)
+            return self._model
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """常驻的后台事件循环：异步客户端绑定在创建它的循环上，不能每次 asyncio.run 新建一个"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="ai-generation", daemon=True).start()
+            return self._loop
+
+    def _lookup(self, prompt: str):
+        if self.store is None:
+            return None
+        started = time.perf_counter()
+        cached = self.store.get(self.model_name, prompt, self.generation_config)
+        telemetry.record("cache", "ai_responses", time.perf_counter() - started,
+                         bytes=len(cached.encode("utf-8")) if cached else 0, cache="miss" if cached is None else "hit")
+        return cached
+
+    def _remember(self, prompt: str, text: str) -> str:
+        if self.store is not None and text and text != BLOCKED_MESSAGE:
+            self.store.put(self.model_name, prompt, text, self.generation_config)
+        return text
+
+    def generate(self, prompt: str) -> str:
+        cached = self._lookup(prompt)
+        if cached is not None:
+            return cached
+        try:
+            model = self._get_model()
+        except (KeyError, FileNotFoundError):
+            return MISSING_KEY_MESSAGE
+        started = time.perf_counter()
+        try:
+            response = model.generate_content(prompt)
+            # 安全设置拦截时 parts 为空，访问 text 会抛错
+            if not response.parts:
+                _record_call("generate", started)
+                return BLOCKED_MESSAGE
+            _record_call("generate", started, response.text)
+            return self._remember(prompt, response.text)
+        except Exception as e:
+            _record_call("generate", started, error=True)
+            return _error_message(e)
+
+    def stream(self, prompt: str):
+        cached = self._lookup(prompt)
+        if cached is not None:
+            yield cached
+            return
+        try:
+            model = self._get_model()
+        except (KeyError, FileNotFoundError):
+            yield MISSING_KEY_MESSAGE
+            return
+        pieces = []
+        started = time.perf_counter()
+        try:
+            for chunk in model.generate_content(prompt, stream=True):
+                if chunk.parts:
+                    pieces.append(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            _record_call("stream", started, "".join(pieces), error=True)
+            yield _error_message(e)
+            return
+        _record_call("stream", started, "".join(pieces))
+        if not pieces:
+            yield BLOCKED_MESSAGE
+            return
+        self._remember(prompt, "".join(pieces))
+
+    async def _generate_async(self, model, prompt: str, scope: tuple = None) -> str:
+        # scope 是提交时的 (页面运行, 区块)：协程跑在后台事件循环线程里，拿不到提交方的上下文
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                response = await model.generate_content_async(prompt)
+                if not response.parts:
+                    _record_call("async", started, scope=scope)
+                    return BLOCKED_MESSAGE
+                _record_call("async", started, response.text, scope=scope)
+                return self._remember(prompt, response.text)
+            except Exception as e:
+                _record_call("async", started, error=True, scope=scope)
+                return _error_message(e)
+
+    def submit(self, prompt: str) -> Future:
+        """
+        提交一个提示词到后台事件循环并立即返回 Future（受 AI_MAX_CONCURRENCY 限制）。
+        回复库命中或缺少密钥时返回已完成的 Future。
+        """
+        cached = self._lookup(prompt)
+        if cached is not None:
+            return _completed(cached)
+        try:
+            model = self._get_model()
+        except (KeyError, FileNotFoundError):
+            return _completed(MISSING_KEY_MESSAGE)
+        return asyncio.run_coroutine_threadsafe(self._generate_async(model, prompt, telemetry.scope()), self._get_loop())
+
+    def generate_many(self, prompts: dict):
+        """并发生成 {key: prompt}，按完成顺序产出 (key, text)；已有回复的提示词最先产出。"""
+        futures = {self.submit(prompt): key for key, prompt in prompts.items()}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
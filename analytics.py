@@ -0,0 +1,311 @@
+import numpy as np
+import pandas as pd
+
+# 指标方向配置：True 表示“越小越好”（升序排名），其余指标默认越大越好
+METRIC_ASCENDING = {
+    "debt_to_assets": True,
+    "pe": True,
+    "pb": True,
+}
+
+# 参与行业排名的指标（行业快照里存在的才会计算）
+RANKED_METRICS = [
+    "roe", "netprofit_margin", "grossprofit_margin",
+    "debt_to_assets", "current_ratio", "quick_ratio",
+    "or_yoy", "netprofit_yoy",
+    "assets_turn", "inv_turn", "ar_turn",
+    "fcff", "fcfe", "pe", "pb",
+]
+
+RANKING_COLUMNS = ["value", "rank", "percentile", "total", "count", "mean", "median"]
+
+
+def compute_industry_rankings(industry_df: pd.DataFrame, metrics: list = None) -> pd.DataFrame:
+    """
+    对一个行业快照一次性算出所有指标的排名表（长表）。
+
+    以 (ts_code, metric) 为索引，列为：
+    value / rank（1 为最好，缺失值排在最后）/ percentile（优于同业的百分比）/
+    total（行业公司数）/ count（该指标非空的公司数）/ mean / median。
+    排名方向由 METRIC_ASCENDING 配置决定。
+    """
+    metrics = [m for m in (metrics or RANKED_METRICS) if m in industry_df.columns]
+    if industry_df.empty or not metrics:
+        empty_index = pd.MultiIndex.from_tuples([], names=["ts_code", "metric"])
+        return pd.DataFrame(columns=RANKING_COLUMNS, index=empty_index)
+
+    industry_df = industry_df.drop_duplicates("ts_code")
+    values = industry_df[metrics].apply(pd.to_numeric, errors="coerce")
+    values.index = industry_df["ts_code"].values
+    total = len(values)
+
+    ascending = pd.Series({m: METRIC_ASCENDING.get(m, False) for m in metrics})
+    asc_cols = ascending[ascending].index
+    desc_cols = ascending[~ascending].index
+    ranks = pd.concat([
+        values[asc_cols].rank(ascending=True, method="first", na_option="bottom"),
+        values[desc_cols].rank(ascending=False, method="first", na_option="bottom"),
+    ], axis=1)[metrics]
+
+    long = pd.DataFrame({
+        "ts_code": values.index.repeat(len(metrics)),
+        "metric": metrics * total,
+        "value": values.to_numpy().ravel(),
+        "rank": ranks.to_numpy().ravel().astype(int),
+    })
+    long["total"] = total
+    long["percentile"] = (1 - (long["rank"] - 1) / total) * 100
+
+    stats = pd.DataFrame({"count": values.count(), "mean": values.mean(), "median": values.median()})
+    long = long.merge(stats, left_on="metric", right_index=True, how="left")
+    return long.set_index(["ts_code", "metric"])[RANKING_COLUMNS]
+
+
+def lookup_rank(rankings: pd.DataFrame, ts_code: str, metric: str):
+    """从排名表里取某家公司某个指标的那一行（Series），不存在时返回 None。"""
+    try:
+        return rankings.loc[(ts_code, metric)]
+    except KeyError:
+        return None
+
+
+def format_rank(rankings: pd.DataFrame, ts_code: str, metric: str) -> str:
+    """提示词里使用的“排名/总数”文本，缺失时为 N/A"""
+    row = lookup_rank(rankings, ts_code, metric)
+    if row is None:
+        return "N/A"
+    return f"{int(row['rank'])}/{int(row['total'])}"
+
+
+def downsample_min_max(df: pd.DataFrame, x: str, y: str, by: str, buckets: int) -> pd.DataFrame:
+    """
+    多条序列一起做“分桶最小/最大值”降采样：把 x 轴（所有序列共用的区间）等分成 buckets 个桶，
+    每条序列在每个桶里只保留 y 最小和最大的两个点，外加首尾两点。桶宽约为 1~2 个像素时，
+    折线的轮廓（包括单日尖峰）和全量数据画出来看不出差别。
+    点数不超过 2 * buckets + 2 的序列原样保留；y 缺失的点会被去掉。保持原有行顺序。
+    """
+    if df.empty or buckets <= 0:
+        return df
+    values = df[y].to_numpy(dtype=float)
+    positions_x = df[x].to_numpy()
+    if np.issubdtype(positions_x.dtype, np.datetime64):
+        positions_x = positions_x.astype("datetime64[ns]").astype(np.int64)
+    positions_x = positions_x.astype(float)
+    start, span = positions_x.min(), max(positions_x.max() - positions_x.min(), 1.0)
+    bucket = np.minimum((positions_x - start) / span * buckets, buckets - 1).astype(np.int64)
+
+    series, _ = pd.factorize(df[by])
+    sparse = np.bincount(series)[series] <= 2 * buckets + 2
+    keep = sparse & ~np.isnan(values)
+    dense = np.flatnonzero(~sparse & ~np.isnan(values))
+    if len(dense):
+        grouped = pd.Series(values[dense], index=dense).groupby(series[dense] * buckets + bucket[dense])
+        keep[grouped.idxmin().to_numpy()] = True
+        keep[grouped.idxmax().to_numpy()] = True
+        # 每条序列的首尾两点
+        valid = np.flatnonzero(~np.isnan(values))
+        _, first = np.unique(series[valid], return_index=True)
+        _, last = np.unique(series[valid][::-1], return_index=True)
+        keep[valid[first]] = True
+        keep[valid[len(valid) - 1 - last]] = True
+    return df[keep]
+
+
+# 股价复权方式（与 tushare 的 adj 参数同名）
+PRICE_ADJUST_MODES = {"none": "不复权", "qfq": "前复权", "hfq": "后复权"}
+
+
+def adjust_prices(prices: pd.DataFrame, factors: pd.DataFrame, mode: str) -> pd.DataFrame:
+    """
+    多家公司的日线 (ts_code, trade_date, close, ...) 按复权因子 (ts_code, trade_date, adj_factor) 一次性复权：
+    - hfq 后复权：close × adj_factor；
+    - qfq 前复权：close × adj_factor / 该股票区间内最新的 adj_factor（最新价与不复权一致，与 tushare pro_bar 口径相同）。
+    所有股票的 (公司, 日期) 编码成一个整数键，在排好序的因子键上一次 searchsorted 完成查找，不逐只处理、不做表连接。
+    缺少因子的交易日沿用该股票之前最近的因子（之前没有时取之后最近的），完全没有因子的股票保持不复权。
+    """
+    if mode == "none" or prices.empty or factors.empty:
+        return prices
+    n = len(prices)
+    codes, _ = pd.factorize(np.concatenate([prices["ts_code"].to_numpy(dtype=object), factors["ts_code"].to_numpy(dtype=object)]))
+    days = np.concatenate([prices["trade_date"].to_numpy(dtype="datetime64[D]"),
+                           factors["trade_date"].to_numpy(dtype="datetime64[D]")]).astype(np.int64)
+    # 高位为公司编号、低 32 位为日期：同一公司的键按日期有序，不同公司互不交叉
+    keys = (codes.astype(np.int64) << 32) | (days - days.min())
+    price_keys, price_codes = keys[:n], codes[:n]
+    order = np.argsort(keys[n:], kind="stable")
+    factor_keys = keys[n:][order]
+    factor_values = factors["adj_factor"].to_numpy(dtype=float)[order]
+
+    def same_code(positions):
+        inside = (positions >= 0) & (positions < len(factor_keys))
+        return inside & ((factor_keys[positions.clip(0, len(factor_keys) - 1)] >> 32) == price_codes)
+
+    positions = np.searchsorted(factor_keys, price_keys, side="right") - 1
+    positions = np.where(same_code(positions), positions, positions + 1)
+    factor = np.where(same_code(positions), factor_values[positions.clip(0, len(factor_keys) - 1)], np.nan)
+    if mode == "qfq":
+        # 每只股票最后一个交易日的因子：按键倒序后，各公司第一次出现的位置
+        latest_rows = np.argsort(price_keys, kind="stable")[::-1]
+        _, first = np.unique(price_codes[latest_rows], return_index=True)
+        latest = np.full(codes.max() + 1, np.nan)
+        latest[price_codes[latest_rows[first]]] = factor[latest_rows[first]]
+        factor = factor / latest[price_codes]
+    factor = np.where(np.isnan(factor), 1.0, factor)
+    return prices.assign(close=prices["close"].to_numpy(dtype=float) * factor)
+
+
+# 年化换算用的每年交易日数，以及滚动贝塔的窗口（交易日）
+TRADING_DAYS_PER_YEAR = 252
+ROLLING_BETA_WINDOW = 60
+# 计算相关系数时两只股票至少需要的共同交易日数
+MIN_CORRELATION_DAYS = 20
+
+
+def close_matrix(price_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    多家公司的日线 (name, trade_date, close) -> 对齐后的收盘价矩阵（交易日升序 × 公司按首次出现的顺序），
+    缺失的交易日为 NaN；同一天重复的记录取最后一条。直接按编码写入矩阵，代替 pivot 的排序和重排。
+    """
+    date_codes, dates = pd.factorize(price_df["trade_date"], sort=True)
+    name_codes, names = pd.factorize(price_df["name"])
+    matrix = np.full((len(dates), len(names)), np.nan)
+    matrix[date_codes, name_codes] = pd.to_numeric(price_df["close"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return pd.DataFrame(matrix, index=pd.DatetimeIndex(dates, name="trade_date"), columns=pd.Index(names, name="name"))
+
+
+def pairwise_correlation(values: np.ndarray, min_periods: int = MIN_CORRELATION_DAYS) -> np.ndarray:
+    """
+    按列的两两相关系数（与 DataFrame.corr 一样只用两列都有值的行），
+    用几次矩阵乘法同时算出所有列对的共同样本数、和、平方和与乘积和，代替逐对循环。
+    """
+    valid = ~np.isnan(values)
+    # 先按列去均值，减小平方和相减时的舍入误差
+    counts = valid.sum(axis=0)
+    centered = np.where(valid, values - np.where(valid, values, 0).sum(axis=0) / np.maximum(counts, 1), 0)
+    mask = valid.astype(float)
+    n = mask.T @ mask
+    sums = centered.T @ mask                    # sums[i, j]：第 j 列有值的行上第 i 列之和
+    squares = (centered ** 2).T @ mask
+    products = centered.T @ centered
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = products - sums * sums.T / n
+        variance = squares - sums ** 2 / n
+        correlation = covariance / np.sqrt(variance * variance.T)
+    correlation = np.clip(correlation, -1, 1)
+    correlation[(n < min_periods) | ~np.isfinite(correlation)] = np.nan
+    return correlation
+
+
+def _windowed_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """沿时间轴的滚动窗口求和（前缀和相减），前 window - 1 行为 NaN"""
+    cumulative = np.cumsum(values, axis=0)
+    sums = np.full(values.shape, np.nan)
+    sums[window - 1] = cumulative[window - 1]
+    sums[window:] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+
+def _relative_change(current: np.ndarray, base: np.ndarray) -> np.ndarray:
+    """current / base - 1；基准价缺失或不为正（停牌前无价、数据异常的 0 价）时为 NaN，不做除法"""
+    usable = base > 0
+    return np.where(usable, current / np.where(usable, base, 1.0), np.nan) - 1
+
+
+def compute_price_analytics(price_df: pd.DataFrame, beta_window: int = ROLLING_BETA_WINDOW) -> dict:
+    """
+    在对齐的收盘价矩阵上一次性计算所有选中股票的价格统计（全部按列向量化，股票数上百时也很快）：
+    - summary：每只股票一行：起止日期、首末收盘价、区间涨跌幅、年化收益、年化波动率、
+      最大回撤及其峰值/谷底/修复日期、相对篮子的贝塔；
+    - drawdown：回撤序列（交易日 × 股票）；
+    - rolling_beta：相对篮子（所选股票等权平均）的滚动贝塔（交易日 × 股票）；
+    - correlation：日收益率相关系数矩阵；
+    - annual_returns：各自然年的涨跌幅（年份 × 股票）。
+    停牌日不计收益（复牌当天的收益相对停牌前最后收盘价计算）；收益率均为简单收益率。
+    """
+    closes = close_matrix(price_df)
+    dates, names = closes.index, closes.columns
+    values = closes.to_numpy()
+    filled = closes.ffill().to_numpy()
+    days, columns = np.arange(len(dates)), np.arange(len(names))
+
+    returns = np.full(values.shape, np.nan)
+    returns[1:] = _relative_change(values[1:], filled[:-1])
+    has_return = ~np.isnan(returns)
+
+    first = np.argmax(~np.isnan(values), axis=0)
+    last = len(dates) - 1 - np.argmax(~np.isnan(values[::-1]), axis=0)
+    first_close, last_close = values[first, columns], values[last, columns]
+    span_days = (dates[last] - dates[first]).days.to_numpy()
+    # 不足一年的区间不做年化
+    growth = _relative_change(last_close, first_close) + 1
+    annual_return = np.where(span_days >= 365, growth ** (365.25 / np.maximum(span_days, 1)) - 1, np.nan)
+
+    # 年化波动率：日收益率的样本标准差 × sqrt(每年交易日数)，有效收益不足 2 个时为 NaN
+    return_counts = has_return.sum(axis=0)
+    centered = np.where(has_return, returns - np.where(has_return, returns, 0).sum(axis=0) / np.maximum(return_counts, 1), 0)
+    volatility = np.where(return_counts >= 2, np.sqrt((centered ** 2).sum(axis=0) / np.maximum(return_counts - 1, 1)), np.nan)
+    volatility = volatility * np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    # 最大回撤：相对历史最高收盘价的最大跌幅；峰值为谷底之前最后一次创新高的日期，修复为之后首次回到峰值的日期
+    running_max = np.fmax.accumulate(filled, axis=0)
+    drawdown = _relative_change(filled, running_max)
+    trough = np.argmin(np.where(np.isnan(drawdown), np.inf, drawdown), axis=0)
+    latest_high = np.maximum.accumulate(np.where(filled == running_max, days[:, None], -1), axis=0)
+    peak = latest_high[trough, columns]
+    max_drawdown = drawdown[trough, columns]
+    recovered = (days[:, None] > trough) & (filled >= filled[peak, columns]) & (max_drawdown < 0)
+    recovery = np.where(recovered.any(axis=0), np.argmax(recovered, axis=0), -1)
+
+    # 篮子收益：当天有收益的股票等权平均；贝塔 = cov(个股, 篮子) / var(篮子)，只用两者都有数据的交易日
+    counts = has_return.sum(axis=1)
+    basket = np.where(counts > 0, np.where(has_return, returns, 0).sum(axis=1) / np.maximum(counts, 1), np.nan)
+    valid = has_return & ~np.isnan(basket)[:, None]
+    stock = np.where(valid, returns, 0)
+    market = np.where(valid, basket[:, None], 0)
+    moments = [valid.astype(float), stock, market, stock * market, market * market]
+
+    def beta(n, s, m, sm, mm):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            covariance = sm / n - (s / n) * (m / n)
+            variance = mm / n - (m / n) ** 2
+            return np.where((n >= 2) & (variance > 0), covariance / variance, np.nan)
+
+    full_beta = beta(*(moment.sum(axis=0) for moment in moments))
+    window_sums = [_windowed_sums(moment, beta_window) for moment in moments] if len(dates) >= beta_window else None
+    rolling_beta = np.full(values.shape, np.nan)
+    if window_sums is not None:
+        # 窗口内有效交易日不足 80% 时不计算
+        rolling_beta = np.where(window_sums[0] >= 0.8 * beta_window, beta(*window_sums), np.nan)
+
+    def to_dates(positions):
+        return pd.DatetimeIndex(np.where(positions >= 0, dates.to_numpy()[positions], np.datetime64("NaT")))
+
+    summary = pd.DataFrame({
+        "start_date": dates[first], "end_date": dates[last],
+        "first_close": first_close, "last_close": last_close,
+        "period_return": _relative_change(last_close, first_close),
+        "annual_return": annual_return,
+        "volatility": volatility,
+        "max_drawdown": max_drawdown,
+        # 从未回撤（一路新高）的股票没有峰值/谷底日期
+        "peak_date": to_dates(np.where(max_drawdown < 0, peak, -1)),
+        "trough_date": to_dates(np.where(max_drawdown < 0, trough, -1)),
+        "recovery_date": to_dates(recovery),
+        "beta": full_beta,
+    }, index=names)
+
+    # 自然年涨跌幅：相对上一年末收盘价；区间内的第一年（或上市当年）相对首个收盘价
+    year_end = closes.groupby(dates.year).last()
+    previous = year_end.shift(1).to_numpy()
+    first_year = year_end.index.to_numpy()[:, None] == dates[first].year.to_numpy()
+    annual_returns = pd.DataFrame(_relative_change(year_end.to_numpy(), np.where(first_year, first_close, previous)),
+                                  index=year_end.index, columns=names)
+    annual_returns.index.name = "year"
+
+    return {
+        "summary": summary,
+        "drawdown": pd.DataFrame(drawdown, index=dates, columns=names),
+        "rolling_beta": pd.DataFrame(rolling_beta, index=dates, columns=names),
+        "correlation": pd.DataFrame(pairwise_correlation(returns), index=names, columns=names),
+        "annual_returns": annual_returns,
+    }
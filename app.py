@@ -1,8 +1,7 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import altair as alt
-import numpy as np
-from thefuzz import fuzz
 from collections import defaultdict
 # from finance_utils import (
 #     lookup_stock_basic,
@@ -21,23 +20,52 @@ from collections import defaultdict
 
 from finance_utils import (
     lookup_stock_basic,
-    fetch_all_data,
-    fetch_price,
     # compute_indicators,
-    fetch_full_industry_data,
+    resolve_industry_period,
+    fetch_industry_rankings,
     # calc_profitability,
     # calc_solvency,
     # calc_growth,
     # calc_operating,
     # calc_cashflow,
-    get_ai_analysis,
-    get_ai_price_chart_analysis,
-    fetch_accounting_data,
-    get_ai_response
+    get_stock_search_index,
+    stream_ai_response,
+    generate_ai_reports,
+    run_ai_report_jobs
+)
+from panel import BasketPanel
+from report_prompts import (
+    CAPABILITY_METRICS,
+    build_analysis_prompt,
+    CORRELATION_MATRIX_MAX,
+    PRICE_DATE_COLUMNS,
+    PRICE_STAT_COLUMNS,
+    build_price_chart_prompt,
+    build_price_analytics_summary,
+    build_strategy_prompt,
+    build_accounting_prompt,
+    build_capability_prompt,
+    build_cashflow_prompt,
+    build_prospect_prompt,
+    build_cross_industry_prompt
+)
+from report_pipeline import build_harvard_report_jobs
+from analytics import (
+    PRICE_ADJUST_MODES,
+    ROLLING_BETA_WINDOW,
+    compute_industry_rankings,
+    compute_price_analytics,
+    downsample_min_max,
 )
+from telemetry import telemetry
+from cache_store import memory_report
+from shared_store import shared_store
 
 st.set_page_config(layout="wide")
 st.title("📊 财务指标一键分析")
+# 每次脚本重跑记为一次页面运行，之后的上游调用和缓存访问都按页面区块归类统计
+telemetry.start_run(pd.Timestamp.now().strftime("%H:%M:%S"))
+telemetry.set_section("侧边栏")
 
 st.sidebar.header("参数设置")
 basic_df = lookup_stock_basic()
@@ -55,13 +83,27 @@ if 'ai_accounting_reports' not in st.session_state:
     st.session_state.ai_accounting_reports = {} # 初始化为一个空字典
 if 'ai_strategy_reports' not in st.session_state:
     st.session_state.ai_strategy_reports = {} # 初始化为空字典，按行业存储报告
+if 'ai_cashflow_reports' not in st.session_state:
+    st.session_state.ai_cashflow_reports = {} # 现金流是单公司分析，按股票代码存储报告
+if 'ai_capability_reports' not in st.session_state:
+    st.session_state.ai_capability_reports = {} # 盈利/偿债/成长/运营报告，按 (能力, 行业) 存储
+if 'ai_prospect_reports' not in st.session_state:
+    st.session_state.ai_prospect_reports = {} # 按行业存储前景分析报告
 
 if 'ai_cross_industry_report_content' not in st.session_state:
     st.session_state.ai_cross_industry_report_content = ""
 
+SEARCH_TOP_K = 30
+# 股价图（及回撤、滚动贝塔图）降采样的目标宽度（像素）：每 4 个像素一个桶、每桶保留最高/最低两个点。
+# 图表按容器宽度自适应，服务端拿不到浏览器里的实际宽度，因此固定按宽屏布局下主区域的大致宽度计算：
+# 更宽的屏幕上点数略显稀疏，更窄的屏幕上会多传一些点。可通过环境变量按部署的常用屏幕调整。
+PRICE_CHART_WIDTH_PX = int(os.environ.get("FINANCE_PRICE_CHART_WIDTH_PX", "1000"))
+PRICE_CHART_PIXELS_PER_BUCKET = 4
+PRICE_CHART_BUCKETS = max(1, PRICE_CHART_WIDTH_PX // PRICE_CHART_PIXELS_PER_BUCKET)
+
 st.sidebar.markdown("#### 搜索并添加公司")
 # 2. 搜索与添加逻辑
-name_filter = st.sidebar.text_input("输入公司名称或代码进行搜索：")
+name_filter = st.sidebar.text_input("输入公司名称、代码或拼音首字母进行搜索：")
 
 if name_filter:
     # # 搜索匹配的公司
@@ -72,42 +114,9 @@ if name_filter:
     
     # # 创建给 selectbox 用的选项
     # search_options = {f"{r['name']} ({r.ts_code})": r.ts_code for _, r in search_results_df.iterrows()}
-    # 1. 股票代码的精确包含匹配逻辑保持不变，因为代码通常是精确输入
-    code_mask = basic_df["ts_code"].str.contains(name_filter, na=False, case=False)
-
-    # 2. 对公司名称使用模糊匹配
-    #    a. 定义一个函数来计算相似度分数。我们使用 partial_ratio，
-    #       它很适合处理“中石油”匹配“中国石油”这类部分匹配的情况。
-    def calculate_similarity(name):
-        # 忽略大小写
-        return fuzz.partial_ratio(name_filter.lower(), name.lower())
-
-    #    b. 对 `basic_df` 中的每一个公司名称，都计算它和用户输入的相似度
-    #       .apply() 会为每一行都运行一次 calculate_similarity 函数
-    scores = basic_df['name'].apply(calculate_similarity)
-    
-    #    c. 创建一个布尔 mask，筛选出分数高于某个阈值的公司
-    #       阈值75是一个比较好的起点，可以根据需要调整
-    similarity_threshold = 75
-    name_mask = scores >= similarity_threshold
-
-    # 3. 将名称模糊匹配结果和代码精确匹配结果用 `|` (或) 运算符结合
-    final_mask = name_mask | code_mask
-    search_results_df = basic_df[final_mask]
-
-    # 4. (可选但推荐) 按相似度分数对结果进行排序，最相关的排在前面
-    #    我们只对通过名称匹配到的结果进行排序
-    if name_mask.any():
-        # 创建一个临时列用于排序
-        search_results_df = search_results_df.assign(score=scores)
-        # 只对名称匹配的结果按分数降序排，代码匹配的结果排在后面
-        search_results_df = search_results_df.sort_values(
-            by='score', 
-            ascending=False, 
-            key=lambda s: s.where(name_mask, 0) # 让代码匹配项的分数为0，排在后面
-        ).drop(columns='score') # 删除临时列   
-
-    search_options = {f"{r['name']} ({r.ts_code})": r.ts_code for _, r in search_results_df.iterrows()}
+    # 使用预计算的搜索索引：代码前缀 + 名称 n-gram 模糊匹配 + 拼音全拼/首字母，按相关度排序
+    search_results = get_stock_search_index().search(name_filter, top_k=SEARCH_TOP_K)
+    search_options = {f"{name} ({code})": code for code, name, _ in search_results}
     if not search_options:
         st.sidebar.info("没有找到匹配的公司。")
     else:
@@ -157,8 +166,7 @@ if st.sidebar.button("清空所有选择", use_container_width=True):
     
     # --- 核心修改：在这里也加入清除报告状态的逻辑 ---
     report_states_to_clear = [
-        'ai_price_report', 'ai_profit_report', 'ai_solvency_report',
-        'ai_growth_report', 'ai_operating_report', 'ai_cashflow_report',
+        'ai_price_report', 'ai_capability_reports', 'ai_prospect_reports', 'ai_cashflow_reports',
         'ai_accounting_reports', 'ai_strategy_reports',
         'ai_cross_industry_report_content'
     ]
@@ -178,76 +186,16 @@ stocks_to_analyze = st.session_state.selected_stocks
 current_year = pd.Timestamp.now().year
 year_range   = st.sidebar.slider("最新期年份范围", 2000, current_year, (current_year-1,current_year))
 hist_year_range   = st.sidebar.slider("历史年份范围", 2000, current_year, (year_range[0]-5,year_range[1]))
+price_adjust = st.sidebar.radio("股价复权方式", list(PRICE_ADJUST_MODES), index=1, format_func=PRICE_ADJUST_MODES.get,
+                                horizontal=True, help="前/后复权按复权因子消除分红、送转造成的价格跳空；不复权为当天的实际成交价")
 
 if 'ai_price_report' not in st.session_state:
     st.session_state.ai_price_report = ""
-if 'ai_profit_report' not in st.session_state:
-    st.session_state.ai_profit_report = ""
-if 'ai_solvency_report' not in st.session_state:
-    st.session_state.ai_solvency_report = ""
-if 'ai_growth_report' not in st.session_state:
-    st.session_state.ai_growth_report = ""
-if 'ai_operating_report' not in st.session_state:
-    st.session_state.ai_operating_report = ""
-if 'ai_cashflow_report' not in st.session_state:
-    st.session_state.ai_cashflow_report = ""
-
-
-# app.py
-
-def generate_ai_summary_for_capability(
-    capability_name, metrics_dict, company_code, company_name, industry_name, 
-    combined_historical_df, full_industry_df, final_period_used
-):
-    """为单个能力板块生成AI分析报告"""
-    
-    st.info(f"正在生成关于 **{company_name}** 的 **{capability_name}** 智能分析报告...")
-
-    # 1. 准备数据摘要
-    summary_lines = [
-        f"公司名称: {company_name} ({company_code})",
-        f"所属行业: {industry_name}",
-        f"分析报告期: {final_period_used}",
-        "\n核心指标表现:"
-    ]
 
-    latest_data = combined_historical_df[combined_historical_df['ts_code'] == company_code].iloc[-1]
-
-    for metric_code, metric_label in metrics_dict.items():
-        if metric_code in full_industry_df.columns:
-            # 即时计算排名和百分位
-            sorted_df = full_industry_df.sort_values(by=metric_code, ascending=False).reset_index(drop=True)
-            rank_info = sorted_df[sorted_df['ts_code'] == company_code]
-            rank = rank_info.index[0] + 1 if not rank_info.empty else 'N/A'
-            
-            company_value = latest_data.get(metric_code, 'N/A')
-            industry_avg = full_industry_df[metric_code].mean()
-
-            line = f"- {metric_label}: {company_value:.2f} (行业均值: {industry_avg:.2f}, 行业排名: {rank}/{len(full_industry_df)})"
-            summary_lines.append(line)
-
-    data_summary = "\n".join(summary_lines)
-
-    # 2. 构建针对性的提示词
-    prompt = f"""
-    请你扮演一位专业的金融分析师。我将为你提供上市公司“{company_name}”在“{capability_name}”方面的核心数据，请你基于这些数据，给出一份简明扼要、有洞察力的分析报告。
-
-    你的分析需要包含以下几个方面，并以清晰的要点形式呈现：
-    1.  **总体评价**: 对该公司在“{capability_name}”方面的整体表现给出一个定性评价（例如：优秀、良好、一般、有待改善等）。
-    2.  **亮点分析**: 指出其在该方面最突出的1个优点，并结合具体数据说明。
-    3.  **风险提示**: 指出其在该方面最值得关注的1个潜在风险或弱点，并结合具体数据说明。
-
-    以下是需要你分析的原始数据：
-    ---
-    {data_summary}
-    ---
-    请严格基于以上数据进行分析，不要编造数据之外的信息。
-    """
-
-    # 3. 调用AI并显示结果
-    # 注意：这里的 get_ai_analysis 是我们定义在 finance_utils.py 中的函数
-    ai_report = get_ai_analysis(company_name, prompt)
-    st.markdown(ai_report)
+st.sidebar.markdown("---")
+show_diagnostics = st.sidebar.checkbox("🔧 显示诊断面板", key="show_diagnostics")
+# 面板要等本次运行的数据都准备好之后（页面末尾）再填充
+diagnostics_panel = st.sidebar.container()
 
 # def display_metric_comparison(metric_name, metric_label, selected_codes_data, industry_df, ascending=False, format_str='{:.2f}'):
 #     """
@@ -325,19 +273,18 @@ def generate_ai_summary_for_capability(
 # app.py
 # app.py (最终修复版)
 
-def display_metric_comparison(metric_name, metric_label, selected_codes_data, industry_df, ascending=False, format_str='{:.2f}'):
+def display_metric_comparison(metric_name, metric_label, selected_codes_data, industry_df, rankings, format_str='{:.2f}'):
     """
     一个完整的函数，用于显示单个指标的行业对标，包含排名文字、仪表盘和龙头对比图。
+    排名、百分位直接读取预先算好的行业排名表 rankings（方向由 analytics.METRIC_ASCENDING 配置）。
     """
     st.markdown(f"#### 指标: {metric_label}")
 
-    # 1. 准备数据 (不变)
+    # 1. 准备数据
     if metric_name not in industry_df.columns:
         st.warning(f"行业数据中缺少指标: '{metric_label}'，无法进行对标分析。")
         return
-    industry_df[metric_name] = pd.to_numeric(industry_df[metric_name], errors='coerce').fillna(0)
-    industry_df = industry_df.sort_values(by=metric_name, ascending=ascending).reset_index(drop=True)
-    industry_df['rank'] = industry_df.index + 1
+    metric_rankings = rankings.xs(metric_name, level="metric")
     total_companies = len(industry_df)
 
     # 2. 左右布局
@@ -357,11 +304,10 @@ def display_metric_comparison(metric_name, metric_label, selected_codes_data, in
 
             company_name = row['name']
             company_value = row[metric_name]
-            company_rank_info = industry_df[industry_df['ts_code'] == row['ts_code']]
-            if company_rank_info.empty: continue
+            if row['ts_code'] not in metric_rankings.index: continue
             
-            rank = company_rank_info['rank'].iloc[0]
-            percentile = (1 - (rank - 1) / total_companies) * 100
+            rank = int(metric_rankings.at[row['ts_code'], 'rank'])
+            percentile = metric_rankings.at[row['ts_code'], 'percentile']
             
             with st.expander(f"**{company_name}** (当前值: {format_str.format(company_value)})", expanded=True):
                 st.info(f"在 {total_companies} 家公司中排名第 **{rank}**，优于 **{percentile:.1f}%** 的同业公司。")
@@ -384,7 +330,8 @@ def display_metric_comparison(metric_name, metric_label, selected_codes_data, in
     with col2: # 右侧：带颜色和数值的龙头对比图
         # (这部分代码本身就是正确的，因为它有自己的去重逻辑，无需修改)
         st.markdown("**与行业排名靠前的公司对比**")
-        top_2 = industry_df.head(2)
+        top_2_codes = metric_rankings.nsmallest(2, 'rank').index
+        top_2 = industry_df.drop_duplicates('ts_code').set_index('ts_code').loc[top_2_codes].reset_index()
         comparison_df = pd.concat([top_2, selected_codes_data]).drop_duplicates(subset=['ts_code']).reset_index(drop=True)
         comparison_df = comparison_df.dropna(subset=[metric_name])
         if comparison_df.empty:
@@ -408,6 +355,36 @@ def display_metric_comparison(metric_name, metric_label, selected_codes_data, in
         bar_chart = (bars + text).properties(  width=400, height=300)# title="与行业排名靠前公司对比",
         st.altair_chart(bar_chart)
 
+
+def render_diagnostics_panel(container):
+    """侧边栏诊断面板：最近几次页面运行按区块统计的上游调用、缓存命中、重试和排队等待，以及进程累计"""
+    runs = telemetry.recent_runs()
+    with container.expander("诊断：上游调用与缓存", expanded=True):
+        if runs:
+            # 一键生成等操作结束时会立即重跑，默认显示当前这次，也可以回看之前几次
+            run_id = st.selectbox(
+                "页面运行", [r["run"] for r in runs], key="diagnostics_run",
+                format_func=lambda rid: next(f"{r['label']} · {r['calls']}次 · {r['duration_s']:.2f}s" for r in runs if r["run"] == rid),
+            )
+            run_df = pd.DataFrame(telemetry.run_summary(run_id))
+            if run_df.empty:
+                st.caption("这次运行没有产生上游调用或缓存访问。")
+            else:
+                run_df["section"] = run_df["section"].replace("", "(未分区)")
+                st.markdown("**按页面区块**")
+                st.dataframe(run_df.groupby("section")[["calls", "duration_s", "rows", "bytes", "retries", "wait_s", "hits", "misses"]].sum())
+                st.markdown("**明细**")
+                st.dataframe(run_df, hide_index=True)
+        st.markdown("**进程累计**")
+        st.dataframe(pd.DataFrame(telemetry.process_summary()), hide_index=True)
+        st.markdown("**缓存数据内存占用（紧凑表示前后，MB）**")
+        st.dataframe(memory_report().round(2), hide_index=True)
+        st.markdown("**会话间共享的内存层**")
+        st.dataframe(pd.DataFrame([shared_store.stats()]), hide_index=True)
+        st.caption("kind：tushare / gemini 为上游调用，cache 为共享内存层（shared:）、磁盘缓存（disk:）、日线仓库和AI回复库。")
+        st.download_button("导出 JSON lines", telemetry.export_jsonl(), file_name="telemetry.jsonl", mime="application/x-ndjson")
+        st.download_button("导出 Prometheus 指标", telemetry.prometheus_text(), file_name="metrics.prom", mime="text/plain")
+
 if st.sidebar.button("🚀 开始分析", use_container_width=True):
     if stocks_to_analyze:
         st.session_state.analysis_started = True # <-- 核心修改：设置状态为True
@@ -416,7 +393,15 @@ if st.sidebar.button("🚀 开始分析", use_container_width=True):
         st.sidebar.warning("请先选择至少一家公司。")
 
 if st.session_state.analysis_started and stocks_to_analyze:
+    # 图表库较重，侧边栏和搜索先渲染，真正进入分析页时才导入
+    import altair as alt
+
+    # 所有选中公司的财务指标和日线只在这里并发拉取一次，下方各区块都从面板读取
+    telemetry.set_section("数据面板")
+    panel = BasketPanel(stocks_to_analyze, hist_year_range[0], hist_year_range[1], code_to_name_map, adjust=price_adjust).build()
+
     # --- 第一部分：所有选中公司的概览 (股价与最新指标) ---
+    telemetry.set_section("股价概览")
     st.header("股价概览：")
     col1, col2 = st.columns([1, 3])
 
@@ -440,50 +425,99 @@ if st.session_state.analysis_started and stocks_to_analyze:
             
     # with col2:
     # st.markdown("**股价历史走势**")
-    price_list = []
-    # 使用 hist_year_range 来决定股价图的时间跨度
+    # 使用 hist_year_range 来决定股价图的时间跨度（面板按同一区间拉取）
     for code in stocks_to_analyze:
-        pf = fetch_price(code, hist_year_range[0], hist_year_range[1])
-        pf["name"] = code_to_name_map.get(code, code)
-        price_list.append(pf)
-    if price_list:
-        df_price = pd.concat(price_list, ignore_index=True)
-        price_chart = alt.Chart(df_price.dropna()).mark_line().encode(
-            x=alt.X("trade_date:T", title="交易日"), y=alt.Y("close:Q", title="收盘价", scale=alt.Scale(zero=False)),
+        if ("daily", code) in panel.errors:
+            st.warning(f"获取 {code_to_name_map.get(code, code)} 的股价数据失败: {panel.errors[('daily', code)]}")
+        if ("adj_factor", code) in panel.errors:
+            st.warning(f"获取 {code_to_name_map.get(code, code)} 的复权因子失败，按不复权显示: {panel.errors[('adj_factor', code)]}")
+    df_price = panel.prices
+    if not df_price.empty:
+        # 时间窗口即缩放：窗口内的点数超过图宽能显示的数量时才降采样，窗口足够窄时自动回到全量日线
+        first_day, last_day = df_price["trade_date"].min().to_pydatetime(), df_price["trade_date"].max().to_pydatetime()
+        if first_day < last_day:
+            window = st.slider("股价图时间窗口（缩小窗口可查看完整日线）", min_value=first_day, max_value=last_day,
+                               value=(first_day, last_day), format="YYYY-MM-DD")
+        else:
+            window = (first_day, last_day)
+        df_window = df_price[df_price["trade_date"].between(*window)]
+        chart_df = downsample_min_max(df_window, "trade_date", "close", "name", PRICE_CHART_BUCKETS)
+        price_chart = alt.Chart(chart_df).mark_line().encode(
+            x=alt.X("trade_date:T", title="交易日"), y=alt.Y("close:Q", title=f"收盘价（{PRICE_ADJUST_MODES[price_adjust]}）", scale=alt.Scale(zero=False)),
             color=alt.Color("name:N", title="公司"), tooltip=["name", "trade_date", "close"]
         ).interactive()
         st.altair_chart(price_chart, use_container_width=True)
-    if not df_price.empty:
+        if len(chart_df) < len(df_window):
+            st.caption(f"图中显示 {len(chart_df):,} / {len(df_window):,} 个交易日数据点（按图宽保留每段的最高/最低价）。")
+
+        # 价格统计：在时间窗口内对齐的收盘价矩阵上一次性计算，下方图表和AI提示词共用
+        price_analytics = compute_price_analytics(df_window)
+        price_stats = price_analytics["summary"]
+        st.markdown("**区间统计**")
+        stats_view = pd.DataFrame({label: price_stats[column] * (100 if percent else 1)
+                                   for column, label, percent in PRICE_STAT_COLUMNS})
+        for column, label in PRICE_DATE_COLUMNS:
+            stats_view[label] = price_stats[column].dt.date
+        stats_view["贝塔"] = price_stats["beta"]
+        st.dataframe(stats_view.round(2))
+
+        price_tab_names = ["回撤"]
+        if len(price_stats) > 1:
+            price_tab_names += [f"滚动贝塔（{ROLLING_BETA_WINDOW}日）", "日收益率相关系数"]
+        price_tabs = st.tabs(price_tab_names)
+        with price_tabs[0]:
+            drawdown_df = price_analytics["drawdown"].melt(ignore_index=False, value_name="drawdown").dropna().reset_index()
+            drawdown_df["drawdown"] *= 100
+            drawdown_chart = alt.Chart(downsample_min_max(drawdown_df, "trade_date", "drawdown", "name", PRICE_CHART_BUCKETS)).mark_line().encode(
+                x=alt.X("trade_date:T", title="交易日"), y=alt.Y("drawdown:Q", title="相对前高回撤 (%)"),
+                color=alt.Color("name:N", title="公司"), tooltip=["name", "trade_date", alt.Tooltip("drawdown:Q", format=".2f")]
+            ).interactive()
+            st.altair_chart(drawdown_chart, use_container_width=True)
+        if len(price_stats) > 1:
+            with price_tabs[1]:
+                beta_df = price_analytics["rolling_beta"].melt(ignore_index=False, value_name="beta").dropna().reset_index()
+                beta_chart = alt.Chart(downsample_min_max(beta_df, "trade_date", "beta", "name", PRICE_CHART_BUCKETS)).mark_line().encode(
+                    x=alt.X("trade_date:T", title="交易日"), y=alt.Y("beta:Q", title="贝塔"),
+                    color=alt.Color("name:N", title="公司"), tooltip=["name", "trade_date", alt.Tooltip("beta:Q", format=".2f")]
+                ).interactive()
+                st.altair_chart(beta_chart, use_container_width=True)
+                st.caption("贝塔相对所选股票的等权组合计算（组合包含该股票本身）。")
+            with price_tabs[2]:
+                names = list(price_analytics["correlation"].columns)
+                corr_df = (price_analytics["correlation"].rename_axis("公司A")
+                           .melt(ignore_index=False, var_name="公司B", value_name="相关系数").reset_index())
+                heatmap = alt.Chart(corr_df).mark_rect().encode(
+                    x=alt.X("公司A:N", sort=names, title=None), y=alt.Y("公司B:N", sort=names, title=None),
+                    color=alt.Color("相关系数:Q", scale=alt.Scale(scheme="redblue", domain=[-1, 1], reverse=True)),
+                    tooltip=["公司A", "公司B", alt.Tooltip("相关系数:Q", format=".2f")]
+                )
+                if len(names) <= CORRELATION_MATRIX_MAX:
+                    heatmap += heatmap.mark_text().encode(text=alt.Text("相关系数:Q", format=".2f"), color=alt.value("black"))
+                st.altair_chart(heatmap, use_container_width=True)
+
         st.markdown("---") # 添加一条漂亮的分割线
         
         if st.button("生成股价走势AI分析", key="ai_price_chart_btn_full_width"):
             st.info("正在基于上图数据进行分析...")
-            
-            # (这部分AI调用逻辑与上一版完全相同)
-            df_price['trade_date'] = pd.to_datetime(df_price['trade_date'])
-            df_price_resampled = (df_price.set_index('trade_date')
-                                  .groupby('name')
-                                  .resample('M')
-                                  .last()
-                                  .drop(columns='name')
-                                  .reset_index())
-            df_price_resampled['month'] = df_price_resampled['trade_date'].dt.to_period('M')
-
-            summary_lines = []
-            for name, group in df_price_resampled.groupby('name'):
-                summary_lines.append(f"\n公司: {name}")
-                price_points = [f"{row.month}: {row.close:.2f}" for _, row in group.iterrows()]
-                summary_lines.append("月度收盘价序列: " + ", ".join(price_points))
-            
-            chart_data_summary = "\n".join(summary_lines)
-            st.session_state.ai_price_report = get_ai_price_chart_analysis(chart_data_summary)
-        if st.session_state.ai_price_report:
+
+            # 紧凑表格：区间统计、年度涨跌幅和相关系数（时间窗口内的统计结果）
+            chart_data_summary = build_price_analytics_summary(price_analytics, price_basis=PRICE_ADJUST_MODES[price_adjust])
+            st.markdown("#### 📈 AI趋势解读")
+            # 流式输出：首段文字到达即开始显示
+            st.session_state.ai_price_report = st.write_stream(stream_ai_response(build_price_chart_prompt(chart_data_summary)))
+        elif st.session_state.ai_price_report:
             st.markdown("#### 📈 AI趋势解读")
             st.info(st.session_state.ai_price_report)
 
     # --- 第二部分：按行业进行深度对标分析 ---
     st.markdown("---")
     st.header("行业深度分析")
+
+    # 一键生成完整哈佛分析报告：按钮放在最上方，但要等下方各行业的数据都准备好之后（本页末尾）才执行
+    run_full_report = st.button("🚀 一键生成完整哈佛分析报告（战略、会计、财务、前景、跨行业）", key="ai_full_report")
+    full_report_status = st.container()
+    # 各行业已准备好的分析数据，供一键生成时构建提示词
+    industry_contexts = {}
     
     # 1. 按行业对选择的公司进行分组
     grouped_stocks = defaultdict(list)
@@ -492,6 +526,7 @@ if st.session_state.analysis_started and stocks_to_analyze:
         grouped_stocks[industry].append(code)
 
     for industry, codes_in_industry in grouped_stocks.items():
+        telemetry.set_section(f"行业:{industry}")
         # st.subheader(f"分析对象: {industry} 行业")
         st.subheader(f"分析对象: {industry} 行业 - {', '.join([code_to_name_map.get(c, c) for c in codes_in_industry])}")
 
@@ -499,71 +534,31 @@ if st.session_state.analysis_started and stocks_to_analyze:
         
 
 
-        # with harvard_tabs[0]:
-        #     st.info("AI将利用其知识库，结合公司和行业背景，使用PEST、波特五力、SWOT等经典模型为您生成战略分析报告。")
-        #     company_name_for_prompt = code_to_name_map.get(codes_in_industry[0], codes_in_industry[0])
-
-        #     if st.button("生成AI战略分析报告", key=f"ai_strategy_{industry}"):
-        #     # 这个分析是针对整个行业的，所以我们只取第一个公司名作为代表
-        #         prompt = f"""
-        #         请你扮演一位顶级的战略顾问（如麦肯锡、波士顿咨询）。我将为你提供一家公司及其所属行业，你的任务是为“{company_name_for_prompt}”（所属行业：{industry}）生成一份全面的外部战略环境和内部竞争优势分析报告。
-
-        #         请严格按照以下经典框架来构建你的报告，并为每个部分提供2-3个最关键的要点：
-        #         1.  **PEST分析**: 分析影响该行业的宏观政治(Political)、经济(Economic)、社会(Social)和技术(Technological)因素。
-        #         2.  **波特五力模型**: 分析该行业的五种竞争力，包括：供应商的议价能力、购买者的议价能力、新进入者的威胁、替代品的威胁以及现有竞争者之间的竞争。
-        #         3.  **SWOT分析**: 结合以上分析，总结该公司（或该行业龙头企业）的优势(Strengths)、劣势(Weaknesses)、机会(Opportunities)和威胁(Threats)。
-
-        #         请确保你的分析是结构化、有逻辑的，并直接输出报告。
-        #         """
-        #         with st.spinner("AI正在进行宏观和行业战略分析..."):
-        #             ai_report = get_ai_response(prompt)
-        #             st.markdown(ai_report)
         with harvard_tabs[0]:
+            telemetry.set_section(f"行业:{industry}/战略分析")
             st.info("AI将利用其知识库，对您选择的所有公司进行独立的战略分析（PEST, 波特五力, SWOT），并在此基础上生成一份横向对比报告。")
             
             # 准备要分析的公司名称列表
             company_names_list = [code_to_name_map.get(c, c) for c in codes_in_industry]
             company_names_str = "、".join(company_names_list)
+            industry_contexts[industry] = {"codes": codes_in_industry, "company_names_str": company_names_str}
 
             # 只需一个按钮，触发对所有选中公司的全面分析
             if st.button(f"生成对【{company_names_str}】的AI战略分析报告", key=f"ai_strategy_compare_{industry}"):
                 
                 # 构建一个更强大的、要求进行独立分析+对比分析的Prompt
-                prompt = f"""
-                请你扮演一位顶级的战略顾问（如麦肯锡、波士顿咨询）。我将为你提供【{industry}】行业中的几家公司，你的任务是为它们生成一份全面的战略对比分析报告。
-
-                请严格按照以下**两个部分**来构建你的报告：
-
-                **第一部分：各公司独立深度分析**
-                请对以下每一家公司，都独立进行完整的分析。使用清晰的三级标题（###）来分隔每家公司。在每家公司的分析中，都应包含：
-                1.  **PEST分析**: 影响该行业的宏观政治(Political)、经济(Economic)、社会(Social)和技术(Technological)因素。
-                2.  **波特五力模型**: 该行业的五种竞争力分析。
-                3.  **SWOT分析**: 总结该公司自身的优势(Strengths)、劣势(Weaknesses)、机会(Opportunities)和威胁(Threats)。
-
-                **第二部分：横向对比与战略总结**
-                在完成所有公司的独立分析后，请撰写一个总结性的对比部分。使用清晰的二级标题（##）来标识。在这个部分，请回答以下核心问题：
-                1.  **战略定位差异**: 这几家公司的核心战略定位有何不同？（例如：一家聚焦高端市场，另一家主打性价比？）
-                2.  **竞争优势对比**: 谁拥有更强的竞争护城河？它们的优势分别体现在哪里（品牌、成本、技术、渠道）？
-                3.  **前景展望**: 结合宏观（PEST）和行业（五力）环境，哪家公司处于更有利的竞争地位，未来发展潜力更大？
-
-                需要分析的公司列表如下：
-                - {company_names_str}
-
-                请确保你的报告结构清晰、逻辑严谨，直接输出最终的分析报告。
-                """
+                prompt = build_strategy_prompt(industry, company_names_str)
                 
-                with st.spinner("AI正在进行公司战略分析，这可能需要一些时间..."):
-                    ai_report = get_ai_response(prompt)
-                    # 将生成的完整报告存入session state
-                    st.session_state.ai_strategy_reports[industry] = ai_report
-                    st.rerun()
+                # 流式显示生成过程，并将完整报告存入session state
+                st.session_state.ai_strategy_reports[industry] = st.write_stream(stream_ai_response(prompt))
 
             # 在每次页面加载时，都检查并显示已存储的报告
-            if industry in st.session_state.ai_strategy_reports:
+            elif industry in st.session_state.ai_strategy_reports:
                 st.markdown(st.session_state.ai_strategy_reports[industry])
         # --- Tab 2: 会计分析 ---
 
         with harvard_tabs[1]:
+            telemetry.set_section(f"行业:{industry}/会计分析")
             st.info("AI将扮演“资深审计师”，从商业模式出发，评估公司会计政策的稳健性与潜在风险。")
             
             for code in codes_in_industry:
@@ -572,104 +567,45 @@ if st.session_state.analysis_started and stocks_to_analyze:
                     
                     if st.button("开始会计分析", key=f"ai_accounting_{code}"):
                         with st.spinner(f"正在为 {company_name} 获取并分析会计数据..."):
-                            accounting_df = fetch_accounting_data(code, hist_year_range[0], hist_year_range[1])
+                            accounting_df = panel.statements(code)
                             
                             if accounting_df.empty:
                                 st.session_state.ai_accounting_reports[code] = "错误：未能获取到足够的会计数据进行分析。"
                                 st.rerun()
 
-                            accounting_df['quarter'] = pd.to_datetime(accounting_df['end_date']).dt.to_period('Q')
-                            summary_lines = [f"公司: {company_name} ({code})", "\n三大报表核心数据 (近8个季度，单位：元):"]
-                            
-                            metrics_to_check = {
-                                'n_income': '净利润',
-                                'n_cashflow_act': '经营活动现金流净额',
-                                'accounts_receiv': '应收账款',
-                                'inventories': '存货',
-                                'revenue': '营业收入' # 新增营收，为AI提供更直接的对比基准
-                            }
-
-                            for metric, label in metrics_to_check.items():
-                                if metric in accounting_df.columns and not accounting_df[metric].isnull().all():
-                                    series_str = ", ".join([f"{row.quarter}:{row[metric]:,.0f}" for _, row in accounting_df[['quarter', metric]].tail(8).iterrows() if pd.notna(row[metric])])
-                                    summary_lines.append(f"- {label}: {series_str}")
-                                else:
-                                    summary_lines.append(f"- {label}: (数据缺失)")
-
-                            full_summary = "\n".join(summary_lines)
-
-                            # --- 核心升级：采用你的例子启发的新Prompt ---
-                            prompt = f"""
-                            你是一位经验丰富的四大会计师事务所资深审计合伙人，擅长通过财务数据洞察企业真实的经营状况和会计质量。你的任务是为“{company_name}”撰写一份专业的会计质量评估报告。
-
-                            请严格按照以下三步进行分析，就像在准备审计委员会的汇报材料一样：
-                            1.  **商业模式与关键会计估计的识别**: 
-                                -   根据“营业收入”、“应收账款”和“存货”等数据的相对关系和变化趋势，推断该公司的核心商业模式是什么？(例如：是重资产的制造业，还是轻资产的服务业？是快速周转的零售业，还是项目周期长的工程业？)
-                                -   对于这种商业模式，其最重要的会计估计是什么？(例如，对于游戏公司是虚拟道具收入的确认周期；对于制造业是存货跌价准备的计提；对于软件公司是收入确认的时点)。
-
-                            2.  **会计政策稳健性与风险评估**:
-                                -   **收入确认质量**: 对比“净利润”与“经营活动现金流”。是否存在“增收不增利”或“有利润没现金”的情况？这是否暗示了过于激进的收入确认政策？
-                                -   **资产质量风险**: “应收账款”和“存货”的增长速度是否显著超过了“营业收入”的增速？这是否可能预示着回款困难或产品积压的风险？
-                                -   结合以上分析，你认为该公司的会计政策是偏向“稳健保守”还是“激进冒险”？请说明理由。
-
-                            3.  **综合结论**:
-                                -   综合上述分析，对该公司的整体会计质量给出一个明确的结论。其财务报表是否能够“真实、准确地反映企业的经营现实”？财务数据是否具有可靠的可比性？
-
-                            以下是你需要分析的核心数据：
-                            ---
-                            {full_summary}
-                            ---
-                            请直接输出你的专业评估报告，语言要严谨、客观，直指核心。
-                            """
+                            prompt = build_accounting_prompt(company_name, code, accounting_df)
                             
-                            ai_report = get_ai_analysis(company_name, prompt)
-                            st.session_state.ai_accounting_reports[code] = ai_report
-                            st.rerun() 
+                        st.session_state.ai_accounting_reports[code] = st.write_stream(stream_ai_response(build_analysis_prompt(company_name, prompt)))
 
-                    if code in st.session_state.ai_accounting_reports:
+                    elif code in st.session_state.ai_accounting_reports:
                         st.markdown(st.session_state.ai_accounting_reports[code])
         with harvard_tabs[2]:
+            telemetry.set_section(f"行业:{industry}/财务分析")
 
             # --- 核心修正：使用 year_range[1] 作为行业对标的起始年份 ---
             st.info(f"正在基于年份 `{year_range[1]}` 回溯查找最新的有效行业数据报告期...")
             end_year_for_industry = year_range[1]
             
-            full_industry_df = pd.DataFrame()
-            final_period_used = None
-            for year in range(end_year_for_industry, end_year_for_industry - 5, -1):
-                for month_day in ["1231", "0930", "0630", "0331"]:
-                    period_to_try = f"{year}{month_day}"
-                    if pd.to_datetime(period_to_try) > pd.Timestamp.now(): continue
-                    full_industry_df = fetch_full_industry_data(industry, period_to_try)
-                    if not full_industry_df.empty:
-                        final_period_used = period_to_try
-                        break
-                if final_period_used: break
+            final_period_used, full_industry_df = resolve_industry_period(industry, end_year_for_industry)
+            # 每个 (行业, 报告期) 只计算一次排名表，下方所有对标图和AI摘要都复用
+            industry_rankings = fetch_industry_rankings(industry, final_period_used) if final_period_used else compute_industry_rankings(full_industry_df)
             
             if final_period_used:
                 st.success(f"成功！已自动采用最新的有效报告期 '{final_period_used}' 进行行业对标分析。")
             else:
                 st.error("错误：在最近5年的所有报告期内均未找到有效的行业数据。")
 
-            historical_data_list = []
-            line_styles = ['solid', 'dashed', 'dotted', 'dotdash']
-            
-            for i, code in enumerate(codes_in_industry):
-                # 使用正确的历史年份范围滑块来获取数据
-                df = fetch_all_data(code, hist_year_range[0], hist_year_range[1])
-                
-                if not df.empty:
-                    df['name'] = code_to_name_map.get(code, code)
-                    # --- 关键代码：在这里为每家公司的数据添加 'style' 列 ---
-                    df['style'] = line_styles[i % len(line_styles)] 
-                    historical_data_list.append(df)
-            
+            for code in codes_in_industry:
+                if ("fina_indicator", code) in panel.errors:
+                    st.warning(f"获取 {code_to_name_map.get(code, code)} 的历史财务数据失败: {panel.errors[('fina_indicator', code)]}")
+
+            # 本行业公司的历史指标直接从面板切片，每家公司附带各自的折线线型 style
+            combined_historical_df = panel.history(codes_in_industry, styles=True)
+
             # 如果一家公司的历史数据都没取到，就跳过这个行业的分析
-            if not historical_data_list: 
+            if combined_historical_df.empty:
                 st.warning(f"未能获取到 {industry} 行业所选公司的任何历史数据。")
                 continue
-                
-            combined_historical_df = pd.concat(historical_data_list, ignore_index=True)
 
 
 
@@ -680,6 +616,10 @@ if st.session_state.analysis_started and stocks_to_analyze:
             selected_data = pd.DataFrame()
             if not full_industry_df.empty:
                 selected_data = full_industry_df[full_industry_df['ts_code'].isin(codes_in_industry)]
+            industry_contexts[industry].update(
+                historical_df=combined_historical_df, selected_data=selected_data,
+                rankings=industry_rankings, period=final_period_used
+            )
 
             # # --- 添加一个内容更详细的调试面板 ---
             # with st.expander("👉 点击查看【终极调试面板】"):
@@ -710,16 +650,35 @@ if st.session_state.analysis_started and stocks_to_analyze:
             #     else:
             #         st.error("结果为 `False`，不会显示行业对比。") 
             # 4. 创建Tabs进行分类展示
+            # 一次性并发生成本行业的全部能力报告（盈利/偿债/成长/运营 + 每家公司的现金流），
+            # 总耗时约等于最慢的一份；结果写入各自的报告位置，下方各标签页直接显示
+            if st.button("⚡ 并发生成全部能力分析报告", key=f"ai_all_capabilities_{industry}"):
+                capability_prompts = {
+                    (cap, None): build_analysis_prompt("对比报告", build_capability_prompt(
+                        cap, industry, codes_in_industry, code_to_name_map,
+                        combined_historical_df, selected_data, industry_rankings, final_period_used))
+                    for cap in ("profit", "solvency", "growth", "operating")
+                }
+                for code in codes_in_industry:
+                    company_name = code_to_name_map.get(code, code)
+                    capability_prompts[("cashflow", code)] = build_analysis_prompt(
+                        company_name, build_cashflow_prompt(company_name, code, combined_historical_df))
+
+                progress = st.progress(0.0, text="AI正在并发生成能力分析报告...")
+                for done, ((cap, code), report) in enumerate(generate_ai_reports(capability_prompts), start=1):
+                    if cap == "cashflow":
+                        st.session_state.ai_cashflow_reports[code] = report
+                    else:
+                        st.session_state.ai_capability_reports[(cap, industry)] = report
+                    progress.progress(done / len(capability_prompts), text=f"已完成 {done}/{len(capability_prompts)} 份报告")
+                progress.empty()
+
             tab_profit, tab_solvency, tab_growth, tab_operating, tab_cashflow = st.tabs(["盈利能力", "偿债能力", "成长能力", "运营能力", "现金流"])
 
             with tab_profit:
                 st.subheader("盈利能力历史趋势")
                 # --- 图表升级：使用Melt和Facet来展示多个指标 ---
-                profit_metrics_to_plot = {
-                    'roe': 'ROE',
-                    'netprofit_margin': '净利率',
-                    'grossprofit_margin': '毛利率'
-                }
+                profit_metrics_to_plot = CAPABILITY_METRICS["profit"]
                 df_p = combined_historical_df[['end_date', 'name', 'style'] + list(profit_metrics_to_plot.keys())].rename(columns=profit_metrics_to_plot)
                 df_p_melted = df_p.melt(id_vars=['end_date', 'name', 'style'], var_name='指标名称', value_name='指标值')
                 
@@ -766,13 +725,13 @@ if st.session_state.analysis_started and stocks_to_analyze:
                     metric_tabs = st.tabs(["ROE 对标", "净利率 对标", "毛利率 对标"])
 
                     with metric_tabs[0]:
-                        display_metric_comparison('roe', 'ROE', selected_data, full_industry_df, format_str='{:.2f}%')
+                        display_metric_comparison('roe', 'ROE', selected_data, full_industry_df, industry_rankings, format_str='{:.2f}%')
                     
                     with metric_tabs[1]:
-                        display_metric_comparison('netprofit_margin', '净利率', selected_data, full_industry_df, format_str='{:.2f}%')
+                        display_metric_comparison('netprofit_margin', '净利率', selected_data, full_industry_df, industry_rankings, format_str='{:.2f}%')
 
                     with metric_tabs[2]:
-                        display_metric_comparison('grossprofit_margin', '毛利率', selected_data, full_industry_df, format_str='{:.2f}%')
+                        display_metric_comparison('grossprofit_margin', '毛利率', selected_data, full_industry_df, industry_rankings, format_str='{:.2f}%')
                 else:
                     st.warning("无有效的行业数据，无法进行指标对标分析。")
                 # --- 全新升级：盈利能力AI对比分析模块 ---
@@ -781,68 +740,15 @@ if st.session_state.analysis_started and stocks_to_analyze:
                 
                 # 只有一个按钮，用于分析本行业内所有选中的公司
                 if st.button(f"生成对所选公司的盈利能力报告", key=f"ai_profit_compare_{industry}"):
-                    
-                    # 1. 为选中的每家公司收集数据，并拼接成一个大的数据摘要
-                    all_summaries = []
-                    for code in codes_in_industry:
-                        company_name = code_to_name_map.get(code, code)
-                        
-                        # a. 历史数据摘要
-                        history_df = combined_historical_df[combined_historical_df['ts_code'] == code]
-                        history_summary_lines = [f"\n--- 公司: {company_name} ({code}) ---", "历史趋势:"]
-                        for metric, label in profit_metrics_to_plot.items():
-                            # series_str = " -> ".join([f"{x:.2f}" for x in history_df[metric].tail(5)])
-                            history_df['quarter'] = pd.to_datetime(history_df['end_date']).dt.to_period('Q')
-                            series_str = ", ".join([f"{row.quarter}: {row[metric]:.2f}" for _, row in history_df[['quarter', metric]].tail(8).iterrows()])
-                            history_summary_lines.append(f"- {label} (近5期): {series_str}")
-                        
-                        # b. 行业对标数据摘要
-                        comparison_summary_lines = ["\n行业对标 (报告期 " + final_period_used + "):"]
-                        if not selected_data.empty:
-                            company_industry_data = selected_data[selected_data['ts_code'] == code].iloc[0]
-                            for metric, label in profit_metrics_to_plot.items():
-                                if metric in full_industry_df.columns:
-                                    sorted_df = full_industry_df.sort_values(by=metric, ascending=False).reset_index()
-                                    rank_info = sorted_df[sorted_df['ts_code'] == code]
-                                    rank = rank_info.index[0] + 1 if not rank_info.empty else 'N/A'
-                                    value = company_industry_data.get(metric, 0)
-                                    comparison_summary_lines.append(f"- {label}: {value:.2f}%, 行业排名: {rank}/{len(full_industry_df)}")
-                        
-                        all_summaries.extend(history_summary_lines + comparison_summary_lines)
-                    
-                    full_summary = "\n".join(all_summaries)
-
-                    # 2. 构建一个要求进行“对比分析”的全新提示词
-                    prompt = f"""
-                    你是一位顶尖的金融分析师，对商业的季节性（Seasonality）有深刻理解。我将为你提供【{industry}】行业中几家公司的盈利能力数据。
-
-                    你的任务是生成一份专业的**对比分析报告**。分析时必须注意：这些数据有强烈的季节性特征，因此简单的环比（如Q1对比前一年的Q4）可能具有误导性。请你重点进行**同比增长**的对比分析。
-
-                    报告需包含以下要点：
-                    1.  **综合诊断**: 结合行业排名和历史数据，谁的综合盈利能力最强？它们的盈利能力是否表现出相似的季节性规律？
-                    2.  **趋势解读**: 在剔除季节性因素后（比如观察同比数据），哪家公司的盈利能力是在真实地改善？谁的行业地位在逐年巩固？
-                    3.  **投资观点**: 基于以上分析，从盈利能力和其稳定性的角度看，你会更青睐哪家公司？
-
-                    以下是需要你分析的原始数据（格式为 YYYY-QQ: 值）:
-                    ---
-                    {full_summary}
-                    ---
-                    请确保你的分析是基于公司之间的横向对比，而不仅仅是罗列各家公司的情况。
-                    """
-                    
-                    # 3. 调用通用AI函数并显示结果
-                    with st.spinner("AI正在深度对比分析中，请稍候..."):
-                        st.session_state.ai_profit_report = get_ai_analysis("对比报告", prompt)
-                if st.session_state.ai_profit_report:
-                    st.markdown(st.session_state.ai_profit_report)
+                    prompt = build_capability_prompt("profit", industry, codes_in_industry, code_to_name_map,
+                                                     combined_historical_df, selected_data, industry_rankings, final_period_used)
+                    st.session_state.ai_capability_reports[("profit", industry)] = st.write_stream(stream_ai_response(build_analysis_prompt("对比报告", prompt)))
+                elif ("profit", industry) in st.session_state.ai_capability_reports:
+                    st.markdown(st.session_state.ai_capability_reports[("profit", industry)])
 
             with tab_solvency:
                 st.subheader("偿债能力历史趋势")
-                solvency_metrics_to_plot = {
-                    'debt_to_assets': '资产负债率 (%)',
-                    'current_ratio': '流动比率',
-                    'quick_ratio': '速动比率'
-                }
+                solvency_metrics_to_plot = CAPABILITY_METRICS["solvency"]
                 df_s = combined_historical_df[['end_date', 'name', 'style'] + list(solvency_metrics_to_plot.keys())].rename(columns=solvency_metrics_to_plot)
                 df_s_melted = df_s.melt(id_vars=['end_date', 'name', 'style'], var_name='指标名称', value_name='指标值')
 
@@ -865,70 +771,22 @@ if st.session_state.analysis_started and stocks_to_analyze:
                 st.markdown("---"); st.subheader("偿债能力指标对标")
                 if not selected_data.empty:
                     metric_tabs = st.tabs(["资产负债率 对标", "流动比率 对标", "速动比率 对标"])
-                    with metric_tabs[0]: display_metric_comparison('debt_to_assets', '资产负债率', selected_data, full_industry_df, ascending=True, format_str='{:.2f}%')
-                    with metric_tabs[1]: display_metric_comparison('current_ratio', '流动比率', selected_data, full_industry_df)
-                    with metric_tabs[2]: display_metric_comparison('quick_ratio', '速动比率', selected_data, full_industry_df)
+                    with metric_tabs[0]: display_metric_comparison('debt_to_assets', '资产负债率', selected_data, full_industry_df, industry_rankings, format_str='{:.2f}%')
+                    with metric_tabs[1]: display_metric_comparison('current_ratio', '流动比率', selected_data, full_industry_df, industry_rankings)
+                    with metric_tabs[2]: display_metric_comparison('quick_ratio', '速动比率', selected_data, full_industry_df, industry_rankings)
                 st.markdown("---")
                 st.subheader("🤖 偿债能力AI对比分析")
 
                 if st.button(f"生成对所选公司的偿债能力报告", key=f"ai_solvency_compare_{industry}"):
-                    
-                    # 1. 收集所有偿债能力相关的数据
-                    all_summaries = []
-                    for code in codes_in_industry:
-                        company_name = code_to_name_map.get(code, code)
-                        
-                        history_df = combined_historical_df[combined_historical_df['ts_code'] == code]
-                        history_summary_lines = [f"\n--- 公司: {company_name} ({code}) ---", "历史趋势:"]
-                        for metric, label in solvency_metrics_to_plot.items():
-                            series_str = " -> ".join([f"{x:.2f}" for x in history_df[metric].tail(5)])
-                            history_summary_lines.append(f"- {label} (近5期): {series_str}")
-                        
-                        comparison_summary_lines = ["\n行业对标 (报告期 " + final_period_used + "):"]
-                        if not selected_data.empty:
-                            company_industry_data = selected_data[selected_data['ts_code'] == code].iloc[0]
-                            for metric, label in solvency_metrics_to_plot.items():
-                                if metric in full_industry_df.columns:
-                                    # 注意：资产负债率是升序排名（越小越好）
-                                    asc = True if metric == 'debt_to_assets' else False
-                                    sorted_df = full_industry_df.sort_values(by=metric, ascending=asc).reset_index()
-                                    rank_info = sorted_df[sorted_df['ts_code'] == code]
-                                    rank = rank_info.index[0] + 1 if not rank_info.empty else 'N/A'
-                                    value = company_industry_data.get(metric, 0)
-                                    comparison_summary_lines.append(f"- {label}: {value:.2f}, 行业排名: {rank}/{len(full_industry_df)}")
-                        
-                        all_summaries.extend(history_summary_lines + comparison_summary_lines)
-                    
-                    full_summary = "\n".join(all_summaries)
-
-                    # 2. 构建一个要求进行“偿债能力对比分析”的全新提示词
-                    prompt = f"""
-                    你是一位顶尖的金融风控专家，擅长评估公司的财务健康状况和偿债风险。我将为你提供【{industry}】行业中几家公司的偿债能力数据。
-
-                    你的任务是生成一份专业的**偿债能力对比分析报告**。请务必使用**“行业排名”**来衡量它们的相对风险水平。
-                    1.  **风险评级**: 谁的财务杠杆最合理，偿债风险最低？谁的风险最高？请结合**资产负债率的行业排名**进行评级。
-                    2.  **长短期风险分析**: 对比它们的短期流动性（流动比率）和长期债务负担（资产负债率），是否存在风险错配？
-                    3.  **战略推断**: 从财务杠杆的使用和排名看，可以看出这几家公司的经营战略有何不同吗？（例如：一家是利用高杠杆获取高排名的激进派，另一家是低杠杆稳健派）
-                    4.  **贷方视角**: 如果你是银行审批官，谁的**行业排名和财务数据**更能让你放心批复贷款？
-
-                    以下是需要你分析的几家公司的原始数据：
-                    ---
-                    {full_summary}
-                    ---
-                    请确保你的分析紧扣“偿债能力”这个主题，并充分利用所给的全部数据进行对比。
-                    """
-                    
-                    # 3. 调用通用AI函数并显示结果
-                    with st.spinner("AI正在深度对比分析中，请稍候..."):
-                        # ai_report = get_ai_analysis("对比报告", prompt)
-                        # st.markdown(ai_report)
-                        st.session_state.ai_solvency_report = get_ai_analysis("对比报告", prompt)
-                if st.session_state.ai_solvency_report:
-                    st.markdown(st.session_state.ai_solvency_report)
+                    prompt = build_capability_prompt("solvency", industry, codes_in_industry, code_to_name_map,
+                                                     combined_historical_df, selected_data, industry_rankings, final_period_used)
+                    st.session_state.ai_capability_reports[("solvency", industry)] = st.write_stream(stream_ai_response(build_analysis_prompt("对比报告", prompt)))
+                elif ("solvency", industry) in st.session_state.ai_capability_reports:
+                    st.markdown(st.session_state.ai_capability_reports[("solvency", industry)])
 
             with tab_growth:
                 st.subheader("成长能力历史趋势")
-                growth_metrics_to_plot = {'or_yoy': '营收同比 (%)', 'netprofit_yoy': '净利同比 (%)'}
+                growth_metrics_to_plot = CAPABILITY_METRICS["growth"]
                 df_g = combined_historical_df[['end_date', 'name', 'style'] + list(growth_metrics_to_plot.keys())].rename(columns=growth_metrics_to_plot)
                 df_g_melted = df_g.melt(id_vars=['end_date', 'name', 'style'], var_name='指标名称', value_name='指标值')
 
@@ -952,55 +810,20 @@ if st.session_state.analysis_started and stocks_to_analyze:
                 st.markdown("---"); st.subheader("成长能力指标对标")
                 if not selected_data.empty:
                     metric_tabs = st.tabs(["营收同比 对标", "净利同比 对标"])
-                    with metric_tabs[0]: display_metric_comparison('or_yoy', '营收同比', selected_data, full_industry_df, format_str='{:.2f}%')
-                    with metric_tabs[1]: display_metric_comparison('netprofit_yoy', '净利同比', selected_data, full_industry_df, format_str='{:.2f}%')
+                    with metric_tabs[0]: display_metric_comparison('or_yoy', '营收同比', selected_data, full_industry_df, industry_rankings, format_str='{:.2f}%')
+                    with metric_tabs[1]: display_metric_comparison('netprofit_yoy', '净利同比', selected_data, full_industry_df, industry_rankings, format_str='{:.2f}%')
                 st.markdown("---")
                 st.subheader("🤖 成长能力AI对比分析")
                 if st.button(f"生成成长能力对比报告", key=f"ai_growth_compare_{industry}"):
-                    all_summaries = []
-                    for code in codes_in_industry:
-                        company_name = code_to_name_map.get(code, code)
-                        history_df = combined_historical_df[combined_historical_df['ts_code'] == code]
-                        history_summary_lines = [f"\n--- 公司: {company_name} ({code}) ---", "历史趋势:"]
-                        for metric, label in growth_metrics_to_plot.items():
-                            series_str = " -> ".join([f"{x:.2f}" for x in history_df[metric].tail(5)])
-                            history_summary_lines.append(f"- {label} (近5期): {series_str}")
-                        comparison_summary_lines = ["\n行业对标 (报告期 " + final_period_used + "):"]
-                        if not selected_data.empty:
-                            company_industry_data = selected_data[selected_data['ts_code'] == code].iloc[0]
-                            for metric, label in growth_metrics_to_plot.items():
-                                if metric in full_industry_df.columns:
-                                    sorted_df = full_industry_df.sort_values(by=metric, ascending=False).reset_index()
-                                    rank_info = sorted_df[sorted_df['ts_code'] == code]
-                                    rank = rank_info.index[0] + 1 if not rank_info.empty else 'N/A'
-                                    value = company_industry_data.get(metric, 0)
-                                    comparison_summary_lines.append(f"- {label}: {value:.2f}%, 行业排名: {rank}/{len(full_industry_df)}")
-                        all_summaries.extend(history_summary_lines + comparison_summary_lines)
-                    full_summary = "\n".join(all_summaries)
-                    prompt = f"""
-                        你是一位顶尖的成长股投资分析师。我将为你提供【{industry}】行业中几家公司的成长能力数据。
-
-                    你的任务是生成一份专业的**成长能力对比分析报告**。
-                    1.  **成长质量评估**: 谁是真正的成长领袖？请结合**营收增速和净利增速的绝对值与行业排名**进行判断。是否存在“增收不增利”的伪成长？
-                    2.  **趋势与持续性**: 结合历史数据，谁的增长趋势更稳定、更具持续性？谁的行业领先地位是新晋获得的？
-                    3.  **未来潜力**: 基于当前的增长态势和行业排名，你认为哪家公司未来的增长潜力更大？
-
-                        以下是需要你分析的几家公司的原始数据：
-                        ---
-                        {full_summary}
-                        ---
-                        请围绕“成长性”这个核心进行深入对比分析。
-                        """
-                    with st.spinner("AI正在深度对比分析中，请稍候..."):
-                        # ai_report = get_ai_analysis("对比报告", prompt)
-                        # st.markdown(ai_report)
-                        st.session_state.ai_growth_report = get_ai_analysis("对比报告", prompt)
-                if st.session_state.ai_growth_report:
-                    st.markdown(st.session_state.ai_growth_report)
+                    prompt = build_capability_prompt("growth", industry, codes_in_industry, code_to_name_map,
+                                                     combined_historical_df, selected_data, industry_rankings, final_period_used)
+                    st.session_state.ai_capability_reports[("growth", industry)] = st.write_stream(stream_ai_response(build_analysis_prompt("对比报告", prompt)))
+                elif ("growth", industry) in st.session_state.ai_capability_reports:
+                    st.markdown(st.session_state.ai_capability_reports[("growth", industry)])
 
             with tab_operating:
                 st.subheader("运营能力历史趋势")
-                op_metrics_to_plot = {'assets_turn': '总资产周转率', 'inv_turn': '存货周转率', 'ar_turn': '应收账款周转率'}
+                op_metrics_to_plot = CAPABILITY_METRICS["operating"]
                 df_o = combined_historical_df[['end_date', 'name', 'style'] + list(op_metrics_to_plot.keys())].rename(columns=op_metrics_to_plot)
                 df_o_melted = df_o.melt(id_vars=['end_date', 'name', 'style'], var_name='指标名称', value_name='指标值')
                 
@@ -1023,54 +846,19 @@ if st.session_state.analysis_started and stocks_to_analyze:
                 st.altair_chart(op_history_chart, use_container_width=True)
                 st.markdown("---")
                 if not selected_data.empty:
-                    display_metric_comparison('assets_turn', '总资产周转率', selected_data, full_industry_df)
+                    display_metric_comparison('assets_turn', '总资产周转率', selected_data, full_industry_df, industry_rankings)
                 st.markdown("---")
                 st.subheader("🤖 运营能力AI对比分析")
                 if st.button(f"生成运营能力对比报告", key=f"ai_operating_compare_{industry}"):
-                    all_summaries = []
-                    for code in codes_in_industry:
-                        company_name = code_to_name_map.get(code, code)
-                        history_df = combined_historical_df[combined_historical_df['ts_code'] == code]
-                        history_summary_lines = [f"\n--- 公司: {company_name} ({code}) ---", "历史趋势:"]
-                        for metric, label in op_metrics_to_plot.items():
-                            # series_str = " -> ".join([f"{x:.2f}" for x in history_df[metric].tail(5)])
-                            history_df['quarter'] = pd.to_datetime(history_df['end_date']).dt.to_period('Q')
-                            series_str = ", ".join([f"{row.quarter}: {row[metric]:.2f}" for _, row in history_df[['quarter', metric]].tail(8).iterrows()])                        
-                            history_summary_lines.append(f"- {label} (近5期): {series_str}")
-                        comparison_summary_lines = ["\n行业对标 (报告期 " + final_period_used + "):"]
-                        if not selected_data.empty:
-                            company_industry_data = selected_data[selected_data['ts_code'] == code].iloc[0]
-                            for metric, label in op_metrics_to_plot.items():
-                                if metric in full_industry_df.columns:
-                                    sorted_df = full_industry_df.sort_values(by=metric, ascending=False).reset_index()
-                                    rank_info = sorted_df[sorted_df['ts_code'] == code]
-                                    rank = rank_info.index[0] + 1 if not rank_info.empty else 'N/A'
-                                    value = company_industry_data.get(metric, 0)
-                                    comparison_summary_lines.append(f"- {label}: {value:.2f}, 行业排名: {rank}/{len(full_industry_df)}")
-                        all_summaries.extend(history_summary_lines + comparison_summary_lines)
-                    full_summary = "\n".join(all_summaries)
-                    prompt = f"""
-                    你是一位顶尖的企业运营管理顾问，非常清楚运营效率会受季节性需求波动的影响。我将为你提供【{industry}】行业中几家公司的运营效率数据。
-
-                    你的任务是生成一份专业的**运营能力对比分析报告**。分析时请务必考虑季节性因素。
-                    1.  **效率评级**: 谁是最高效的运营者？请对其运营效率进行排序。
-                    2.  **季节性管理**: 从各项周转率的季度变化中，能否看出哪家公司对季节性波动的管理能力更强（例如，在旺季能快速清空库存）？
-                    3.  **真实效率趋势**: 剔除季节性影响后，谁的运营效率在持续、真实地提升？
-
-                    以下是需要你分析的原始数据（格式为 YYYY-QQ: 值）:
-                    ---
-                    {full_summary}
-                    ---
-                    请围绕“运营效率”这个核心进行深入对比分析。
-                    """
-                    with st.spinner("AI正在深度对比分析中，请稍候..."):
-                        st.session_state.ai_operating_report = get_ai_analysis("对比报告", prompt)
-                if st.session_state.ai_operating_report:
-                    st.markdown(st.session_state.ai_operating_report)
+                    prompt = build_capability_prompt("operating", industry, codes_in_industry, code_to_name_map,
+                                                     combined_historical_df, selected_data, industry_rankings, final_period_used)
+                    st.session_state.ai_capability_reports[("operating", industry)] = st.write_stream(stream_ai_response(build_analysis_prompt("对比报告", prompt)))
+                elif ("operating", industry) in st.session_state.ai_capability_reports:
+                    st.markdown(st.session_state.ai_capability_reports[("operating", industry)])
 
             with tab_cashflow:
                 st.subheader("现金流历史趋势")
-                cash_metrics_to_plot = {'fcff': '企业自由现金流', 'fcfe': '股权自由现金流'}
+                cash_metrics_to_plot = CAPABILITY_METRICS["cashflow"]
                 df_c = combined_historical_df[['end_date', 'name', 'style'] + list(cash_metrics_to_plot.keys())].rename(columns=cash_metrics_to_plot)
                 df_c_melted = df_c.melt(id_vars=['end_date', 'name', 'style'], var_name='指标名称', value_name='金额 (元)')
                 
@@ -1101,162 +889,88 @@ if st.session_state.analysis_started and stocks_to_analyze:
                     
                     with st.expander(f"点击生成对 **{company_name}** 的现金流分析报告"):
                         if st.button("开始独立分析", key=f"ai_cashflow_single_{code}"):
-                            
-                            # 1. 只收集这家公司的历史数据
-                            history_df = combined_historical_df[combined_historical_df['ts_code'] == code]
-                            summary_lines = [f"公司: {company_name} ({code})", "\n历史现金流数据 (近5期):"]
-                            
-                            # --- 核心修改：采用新的、带季度标签的格式 ---
-                            history_df['quarter'] = pd.to_datetime(history_df['end_date']).dt.to_period('Q')
-                            for metric, label in cash_metrics_to_plot.items():
-                                # 使用{:,.0f}来格式化大的现金流数值，并保留季度标签
-                                series_str = ", ".join([f"{row.quarter}: {row[metric]:,.0f}" for _, row in history_df[['quarter', metric]].tail(8).iterrows() if pd.notna(row[metric])])
-                                summary_lines.append(f"- {label}: {series_str}")
-                            
-                            single_company_summary = "\n".join(summary_lines)
-
-                            # 2. 调用已为季节性优化的Prompt (无需修改)
-                            prompt = f"""
-                            你是一位顶尖的价值投资分析师，将“现金流”视为企业价值的基石，并深知其季节性波动规律。我将为你提供“{company_name}”这家公司的历史现金流数据。
-
-                            你的任务是生成一份专业的**单公司现金流深度分析报告**。请务必在分析中考虑季节性。
-                            1.  **“造血”能力评估**: 综合来看，这家公司的现金流状况如何？是否存在明显的季节性流入（如年末回款）和流出（如年初采购）？
-                            2.  **趋势解读**: 在剔除季节性因素后（例如进行同比增长对比），它的核心“造血”能力（特别是FCFF）是在增长、稳定还是萎缩？这可能反映出公司正处于哪个发展阶段？
-                            3.  **财务健康度总结**: 基于以上分析，对该公司的现金流健康度给出一个总结性评价。
-
-                            以下是需要你分析的原始数据（格式为YYYY-QQ: 值）:
-                            ---
-                            {single_company_summary}
-                            ---
-                            请仅围绕这家公司的历史现金流数据进行深入分析。
-                            """
-                            
-                            # 3. 调用通用AI函数并显示结果
-                            with st.spinner(f"AI正在对 {company_name} 的现金流进行深度分析..."):
-                                # ai_report = get_ai_analysis(company_name, prompt)
-                                # st.markdown(ai_report)
-                                st.session_state.ai_cashflow_report = get_ai_analysis(company_name, prompt)
-                if st.session_state.ai_cashflow_report:
-                    st.markdown(st.session_state.ai_cashflow_report)
+                            prompt = build_cashflow_prompt(company_name, code, combined_historical_df)
+                            st.session_state.ai_cashflow_reports[code] = st.write_stream(stream_ai_response(build_analysis_prompt(company_name, prompt)))
+                        elif code in st.session_state.ai_cashflow_reports:
+                            st.markdown(st.session_state.ai_cashflow_reports[code])
         with harvard_tabs[3]:
+            telemetry.set_section(f"行业:{industry}/前景分析")
             st.info("AI将扮演“首席分析师”，结合我们提供的公司最新财务快照和它自身的宏观知识库，对公司的未来发展前景进行预测和评级。")
 
             # 这个分析是面向所有选中公司的对比分析
             if st.button("生成AI前景分析报告", key=f"ai_prospect_compare_{industry}"):
                 
-                # 1. 为选中的每家公司，准备一份“财务快照”
-                all_summaries = []
-                if not selected_data.empty:
-                    for code in codes_in_industry:
-                        company_name = code_to_name_map.get(code, code)
-                        company_snapshot = selected_data[selected_data['ts_code'] == code].iloc[0]
-                        
-                        # 即时计算ROE排名
-                        sorted_roe = full_industry_df.sort_values(by='roe', ascending=False).reset_index()
-                        rank_info = sorted_roe[sorted_roe['ts_code'] == code]
-                        rank = rank_info.index[0] + 1 if not rank_info.empty else 'N/A'
-
-                        summary_lines = [
-                            f"\n--- 公司: {company_name} ({code}) ---",
-                            f"- 最新ROE: {company_snapshot.get('roe', 0):.2f}% (行业排名: {rank}/{len(full_industry_df)})",
-                            f"- 最新资产负债率: {company_snapshot.get('debt_to_assets', 0):.2f}%",
-                            f"- 最新营收同比: {company_snapshot.get('or_yoy', 0):.2f}%"
-                        ]
-                        all_summaries.append("\n".join(summary_lines))
-                
-                data_summary = "\n".join(all_summaries)
-
-                # 2. 构建新的、更清晰的Prompt
-                prompt = f"""
-                你是一位经验丰富的基金经理和行业首席分析师。你的任务是结合我提供的【公司最新财务快照】和你自己知识库中的【宏观及行业趋势】，为选中的公司撰写一份**前景对比分析报告**。
-
-                你的报告需要包含：
-                1.  **短期展望 (1-2年)**: 基于公司最新的财务表现（如增长率、利润率），分析并对比它们近期的机遇和挑战。
-                2.  **长期展望 (3-5年)**: 结合它们的行业地位（可参考ROE排名）和你对行业变革、技术趋势的知识，分析并对比它们的长期增长潜力和护城河。
-                3.  **关键驱动与风险**: 对比指出各公司未来发展的核心驱动力及主要风险点。
-                4.  **综合投资评级**: 为每家公司给出一个明确的投资评级（例如：强烈看好、谨慎看好、中性、看淡），并附上一句核心的投资逻辑总结。
-
-                以下是【公司最新财务快照】：
-                ---
-                {data_summary}
-                ---
-                请基于这些数据锚点，并结合你的专业知识，开始你的分析。
-                """
-                with st.spinner("AI正在进行前景分析与展望..."):
-                    ai_report = get_ai_response(prompt)
-                    st.markdown(ai_report)
+                # 基于每家公司的最新“财务快照”构建Prompt
+                prompt = build_prospect_prompt(codes_in_industry, code_to_name_map, selected_data, industry_rankings)
+                st.session_state.ai_prospect_reports[industry] = st.write_stream(stream_ai_response(prompt))
+            elif industry in st.session_state.ai_prospect_reports:
+                st.markdown(st.session_state.ai_prospect_reports[industry])
     # ====================================================================
     #  【全新增量添加】的模块：跨行业AI对比分析
     # ====================================================================
 
+    # 本轮是否刚以流式方式显示过跨行业报告（避免下方重复显示）
+    cross_industry_streamed = False
+    cross_industry_prompt = None
     # 1. 只有当用户选择了多个行业的公司时，才显示这个模块
     if len(grouped_stocks) > 1:
         st.markdown("---")
+        telemetry.set_section("跨行业研判")
         st.header("跨行业AI综合研判")
         st.info("您已选择来自不同行业的公司，除了上方各行业的独立深度分析外，我们额外为您提供一个聚焦核心指标的跨行业综合研判。")
 
-        # 为了避免重复获取数据，我们可以尝试从已有的数据中拼接
-        # （简化起见，这里我们还是重新获取一次，未来可以优化）
-        all_historical_data_list = []
-        for code in stocks_to_analyze:
-            df = fetch_all_data(code, hist_year_range[0], hist_year_range[1])
-            if not df.empty:
-                df['name'] = code_to_name_map.get(code, code)
-                all_historical_data_list.append(df)
-        
-        if all_historical_data_list:
-            combined_all_historical_df = pd.concat(all_historical_data_list, ignore_index=True)
+        # 直接复用上方已组装好的数据面板，不再重新获取
+        combined_all_historical_df = panel.history()
+        if not combined_all_historical_df.empty:
+            code_to_industry = {code: industry for industry, codes in grouped_stocks.items() for code in codes}
+            cross_industry_prompt = build_cross_industry_prompt(stocks_to_analyze, code_to_name_map, code_to_industry, combined_all_historical_df)
             
             # 2. 提供一个独立的AI分析按钮
             if st.button("生成跨行业综合AI研判报告", key="ai_cross_industry_report"):
-                # --- 这里粘贴之前版本中已经写好的、用于跨行业分析的逻辑 ---
-                # a. 准备数据摘要
-                all_summaries = []
-                metrics_to_compare = {
-                    'netprofit_margin': '净利率 (%)',
-                    'or_yoy': '营收同比 (%)',
-                    'debt_to_assets': '资产负-债率 (%)'
-                }
-                for code in stocks_to_analyze:
-                    company_name = code_to_name_map.get(code, code)
-                    industry_name = basic_df.loc[basic_df.ts_code == code, 'industry'].iloc[0]
-                    history_df = combined_all_historical_df[combined_all_historical_df['ts_code'] == code]
-                    
-                    summary_lines = [f"\n--- 公司: {company_name} ({code}), 所属行业: {industry_name} ---"]
-                    for metric, label in metrics_to_compare.items():
-                         latest_value = history_df[metric].iloc[-1] if not history_df.empty else 'N/A'
-                         summary_lines.append(f"- 最新 {label}: {latest_value:.2f}" if isinstance(latest_value, (int, float)) else f"- 最新 {label}: {latest_value}")
-                    all_summaries.extend(summary_lines)
-                
-                full_summary = "\n".join(all_summaries)
-
-                # b. 构建强大的跨行业Prompt
-                prompt = f"""
-                你是一位顶尖的基金经理，正在评估一个由几家来自不同行业的公司组成的投资组合。你的任务是基于我提供的核心财务数据，撰写一份专业的**跨行业对比研判报告**。
-
-                你的分析必须体现出专业性，要认识到直接对比不同行业公司的财务指标需要非常谨慎。请聚焦于以下几个方面：
-                1.  **盈利能力与效率**: 谁的净利率最高？这是否反映了其独特的商业模式或品牌溢价？
-                2.  **成长性**: 谁的营收增长最快？这是否是可持续的？
-                3.  **财务健康度**: 对比它们的资产负债率。请务必结合它们的行业特性来评论这个指标的合理性（例如，金融行业的高负债率是正常的，而科技公司则通常较低）。
-                4.  **综合投资价值**: 结合以上所有信息，从一个寻求“核心资产”的投资者角度出发，你会更青睐哪家公司？请给出一个明确的排序或选择，并提供你的核心投资逻辑。
-
-                以下是你需要分析的几家公司的最新数据：
-                ---
-                {full_summary}
-                ---
-                请直接输出你的专业分析报告，展现出你对不同商业模式的深刻理解。
-                """
-                with st.spinner("AI正在进行跨行业深度研判，请稍候..."):
-                    # 使用一个独立的session state来存储这份特殊的报告
-                    # 【核心修改】将AI返回的报告存入新的 session_state 变量中
-                    st.session_state.ai_cross_industry_report_content = get_ai_response(prompt)
-                    st.rerun() 
+                prompt = cross_industry_prompt
+                with st.expander("查看跨行业AI研判报告", expanded=True):
+                    # 使用一个独立的session state来存储这份特殊的报告，生成过程流式显示
+                    st.session_state.ai_cross_industry_report_content = st.write_stream(stream_ai_response(prompt))
+                cross_industry_streamed = True
 
     # 【核心修改】检查新的变量名
-    if 'ai_cross_industry_report_content' in st.session_state and st.session_state.ai_cross_industry_report_content:
+    if not cross_industry_streamed and st.session_state.get('ai_cross_industry_report_content'):
         with st.expander("查看跨行业AI研判报告", expanded=True):
              # 【核心修改】显示新变量中存储的内容
              st.markdown(st.session_state.ai_cross_industry_report_content)
-   
+
+    # ====================================================================
+    #  一键生成：所有数据已在上方准备好，按依赖关系并发生成全部报告
+    # ====================================================================
+    if run_full_report:
+        telemetry.set_section("一键生成报告")
+        with full_report_status:
+            with st.spinner("正在获取各公司的三大报表数据..."):
+                panel.load_statements()
+            accounting_frames = {code: panel.statements(code) for code in stocks_to_analyze}
+
+            jobs = build_harvard_report_jobs(industry_contexts, code_to_name_map, accounting_frames, cross_industry_prompt)
+            report_slots = {
+                "strategy": st.session_state.ai_strategy_reports,
+                "accounting": st.session_state.ai_accounting_reports,
+                "cashflow": st.session_state.ai_cashflow_reports,
+                "prospect": st.session_state.ai_prospect_reports,
+            }
+            progress = st.progress(0.0, text=f"AI正在生成 {len(jobs)} 份报告...")
+            for done, ((kind, target), report) in enumerate(run_ai_report_jobs(jobs), start=1):
+                # 每完成一份就写入 session_state，中途出错也不会丢失已生成的报告
+                if kind == "cross_industry":
+                    st.session_state.ai_cross_industry_report_content = report
+                elif kind in report_slots:
+                    report_slots[kind][target] = report
+                else:
+                    st.session_state.ai_capability_reports[(kind, target)] = report
+                progress.progress(done / len(jobs), text=f"已完成 {done}/{len(jobs)} 份报告")
+        # 重跑一次，让各个标签页显示刚生成的报告
+        st.rerun()
+
 else:
-    st.info("👈 请在左侧边栏选择公司并点击“开始分析”按钮。")
\ No newline at end of file
+    st.info("👈 请在左侧边栏选择公司并点击“开始分析”按钮。")
+
+if show_diagnostics:
+    render_diagnostics_panel(diagnostics_panel)
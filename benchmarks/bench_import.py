@@ -0,0 +1,69 @@
+"""
+冷启动导入耗时基准：在全新的解释器里导入 finance_utils，
+统计它在 pandas/streamlit 之外额外花费的导入耗时，
+并确认网络 SDK / AI 库 / 重型依赖没有在导入阶段被加载。
+
+用法（在仓库根目录）:
+    python benchmarks/bench_import.py
+超出预算或重型模块被提前加载时以非零状态码退出，可直接挂在 CI 上。
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEATS = 5
+
+# 导入 finance_utils 自身的耗时预算（毫秒，不含页面本来就要加载的 pandas 和 streamlit）
+COLD_START_BUDGET_MS = 100
+# 基础依赖：页面渲染本来就需要，单独统计
+BASE_MODULES = ["pandas", "streamlit"]
+# 这些模块只应在第一次请求数据 / 调用AI / 画图 / 搜索时才加载
+# (pyarrow 会被 pandas 自己加载，因此不在此列)
+LAZY_MODULES = ["tushare", "google.generativeai", "pypinyin", "altair", "thefuzz"]
+
+
+def _import_times(module: str) -> dict:
+    """用 -X importtime 取每个模块的累计导入耗时（微秒）"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s+(.+)$", line)
+        if match:
+            times[match.group(2).strip()] = int(match.group(1))
+    return times
+
+
+def _loaded_modules(module: str) -> list:
+    code = f"import sys, {module}; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def main() -> int:
+    own_ms, base_ms = [], []
+    for _ in range(REPEATS):
+        times = _import_times("finance_utils")
+        base = sum(times.get(m, 0) for m in BASE_MODULES) / 1000
+        own_ms.append(times.get("finance_utils", 0) / 1000 - base)
+        base_ms.append(base)
+
+    own = statistics.median(own_ms)
+    print(f"pandas + streamlit 导入:     {statistics.median(base_ms):8.1f} ms")
+    print(f"finance_utils 自身导入:      {own:8.1f} ms  (预算 {COLD_START_BUDGET_MS} ms)")
+
+    loaded = _loaded_modules("finance_utils")
+    print(f"导入阶段被加载的重型模块:    {loaded or '无'}")
+
+    ok = own <= COLD_START_BUDGET_MS and not loaded
+    print("结果: " + ("通过" if ok else "未通过"))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+缓存数据的内存基准：原始表示 vs cache_store.compact_frame 的紧凑表示 vs shared_store 共享只读数据。
+
+在合成的全市场数据上载入应用缓存的几类数据（stock_basic、全市场快照、自选股历史指标、日线），
+raw / compact 像 st.cache_data 一样把每份结果序列化保存，模拟 N 个并发会话各自反序列化一份副本；
+shared 只保存一份紧凑数据转成的 pyarrow.Table（freeze_frame），每个会话拿到 share_frame 转回的 DataFrame（数值列零拷贝）。
+分别在独立子进程里测量进程 RSS 的增长、每次命中的平均耗时，以及每个数据集的内存占用和序列化大小。
+
+用法（在仓库根目录）:
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --sessions 50 --companies 5000
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SESSIONS = 30
+MODES = ("raw", "compact", "shared")
+N_WATCHLIST = 10
+YEARS = 20
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _load_datasets() -> dict:
+    """用合成后端加载原始数据（绕过所有缓存层）"""
+    import inspect
+    import pandas as pd
+    import finance_utils as fu
+    from offline_backends import DISCLOSURE_LAG_DAYS
+
+    cutoff = pd.Timestamp.now() - pd.Timedelta(days=DISCLOSURE_LAG_DAYS)
+    period = f"{cutoff.year - 1}1231"
+    end_year = int(period[:4])
+    raw = {name: inspect.unwrap(getattr(fu, name)) for name in ("lookup_stock_basic", "fetch_market_snapshot", "fetch_all_data")}
+    basic = raw["lookup_stock_basic"]()
+    codes = basic["ts_code"].iloc[:N_WATCHLIST].tolist()
+    history = pd.concat([raw["fetch_all_data"](c, end_year - YEARS + 1, end_year) for c in codes], ignore_index=True)
+    daily = pd.concat([fu._fetch_daily_range(c, f"{end_year - YEARS + 1}0101", f"{end_year}1231") for c in codes],
+                      ignore_index=True)
+    daily["trade_date"] = pd.to_datetime(daily["trade_date"], format="%Y%m%d")
+    return {
+        "stock_basic": (basic, False),
+        "market_snapshot": (raw["fetch_market_snapshot"](period), True),
+        "fina_indicator": (history, False),
+        "daily": (daily, False),
+    }
+
+
+def measure(mode: str, sessions: int) -> dict:
+    """子进程入口：载入数据 -> （可选）紧凑化 -> 序列化或冻结 -> 模拟 sessions 个会话各取一份"""
+    from cache_store import compact_frame
+    from shared_store import freeze_frame, share_frame
+
+    datasets = _load_datasets()
+    frames = {name: compact_frame(df, drop) if mode != "raw" else df for name, (df, drop) in datasets.items()}
+    pickles = {name: pickle.dumps(df) for name, df in frames.items()}
+    if mode == "shared":
+        frozen = {name: freeze_frame(df) for name, df in frames.items()}
+        hit = lambda name: share_frame(frozen[name])
+    else:
+        hit = lambda name: pickle.loads(pickles[name])
+    del datasets, frames
+
+    before = _rss_mb()
+    started = time.perf_counter()
+    copies = [{name: hit(name) for name in pickles} for _ in range(sessions)]
+    elapsed = time.perf_counter() - started
+    after = _rss_mb()
+    return {
+        "mode": mode,
+        "session_rss_mb": round(after - before, 1),
+        "hit_us": round(elapsed / (sessions * len(pickles)) * 1e6, 1),
+        "datasets": {
+            name: {
+                "memory_mb": round(df.memory_usage(index=True, deep=True).sum() / 2**20, 2),
+                "pickle_mb": round(len(pickles[name]) / 2**20, 2),
+            }
+            for name, df in copies[0].items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=SESSIONS)
+    parser.add_argument("--companies", type=int, default=5000)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.sessions)))
+        return
+
+    env = dict(os.environ, FINANCE_DATA_BACKEND="synthetic", FINANCE_LLM_BACKEND="fake",
+               FINANCE_SYNTHETIC_COMPANIES=str(args.companies), PYTHONPATH=REPO_ROOT)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="finance-bench-") as cache_dir:
+        env["FINANCE_CACHE_DIR"] = cache_dir
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", mode, "--sessions", str(args.sessions), "--companies", str(args.companies)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'数据集':<18}{'原始内存MB':>12}{'紧凑内存MB':>12}{'原始序列化MB':>14}{'紧凑序列化MB':>14}")
+    for name, raw in results["raw"]["datasets"].items():
+        compact = results["compact"]["datasets"][name]
+        print(f"{name:<18}{raw['memory_mb']:>12.2f}{compact['memory_mb']:>12.2f}{raw['pickle_mb']:>14.2f}{compact['pickle_mb']:>14.2f}")
+    raw_rss, compact_rss = results["raw"]["session_rss_mb"], results["compact"]["session_rss_mb"]
+    print(f"\n{args.sessions} 个会话副本的 RSS 增长: 原始 {raw_rss:.1f} MB -> 紧凑 {compact_rss:.1f} MB"
+          f"（减少 {1 - compact_rss / raw_rss:.0%}）-> 共享只读 {results['shared']['session_rss_mb']:.1f} MB")
+    print("每次缓存命中平均耗时: " + " / ".join(f"{mode} {results[mode]['hit_us']:.1f} µs" for mode in MODES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+提示词数据块基准：原来逐行 “季度: 值” 的摘要格式 vs report_prompts 的紧凑表格格式。
+比较每类提示词的估算 token 数与构建耗时；加 --live 时再用真实模型比较首字延迟和总耗时
+（需要环境变量 GOOGLE_API_KEY）。
+
+用法（在仓库根目录）:
+    python benchmarks/bench_prompts.py
+    python benchmarks/bench_prompts.py --live
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analytics import compute_industry_rankings, compute_price_analytics, format_rank  # noqa: E402
+from report_prompts import (  # noqa: E402
+    CAPABILITY_METRICS,
+    build_capability_summary,
+    build_cashflow_prompt,
+    build_price_analytics_summary,
+    estimate_tokens,
+)
+
+N_COMPANIES = 5
+N_QUARTERS = 40
+N_TRADING_DAYS = 1260
+REPEATS = 20
+
+
+def synthetic_history(n_companies: int = N_COMPANIES, n_quarters: int = N_QUARTERS, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    codes = [f"{600000 + i:06d}.SH" for i in range(n_companies)]
+    dates = pd.date_range("2014-03-31", periods=n_quarters, freq="QE")
+    metrics = [m for group in CAPABILITY_METRICS.values() for m in group]
+    frames = []
+    for code in codes:
+        df = pd.DataFrame(rng.normal(10, 5, size=(n_quarters, len(metrics))), columns=metrics)
+        df[["fcff", "fcfe"]] *= 1e8
+        df.insert(0, "end_date", dates)
+        df.insert(0, "ts_code", code)
+        frames.append(df)
+    history = pd.concat(frames, ignore_index=True)
+    latest = history.groupby("ts_code").tail(1).reset_index(drop=True)
+    names = {code: f"公司{i}" for i, code in enumerate(codes)}
+    return codes, names, history, latest
+
+
+def synthetic_daily(names: dict, n_days: int = N_TRADING_DAYS, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2020-01-01", periods=n_days)
+    return pd.concat([
+        pd.DataFrame({"name": name, "trade_date": dates, "close": 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))})
+        for name in names.values()
+    ], ignore_index=True)
+
+
+
+
+# ---- 原格式（与改造前 app.py 中的拼接逻辑一致）----
+
+def legacy_capability_summary(capability, codes, names, history, selected, rankings, period):
+    quarter_style = capability in ("profit", "operating")
+    unit = "%" if capability in ("profit", "growth") else ""
+    lines = []
+    for code in codes:
+        history_df = history[history["ts_code"] == code].copy()
+        lines += [f"\n--- 公司: {names[code]} ({code}) ---", "历史趋势:"]
+        for metric, label in CAPABILITY_METRICS[capability].items():
+            if quarter_style:
+                history_df["quarter"] = pd.to_datetime(history_df["end_date"]).dt.to_period("Q")
+                series_str = ", ".join(f"{row.quarter}: {row[metric]:.2f}" for _, row in history_df[["quarter", metric]].tail(8).iterrows())
+            else:
+                series_str = " -> ".join(f"{x:.2f}" for x in history_df[metric].tail(5))
+            lines.append(f"- {label} (近5期): {series_str}")
+        lines.append("\n行业对标 (报告期 " + period + "):")
+        row = selected[selected["ts_code"] == code].iloc[0]
+        for metric, label in CAPABILITY_METRICS[capability].items():
+            lines.append(f"- {label}: {row[metric]:.2f}{unit}, 行业排名: {format_rank(rankings, code, metric)}")
+    return "\n".join(lines)
+
+
+def legacy_cashflow_summary(code, name, history):
+    history_df = history[history["ts_code"] == code].copy()
+    lines = [f"公司: {name} ({code})", "\n历史现金流数据 (近5期):"]
+    history_df["quarter"] = pd.to_datetime(history_df["end_date"]).dt.to_period("Q")
+    for metric, label in CAPABILITY_METRICS["cashflow"].items():
+        series_str = ", ".join(f"{row.quarter}: {row[metric]:,.0f}" for _, row in history_df[["quarter", metric]].tail(8).iterrows() if pd.notna(row[metric]))
+        lines.append(f"- {label}: {series_str}")
+    return "\n".join(lines)
+
+
+def legacy_price_summary(daily: pd.DataFrame) -> str:
+    # 原来的做法：按月末收盘价重采样后逐月拼接
+    monthly = daily.set_index("trade_date").groupby("name")["close"].resample("ME").last().reset_index()
+    lines = []
+    for name, group in monthly.groupby("name"):
+        lines.append(f"\n公司: {name}")
+        lines.append("月度收盘价序列: " + ", ".join(f"{row.trade_date:%Y-%m}: {row.close:.2f}" for _, row in group.iterrows()))
+    return "\n".join(lines)
+
+
+def _time_ms(func, repeats: int = REPEATS) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def _live_latency(prompt: str) -> tuple:
+    """真实模型的首字延迟与总耗时（秒）"""
+    import google.generativeai as genai
+    from ai_client import GEMINI_MODEL
+    genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+    model = genai.GenerativeModel(GEMINI_MODEL)
+    start = time.perf_counter()
+    first = None
+    for _ in model.generate_content(prompt, stream=True):
+        first = first or time.perf_counter() - start
+    return first or 0.0, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="调用真实模型比较延迟（需要 GOOGLE_API_KEY）")
+    args = parser.parse_args()
+
+    codes, names, history, latest = synthetic_history()
+    rankings = compute_industry_rankings(latest)
+    daily = synthetic_daily(names)
+    period = "20231231"
+
+    cases = {}
+    for capability in ("profit", "solvency", "growth", "operating"):
+        cases[capability] = (
+            lambda c=capability: legacy_capability_summary(c, codes, names, history, latest, rankings, period),
+            lambda c=capability: build_capability_summary(c, codes, names, history, latest, rankings, period),
+        )
+    cases["cashflow"] = (
+        lambda: legacy_cashflow_summary(codes[0], names[codes[0]], history),
+        lambda: build_cashflow_prompt(names[codes[0]], codes[0], history).split("---")[1],
+    )
+    cases["price"] = (lambda: legacy_price_summary(daily), lambda: build_price_analytics_summary(compute_price_analytics(daily)))
+
+    print(f"{'数据块':<10}{'原tokens':>10}{'紧凑tokens':>12}{'节省':>8}{'原构建(ms)':>12}{'紧凑构建(ms)':>14}")
+    total_legacy = total_compact = 0
+    for name, (legacy, compact) in cases.items():
+        legacy_tokens, compact_tokens = estimate_tokens(legacy()), estimate_tokens(compact())
+        total_legacy += legacy_tokens
+        total_compact += compact_tokens
+        print(f"{name:<10}{legacy_tokens:>10}{compact_tokens:>12}{1 - compact_tokens / legacy_tokens:>8.0%}"
+              f"{_time_ms(legacy):>12.2f}{_time_ms(compact):>14.2f}")
+    print(f"{'合计':<10}{total_legacy:>10}{total_compact:>12}{1 - total_compact / total_legacy:>8.0%}")
+
+    if args.live:
+        legacy, compact = cases["profit"]
+        for label, summary in (("原格式", legacy()), ("紧凑格式", compact())):
+            first, total = _live_latency(f"请根据以下数据做简要对比分析：\n{summary}")
+            print(f"{label}: 首字延迟 {first:.2f}s, 总耗时 {total:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
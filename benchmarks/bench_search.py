@@ -0,0 +1,75 @@
+"""
+侧边栏公司搜索基准：原 thefuzz 逐行打分路径 vs 预计算的 StockSearchIndex。
+
+用法（在仓库根目录）:
+    python benchmarks/bench_search.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from thefuzz import fuzz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search_index import StockSearchIndex  # noqa: E402
+
+N_COMPANIES = 5000
+REPEATS = 20
+QUERIES = ["中国平安", "中石油", "zgpa", "maotai", "600519", "银行", "科技"]
+
+_CHARS = list("中国平安石油华东方科技电子新能源医药生物股份银行证券保险汽车电力通信建设材料食品")
+_SUFFIXES = ["股份", "科技", "银行", "集团", "控股", "医药", ""]
+
+
+def synthetic_basic(n: int = N_COMPANIES, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    names = []
+    for _ in range(n):
+        body = "".join(rng.choice(_CHARS, size=rng.integers(2, 4)))
+        names.append(body + rng.choice(_SUFFIXES))
+    names[:3] = ["中国平安", "中国石油", "贵州茅台"]
+    codes = [f"{600000 + i:06d}.SH" if i % 2 else f"{i:06d}.SZ" for i in range(n)]
+    codes[2] = "600519.SH"
+    return pd.DataFrame({"ts_code": codes, "name": names})
+
+
+def legacy_search(basic_df: pd.DataFrame, name_filter: str) -> dict:
+    """app.py 中原来的搜索实现（逐行 fuzz.partial_ratio + iterrows）"""
+    code_mask = basic_df["ts_code"].str.contains(name_filter, na=False, case=False)
+    scores = basic_df["name"].apply(lambda name: fuzz.partial_ratio(name_filter.lower(), name.lower()))
+    name_mask = scores >= 75
+    search_results_df = basic_df[name_mask | code_mask]
+    if name_mask.any():
+        search_results_df = search_results_df.assign(score=scores).sort_values(
+            by="score", ascending=False, key=lambda s: s.where(name_mask, 0)
+        ).drop(columns="score")
+    return {f"{r['name']} ({r.ts_code})": r.ts_code for _, r in search_results_df.iterrows()}
+
+
+def _time_ms(func, repeats: int = REPEATS) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    basic_df = synthetic_basic()
+    start = time.perf_counter()
+    index = StockSearchIndex(basic_df)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"索引构建: {build_ms:.1f} ms ({len(basic_df)} 家公司)")
+    print(f"{'查询':<10}{'thefuzz(ms)':>14}{'索引(ms)':>12}{'加速比':>10}{'索引命中':>10}")
+    for query in QUERIES:
+        legacy_ms = _time_ms(lambda: legacy_search(basic_df, query), repeats=3)
+        index_ms = _time_ms(lambda: index.search(query))
+        hits = len(index.search(query))
+        print(f"{query:<10}{legacy_ms:>14.2f}{index_ms:>12.3f}{legacy_ms / index_ms:>10.0f}x{hits:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+全市场基准套件：在合成的全市场数据（默认约 5000 家公司、110 个行业、20 年季度指标和日线）上，
+逐个计时 finance_utils / app 数据准备阶段的真实代码路径：
+全市场快照与行业合并、按行业直接请求的合并路径、三大报表的 reduce 外连接合并、
+选中公司数据面板的组装（内存层已预热，不复权与前复权）、股价统计（含 PRICE_ANALYTICS_STOCKS 只股票的大篮子）与股价图降采样、
+行业排名与排名查询、提示词数据块构建、公司搜索。
+
+数据来自 offline_backends.SyntheticTushare（经过与线上一致的 RateLimitedPro 包装），
+每个阶段都绕过内存层和磁盘缓存直接调用原函数。结果以稳定的 JSON 输出
+（键排序、固定结构），可保存为基线，之后用 --baseline 对比发现性能回退。
+
+用法（在仓库根目录）:
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --output bench.json
+    python benchmarks/bench_suite.py --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_VERSION = 1
+YEARS = 20
+N_SELECTED = 5
+# 提示词构建按较大的自选篮子计时（目标：四项能力数据块合计仍为个位数毫秒级/项）
+BASKET_SIZE = 20
+REPEATS = 3
+# 与 app.py 的股价图设置一致：1000 像素宽、每 4 个像素一个桶
+CHART_BUCKETS = 250
+# 股价统计按上百只股票的大篮子另计一次时
+PRICE_ANALYTICS_STOCKS = 120
+QUERIES = ["银行", "科技", "600001", "000002", "医药"]
+# 对比基线时，绝对差值小于这个毫秒数的阶段视为噪声，不算回退
+MIN_REGRESSION_MS = 5.0
+
+
+def _configure_environment(args, cache_dir: str) -> None:
+    """finance_utils / cache_store 在导入时读取后端配置，必须先设置好环境变量"""
+    os.environ.update({
+        "FINANCE_DATA_BACKEND": "synthetic",
+        "FINANCE_LLM_BACKEND": "fake",
+        "FINANCE_CACHE_DIR": cache_dir,
+        "FINANCE_SYNTHETIC_COMPANIES": str(args.companies),
+        "FINANCE_SYNTHETIC_INDUSTRIES": str(args.industries),
+        "FINANCE_SYNTHETIC_SEED": str(args.seed),
+        "FINANCE_BACKEND_LATENCY_MS": "0",
+    })
+
+
+def _upstream_totals(pro) -> tuple:
+    stats = pro.stats().values()
+    return sum(s["calls"] for s in stats), sum(s["wait_seconds"] for s in stats)
+
+
+def _measure(pro, func, repeats: int) -> dict:
+    """先预热一次，再计时 repeats 次；同时记录上游请求数和限流排队时间"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+        calls_before, wait_before = _upstream_totals(pro)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+    calls_after, wait_after = _upstream_totals(pro)
+    return {
+        "median_ms": round(float(np.median(timings)), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "repeats": repeats,
+        "upstream_calls": (calls_after - calls_before) // repeats,
+        "upstream_wait_s": round(wait_after - wait_before, 3),
+    }
+
+
+def latest_annual_period() -> str:
+    """合成数据里已经披露的最新年报期"""
+    from offline_backends import DISCLOSURE_LAG_DAYS
+    cutoff = pd.Timestamp.now() - pd.Timedelta(days=DISCLOSURE_LAG_DAYS)
+    year = cutoff.year if cutoff.month == 12 and cutoff.day == 31 else cutoff.year - 1
+    return f"{year}1231"
+
+
+def run_suite(args) -> dict:
+    import finance_utils as fu
+    from analytics import RANKED_METRICS, compute_industry_rankings, compute_price_analytics, downsample_min_max, format_rank
+    from report_prompts import build_capability_summary, build_cashflow_prompt, build_price_analytics_summary
+    from search_index import StockSearchIndex
+    from panel import BasketPanel
+
+    raw = {name: inspect.unwrap(getattr(fu, name)) for name in (
+        "lookup_stock_basic", "fetch_market_snapshot", "fetch_full_industry_data", "_fetch_industry_direct",
+        "fetch_all_data", "fetch_accounting_data")}
+    pro, repeats = fu.pro, args.repeats
+    period = latest_annual_period()
+    end_year = int(period[:4])
+    start_year = end_year - YEARS + 1
+
+    # ---- 准备输入：行业、选中的公司、历史指标和日线 ----
+    basic = raw["lookup_stock_basic"]()
+    industry_sizes = basic["industry"].value_counts()
+    largest_industry = industry_sizes.index[0]
+    snapshot = fu.fetch_market_snapshot(period)
+    industry_codes = sorted(snapshot.loc[snapshot["industry"] == largest_industry, "ts_code"])
+    codes, basket_codes = industry_codes[:N_SELECTED], industry_codes[:BASKET_SIZE]
+    code_to_name = dict(zip(basic["ts_code"], basic["name"]))
+    industry_df = snapshot[snapshot["industry"] == largest_industry].reset_index(drop=True)
+    selected_data = industry_df[industry_df["ts_code"].isin(codes)]
+    basket_data = industry_df[industry_df["ts_code"].isin(basket_codes)]
+    rankings = compute_industry_rankings(industry_df)
+    with contextlib.redirect_stdout(io.StringIO()):
+        basket_history = pd.concat([raw["fetch_all_data"](code, start_year, end_year) for code in basket_codes],
+                                   ignore_index=True)
+        historical_df = basket_history[basket_history["ts_code"].isin(codes)].reset_index(drop=True)
+        # 选中的公司在前，再补足到 PRICE_ANALYTICS_STOCKS 只
+        wide_codes = list(dict.fromkeys(codes + basic["ts_code"].tolist()))[:PRICE_ANALYTICS_STOCKS]
+        wide_price_df = pd.concat([
+            fu._fetch_daily_range(code, f"{start_year}0101", f"{end_year}1231").assign(name=code_to_name[code])
+            for code in wide_codes], ignore_index=True)
+    wide_price_df["trade_date"] = pd.to_datetime(wide_price_df["trade_date"], format="%Y%m%d")
+    price_df = wide_price_df[wide_price_df["name"].isin({code_to_name[code] for code in codes})].reset_index(drop=True)
+    price_analytics = compute_price_analytics(price_df)
+    index = StockSearchIndex(basic)
+
+    def basket_panel(adjust="none"):
+        panel = BasketPanel(codes, start_year, end_year, code_to_name, adjust=adjust).build()
+        return panel.history(codes, styles=True), panel.history()
+
+    def rank_lookups():
+        for code in industry_df["ts_code"]:
+            for metric in RANKED_METRICS:
+                format_rank(rankings, code, metric)
+
+    stages = {
+        "stock_basic": lambda: raw["lookup_stock_basic"](),
+        "market_snapshot": lambda: raw["fetch_market_snapshot"](period),
+        "industry_slice_all": lambda: [raw["fetch_full_industry_data"](ind, period) for ind in industry_sizes.index],
+        "industry_direct_merge": lambda: raw["_fetch_industry_direct"](largest_industry, period),
+        "accounting_reduce_merge": lambda: [raw["fetch_accounting_data"](code, start_year, end_year) for code in codes],
+        "basket_panel_build": basket_panel,
+        "basket_panel_build_qfq": lambda: basket_panel("qfq"),
+        "price_analytics": lambda: compute_price_analytics(price_df),
+        "price_analytics_wide": lambda: compute_price_analytics(wide_price_df),
+        "price_downsample_chart": lambda: downsample_min_max(price_df, "trade_date", "close", "name", CHART_BUCKETS),
+        "industry_rankings_all": lambda: [compute_industry_rankings(group) for _, group in snapshot.groupby("industry", observed=True)],
+        "rank_lookups_industry": rank_lookups,
+        "prompt_capability_summaries": lambda: [
+            build_capability_summary(cap, codes, code_to_name, historical_df, selected_data, rankings, period)
+            for cap in ("profit", "solvency", "growth", "operating")],
+        "prompt_capability_basket": lambda: [
+            build_capability_summary(cap, basket_codes, code_to_name, basket_history, basket_data, rankings, period)
+            for cap in ("profit", "solvency", "growth", "operating")],
+        "prompt_cashflow": lambda: [build_cashflow_prompt(code_to_name[c], c, historical_df) for c in codes],
+        "prompt_price_summary": lambda: build_price_analytics_summary(price_analytics),
+        "search_index_build": lambda: StockSearchIndex(basic),
+        "search_queries": lambda: [index.search(q) for q in QUERIES],
+    }
+
+    results = {}
+    for name, func in stages.items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = _measure(pro, func, repeats)
+        print(f"{name:<30}{results[name]['median_ms']:>12.2f} ms", file=sys.stderr)
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "dataset": {
+            "companies": len(basic),
+            "industries": int(basic["industry"].nunique()),
+            "largest_industry_size": int(industry_sizes.iloc[0]),
+            "years": YEARS,
+            "period": period,
+            "seed": args.seed,
+            "basket_size": len(basket_codes),
+            "history_rows": len(historical_df),
+            "daily_rows": len(price_df),
+            "wide_daily_rows": len(wide_price_df),
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """返回中位数比基线慢超过 tolerance（且绝对差值超过 MIN_REGRESSION_MS）的阶段"""
+    regressions = []
+    for name, result in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base["median_ms"]:
+            continue
+        ratio = result["median_ms"] / base["median_ms"]
+        slower = result["median_ms"] - base["median_ms"] > MIN_REGRESSION_MS
+        flag = "回退" if ratio > 1 + tolerance and slower else ""
+        print(f"{name:<30}{base['median_ms']:>10.2f} -> {result['median_ms']:>10.2f} ms  x{ratio:.2f} {flag}", file=sys.stderr)
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--companies", type=int, default=5000)
+    parser.add_argument("--industries", type=int, default=110)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--only", nargs="*", help="只运行指定的阶段")
+    parser.add_argument("--output", help="把 JSON 结果写入文件（默认输出到 stdout）")
+    parser.add_argument("--baseline", help="与之前保存的 JSON 结果对比，有阶段回退时退出码为 1")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的变慢比例（默认 25%%）")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="finance-bench-")
+    _configure_environment(args, cache_dir)
+    sys.path.insert(0, REPO_ROOT)
+    try:
+        report = run_suite(args)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"性能回退: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import functools
+import threading
+
+import pandas as pd
+
+from telemetry import telemetry, frame_size
+
+logger = logging.getLogger(__name__)
+
+# 本地持久化缓存目录，可通过环境变量覆盖（例如部署时指向挂载盘）
+CACHE_DIR = os.environ.get(
+    "FINANCE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+# 合成数据后端（见 offline_backends）的缓存放在单独的子目录，避免和真实数据混在一起
+if os.environ.get("FINANCE_DATA_BACKEND") == "synthetic":
+    CACHE_DIR = os.path.join(CACHE_DIR, "synthetic")
+
+# 内存层（shared_store 进程内共享仓库）的过期时间（秒）。内存层过期后会回落到磁盘层，
+# 由磁盘层按数据类型的 TTL 策略决定是否真的需要重新请求 tushare。
+MEMORY_TTL = 3600
+
+MARKET_TZ = "Asia/Shanghai"
+# tushare 日线数据一般在收盘后 15:00~16:00 入库，这里留出余量
+DAILY_UPDATE_HOUR = 17
+# A股定期报告披露窗口 (起始月, 截止月, 截止日)：
+# 年报+一季报 1月~4/30，半年报 7月~8/31，三季报 10月~10/31
+DISCLOSURE_WINDOWS = [(1, 4, 30), (7, 8, 31), (10, 10, 31)]
+
+# 紧凑内存表示：标识类字符串列（几乎每行都不同）转成 Arrow 字符串
+STRING_COLUMNS = ("ts_code", "symbol", "name")
+# 其他字符串列里，不同取值数不超过行数这个比例的转成 category（行业、市场、报告期等）
+CATEGORY_MAX_RATIO = 0.5
+# float64 只有在往返误差不超过这个值时才降为 float32：页面和提示词都保留两位小数，
+# 误差比舍入单位的一半（0.005）再小一个数量级，才不会在常见取值上改变显示结果
+FLOAT32_MAX_ERROR = 5e-4
+
+_EXPIRES_KEY = b"expires_at"
+_USER_META_KEY = b"finance_meta"
+_write_lock = threading.Lock()
+# 每个数据集最近一次载入的各个缓存条目：{dataset: {key: (行数, 原始字节数, 紧凑后字节数)}}
+_memory_stats = {}
+_memory_lock = threading.Lock()
+
+
+def _now() -> pd.Timestamp:
+    return pd.Timestamp.now(tz=MARKET_TZ)
+
+
+def expire_daily(written_at: pd.Timestamp) -> pd.Timestamp:
+    """每天零点过期，用于 stock_basic 这类每日可能变化的基础表。"""
+    return written_at.normalize() + pd.Timedelta(days=1)
+
+
+def expire_after_close(written_at: pd.Timestamp) -> pd.Timestamp:
+    """在下一次日线数据入库（收盘后）时过期，用于日线行情。"""
+    today_update = written_at.normalize() + pd.Timedelta(hours=DAILY_UPDATE_HOUR)
+    if written_at < today_update:
+        return today_update
+    return today_update + pd.Timedelta(days=1)
+
+
+def expire_on_disclosure(written_at: pd.Timestamp) -> pd.Timestamp:
+    """
+    在可能出现新披露时过期，用于 fina_indicator 和三大报表等季度数据。
+    - 处于披露窗口内：每天都可能有新公司披露，按天过期；
+    - 处于窗口外：不会有新的定期报告，直到下一个窗口开始才过期。
+    """
+    for start_month, end_month, end_day in DISCLOSURE_WINDOWS:
+        window_start = pd.Timestamp(year=written_at.year, month=start_month, day=1, tz=MARKET_TZ)
+        window_end = pd.Timestamp(year=written_at.year, month=end_month, day=end_day, tz=MARKET_TZ) + pd.Timedelta(days=1)
+        if window_start <= written_at < window_end:
+            return expire_daily(written_at)
+        if written_at < window_start:
+            return window_start
+    # 已过当年最后一个窗口，等到明年年初年报窗口
+    return pd.Timestamp(year=written_at.year + 1, month=1, day=1, tz=MARKET_TZ)
+
+
+TTL_POLICIES = {
+    "daily": expire_daily,
+    "daily_close": expire_after_close,
+    "disclosure": expire_on_disclosure,
+}
+
+
+def _compact_column(series: pd.Series, name: str) -> pd.Series:
+    if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+        if pd.api.types.infer_dtype(series, skipna=True) not in ("string", "empty"):
+            return series
+        if name in STRING_COLUMNS:
+            return series.astype("string[pyarrow]")
+        if series.nunique() <= len(series) * CATEGORY_MAX_RATIO:
+            return series.astype("category")
+        return series
+    if series.dtype == "float64":
+        downcast = series.astype("float32")
+        error = (downcast.astype("float64") - series).abs().max()
+        # 全为缺失值时 error 为 NaN，同样可以降级
+        return series if error > FLOAT32_MAX_ERROR else downcast
+    if series.dtype.kind in "iu":
+        return pd.to_numeric(series, downcast="integer")
+    return series
+
+
+def compact_frame(df: pd.DataFrame, drop_empty_columns: bool = False) -> pd.DataFrame:
+    """
+    把 DataFrame 转成更省内存的表示：代码/名称用 Arrow 字符串，低基数字符串列用 category，
+    精度允许时 float64 降为 float32；drop_empty_columns=True 时丢弃全为缺失值的列
+    （只用于读取方按“列是否存在”判断的宽表，例如行业快照）。
+    """
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        return df
+    columns = {
+        name: _compact_column(df[name], name)
+        for name in df.columns
+        if not (drop_empty_columns and df[name].isna().all())
+    }
+    return pd.DataFrame(columns, index=df.index)
+
+
+def ingest_frame(dataset: str, key: str, df: pd.DataFrame, drop_empty_columns: bool = False) -> pd.DataFrame:
+    """载入缓存数据时统一走这里：转成紧凑表示，并记录该条目压缩前后的内存占用"""
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        return df
+    compact = compact_frame(df, drop_empty_columns)
+    raw_bytes = int(df.memory_usage(index=True, deep=True).sum())
+    compact_bytes = int(compact.memory_usage(index=True, deep=True).sum())
+    with _memory_lock:
+        _memory_stats.setdefault(dataset, {})[key] = (len(compact), raw_bytes, compact_bytes)
+    return compact
+
+
+def memory_report() -> pd.DataFrame:
+    """每个缓存数据集的条目数、行数、原始/紧凑内存（MB）和节省比例"""
+    with _memory_lock:
+        rows = [
+            {
+                "dataset": dataset,
+                "entries": len(entries),
+                "rows": sum(e[0] for e in entries.values()),
+                "raw_mb": sum(e[1] for e in entries.values()) / 2**20,
+                "compact_mb": sum(e[2] for e in entries.values()) / 2**20,
+            }
+            for dataset, entries in sorted(_memory_stats.items())
+        ]
+    report = pd.DataFrame(rows, columns=["dataset", "entries", "rows", "raw_mb", "compact_mb"])
+    report["saved_pct"] = (1 - report["compact_mb"] / report["raw_mb"]) * 100
+    return report
+
+
+def _make_key(func_name: str, args: tuple, kwargs: dict) -> str:
+    raw = json.dumps([func_name, list(args), sorted(kwargs.items())], default=str, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def read_metadata(path: str) -> dict:
+    """读取缓存文件中附带的自定义元数据（JSON），不读取数据本身。"""
+    if not os.path.exists(path):
+        return {}
+    import pyarrow.parquet as pq
+    metadata = pq.read_schema(path).metadata or {}
+    raw = metadata.get(_USER_META_KEY)
+    return json.loads(raw.decode()) if raw else {}
+
+
+def read_frame(path: str):
+    """读取一个缓存文件；不存在、已过期或损坏时返回 None。"""
+    if not os.path.exists(path):
+        return None
+    import pyarrow.parquet as pq
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+        expires_at = metadata.get(_EXPIRES_KEY)
+        if expires_at is not None and pd.Timestamp(expires_at.decode()) <= _now():
+            return None
+        return pq.read_table(path).to_pandas()
+    except Exception as e:
+        logger.warning("读取缓存失败，将重新拉取: %s (%s)", path, e)
+        return None
+
+
+def write_frame(path: str, df: pd.DataFrame, expires_at=None, user_metadata: dict = None) -> None:
+    """以 Parquet 格式原子写入缓存文件，可附带过期时间和自定义元数据。"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    if expires_at is not None:
+        metadata[_EXPIRES_KEY] = expires_at.isoformat().encode()
+    if user_metadata:
+        metadata[_USER_META_KEY] = json.dumps(user_metadata).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with _write_lock:
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+
+def persistent_cache(dataset: str, ttl: str, drop_empty_columns: bool = False):
+    """
+    装饰器：把返回 DataFrame 的抓取函数结果持久化到 CACHE_DIR/<dataset>/ 下。
+    放在 @shared_cache 之下使用，进程重启后可以直接从磁盘热启动。
+    空结果不落盘（可能只是数据尚未披露或上游临时失败）。
+    返回前统一经过 ingest_frame 转成紧凑表示，内存层共享给各会话的也是紧凑后的数据。
+    """
+    policy = TTL_POLICIES[ttl]
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(func.__name__, args, kwargs)
+            path = os.path.join(CACHE_DIR, dataset, f"{key}.parquet")
+
+            started = time.perf_counter()
+            cached = read_frame(path)
+            if cached is not None:
+                cached = ingest_frame(dataset, key, cached, drop_empty_columns)
+                rows, size = frame_size(cached)
+                telemetry.record("cache", f"disk:{dataset}", time.perf_counter() - started, rows=rows, bytes=size, cache="hit")
+                return cached
+
+            df = ingest_frame(dataset, key, func(*args, **kwargs), drop_empty_columns)
+            rows, size = frame_size(df)
+            telemetry.record("cache", f"disk:{dataset}", time.perf_counter() - started, rows=rows, bytes=size, cache="miss")
+            if isinstance(df, pd.DataFrame) and not df.empty:
+                try:
+                    write_frame(path, df, expires_at=policy(_now()))
+                except Exception as e:
+                    logger.warning("写入缓存失败: %s (%s)", path, e)
+            return df
+        return wrapper
+    return decorator
@@ -1,16 +1,88 @@
-import tushare as ts
+import time
+import logging
+
 import pandas as pd
 import streamlit as st
 from functools import reduce
-import google.generativeai as genai
-
-# 从 secrets.toml 里取
-token = st.secrets["tushare"]["token"]
-ts.set_token(token)
-pro = ts.pro_api()
-
-
-@st.cache_data(show_spinner=False)
+from cache_store import persistent_cache, ingest_frame, MEMORY_TTL
+from shared_store import shared_cache
+from price_store import DailySeriesStore
+from tushare_client import RateLimitedPro, is_retryable
+from parallel import fan_out
+from search_index import StockSearchIndex
+from analytics import compute_industry_rankings
+from ai_client import GeminiClient
+from ai_cache import AIResponseStore
+from report_prompts import build_analysis_prompt, build_price_chart_prompt
+from report_pipeline import run_report_jobs
+from offline_backends import FAKE_MODEL_NAME, load_backend_config, create_data_client, create_fake_model
+
+logger = logging.getLogger(__name__)
+
+# 数据 / AI 后端（真实接口、合成数据、录制回放、离线模拟AI），由环境变量选择，见 offline_backends
+backend_config = load_backend_config()
+
+
+def _create_live_tushare_client():
+    """第一次真正请求数据时才导入 tushare 并创建客户端，避免拖慢页面冷启动"""
+    import tushare as ts
+    # 从 secrets.toml 里取
+    token = st.secrets["tushare"]["token"]
+    ts.set_token(token)
+    return ts.pro_api()
+
+
+def _create_tushare_client():
+    return create_data_client(backend_config, _create_live_tushare_client)
+
+
+def _configure_genai():
+    """第一次调用AI时才导入 google.generativeai 并配置密钥"""
+    import google.generativeai as genai
+    genai.configure(api_key=st.secrets["google_ai"]["api_key"])
+    return genai
+
+
+def _create_gemini_model(model_name: str, generation_config: dict):
+    if backend_config["llm"] == "fake":
+        return create_fake_model(backend_config)
+    genai = _configure_genai()
+    return genai.GenerativeModel(model_name, generation_config=generation_config or None)
+
+
+# 所有 tushare 请求都经过限流 + 重试包装（客户端延迟创建）
+pro = RateLimitedPro(_create_tushare_client)
+# 所有 Gemini 请求都经过同一个客户端（支持流式输出与并发生成，模型延迟创建），
+# 生成过的报告持久化在本地回复库里，重启后同样的提示词直接复用
+ai_store = AIResponseStore()
+if backend_config["llm"] == "fake":
+    # 模拟回复用单独的模型名入库，不会和真实报告混用
+    ai = GeminiClient(_create_gemini_model, model_name=FAKE_MODEL_NAME, store=ai_store)
+else:
+    ai = GeminiClient(_create_gemini_model, store=ai_store)  # 默认使用最新、速度最快的Flash模型
+
+# 报告期季末（新到旧）
+REPORT_PERIOD_ENDS = ["1231", "0930", "0630", "0331"]
+# 报告期索引里用来判断“是否已披露”的行业样本公司数，以及索引覆盖的最近年数
+# (10家 × 2年 × 4季 恰好落在 fina_indicator 单次100行的上限内，只需一次请求)
+PERIOD_INDEX_SAMPLE = 10
+PERIOD_INDEX_YEARS = 2
+# 样本中至少这个比例的公司披露了，才认为该报告期可以用于行业对标
+MIN_PERIOD_COVERAGE = 0.5
+
+# 行业对标用到的财务指标字段
+INDUSTRY_FINA_FIELDS = ("ts_code,netprofit_margin,grossprofit_margin,roe,current_ratio,quick_ratio,"
+                        "debt_to_assets,inv_turn,ar_turn,assets_turn,or_yoy,netprofit_yoy,fcff,fcfe")
+# 报告期当天休市时，估值数据向前回溯的最大天数
+VALUATION_LOOKBACK_DAYS = 10
+# 全市场快照因权限不足等非临时错误失败后，这段时间（秒）内不再尝试，所有行业直接走按行业请求
+SNAPSHOT_RETRY_AFTER = MEMORY_TTL
+# 全市场快照恢复尝试的时间点（time.monotonic()），整个进程共用
+_snapshot_unavailable_until = 0.0
+
+
+@shared_cache(ttl=MEMORY_TTL)
+@persistent_cache("stock_basic", ttl="daily")
 def lookup_stock_basic() -> pd.DataFrame:
     """
     返回所有在市上市公司的基础表，包含 ts_code, name, industry列。
@@ -23,91 +95,187 @@ def lookup_stock_basic() -> pd.DataFrame:
     return df
 
 
+@st.cache_resource(show_spinner=False, ttl=MEMORY_TTL)
+def get_stock_search_index() -> StockSearchIndex:
+    """基于 lookup_stock_basic() 构建的侧边栏搜索索引，进程内所有会话共享一份。"""
+    return StockSearchIndex(lookup_stock_basic())
+
+
 
-@st.cache_data(show_spinner="正在拉取行业所有公司数据...")
+def _fetch_market_valuation(period: str) -> pd.DataFrame:
+    """全市场估值 (pe/pb)：报告期当天可能不是交易日，向前最多找 VALUATION_LOOKBACK_DAYS 天"""
+    day = pd.to_datetime(period)
+    for _ in range(VALUATION_LOOKBACK_DAYS):
+        df = pro.query_paged("daily_basic", trade_date=day.strftime("%Y%m%d"), fields="ts_code,pe,pb")
+        if not df.empty:
+            return df
+        day -= pd.Timedelta(days=1)
+    return pd.DataFrame(columns=["ts_code", "pe", "pb"])
+
+
+@shared_cache(ttl=MEMORY_TTL, spinner="正在拉取全市场财务快照...")
+@persistent_cache("market_snapshot", ttl="disclosure", drop_empty_columns=True)
+def fetch_market_snapshot(period: str) -> pd.DataFrame:
+    """
+    某报告期全市场所有上市公司的财务指标 + 估值快照（一次批量请求，按列存储到本地）。
+    行业对标数据都从这张表里按 industry 切片得到，不再按行业分别请求。
+    需要 fina_indicator_vip 权限，没有权限时抛出异常，由调用方回退到按行业请求。
+    """
+    basic = lookup_stock_basic()
+    fina_df = pro.query_paged("fina_indicator_vip", period=period, fields=INDUSTRY_FINA_FIELDS)
+    if fina_df.empty:
+        return pd.DataFrame()
+    # 同一公司同一报告期可能有更正前后两条记录，保留第一条（最新）
+    fina_df = fina_df.drop_duplicates("ts_code", keep="first")
+
+    snapshot = pd.merge(basic, fina_df, on="ts_code", how="inner")
+    valuation_df = _fetch_market_valuation(period)
+    if not valuation_df.empty:
+        snapshot = pd.merge(snapshot, valuation_df.drop_duplicates("ts_code"), on="ts_code", how="left")
+    return snapshot.reset_index(drop=True)
+
+
+@shared_cache(ttl=MEMORY_TTL)
 def fetch_full_industry_data(industry: str, period: str) -> pd.DataFrame:
     """
-    获取指定行业在特定报告期的所有公司的完整财务和估值指标。(超详细日志版)
+    获取指定行业在特定报告期的所有公司的完整财务和估值指标。
+    直接在内存中切片全市场快照，同一报告期内切换行业不再产生任何上游请求。
+    快照因没有 fina_indicator_vip 权限失败过一次后，SNAPSHOT_RETRY_AFTER 秒内直接按行业请求，
+    不再让每个行业、每个报告期都先失败一次。
     """
+    global _snapshot_unavailable_until
+    if time.monotonic() < _snapshot_unavailable_until:
+        return _fetch_industry_direct(industry, period)
     try:
-        print("\n" + "="*80)
-        print(f"--- [LOG] 进入 fetch_full_industry_data: 行业='{industry}', 报告期='{period}' ---")
+        snapshot = fetch_market_snapshot(period)
+    except Exception as e:
+        # 超频、网络抖动之类的临时错误不记住，下次仍先尝试快照
+        if not is_retryable(e):
+            _snapshot_unavailable_until = time.monotonic() + SNAPSHOT_RETRY_AFTER
+        logger.warning("全市场快照不可用，改为按行业请求: %s", e)
+        return _fetch_industry_direct(industry, period)
+    if snapshot.empty:
+        return pd.DataFrame()
+    return snapshot[snapshot["industry"] == industry].reset_index(drop=True)
 
+
+@persistent_cache("industry", ttl="disclosure", drop_empty_columns=True)
+def _fetch_industry_direct(industry: str, period: str) -> pd.DataFrame:
+    """
+    按行业拼接 ts_code 直接请求的旧路径，仅在没有 fina_indicator_vip 权限时使用。
+    """
+    try:
         # 1. 获取行业所有股票代码
-        print("--- [LOG] 步骤1: 调用 pro.stock_basic 获取行业股票列表...")
-        basic = pro.stock_basic(exchange="", list_status="L", fields="ts_code,name,industry")
+        basic = lookup_stock_basic()
         industry_stocks = basic[basic["industry"] == industry]
         if industry_stocks.empty:
-            print("--- [LOG] 结果: 失败！在此行业中找不到任何股票。函数提前返回。")
-            print("="*80 + "\n")
+            logger.warning("行业 %s 下找不到任何股票", industry)
             return pd.DataFrame()
-        codes_str = ",".join(industry_stocks["ts_code"])
-        print(f"--- [LOG] 结果: 成功找到 {len(industry_stocks)} 只股票。")
-
-        # 2. 一次性获取所有财务指标
-        fina_fields = ("ts_code,netprofit_margin,grossprofit_margin,roe,current_ratio,quick_ratio,"
-                       "debt_to_assets,inv_turn,ar_turn,assets_turn,or_yoy,netprofit_yoy,fcff,fcfe")
-        print(f"--- [LOG] 步骤2: 调用 pro.fina_indicator, 报告期='{period}'...")
-        industry_fina_df = pro.fina_indicator(ts_code=codes_str, period=period, fields=fina_fields)
-        if industry_fina_df.empty:
-            print(f"--- [LOG] 结果: 失败！pro.fina_indicator 为报告期 '{period}' 返回了空的数据集。")
-            # 即使这里失败，我们仍然尝试返回空DF，让上层逻辑继续
-        else:
-            print(f"--- [LOG] 结果: 成功获取到 {len(industry_fina_df)} 条财务指标数据。")
+        codes = industry_stocks["ts_code"].tolist()
+        logger.debug("行业 %s 共 %d 只股票，报告期 %s", industry, len(codes), period)
 
-        # 如果核心的财务数据为空，直接返回，不再继续
+        # 2. 一次性获取所有财务指标；核心财务数据为空时直接返回
+        industry_fina_df = pro.query_chunked("fina_indicator", codes=codes, period=period, fields=INDUSTRY_FINA_FIELDS)
         if industry_fina_df.empty:
-            print("--- [LOG] 核心财务数据为空，函数提前返回。")
-            print("="*80 + "\n")
+            logger.warning("fina_indicator 在报告期 %s 没有返回行业 %s 的数据", period, industry)
             return pd.DataFrame()
 
-        # 3. 一次性获取所有估值指标
-        trade_date = period
-        print(f"--- [LOG] 步骤3: 调用 pro.daily_basic, 交易日(同报告期)='{trade_date}'...")
-        industry_pe_df = pro.daily_basic(trade_date=trade_date, ts_code=codes_str, fields="ts_code,pe,pb")
+        # 3. 一次性获取所有估值指标（交易日取报告期当天）
+        industry_pe_df = pro.query_chunked("daily_basic", codes=codes, trade_date=period, fields="ts_code,pe,pb")
         if industry_pe_df.empty:
-            print("--- [LOG] 结果: 注意，pro.daily_basic 返回了空的估值数据集。")
-        else:
-            print(f"--- [LOG] 结果: 成功获取到 {len(industry_pe_df)} 条估值数据。")
+            logger.info("daily_basic 在 %s 没有返回估值数据，行业 %s 只合并财务指标", period, industry)
 
         # 4. 合并数据
-        print("--- [LOG] 步骤4: 合并数据...")
         merged = pd.merge(industry_stocks, industry_fina_df, on="ts_code", how="inner")
-        print(f"--- [LOG] ...合并财务数据后，大小: {merged.shape}")
         if not industry_pe_df.empty:
             merged = pd.merge(merged, industry_pe_df, on="ts_code", how="left")
-            print(f"--- [LOG] ...合并估值数据后，大小: {merged.shape}")
-
-        print("--- [LOG] 函数执行完毕，返回最终数据。")
-        print("="*80 + "\n")
+        logger.debug("行业 %s 合并后数据大小: %s", industry, merged.shape)
         return merged.reset_index(drop=True)
 
-    except Exception as e:
-        print(f"\n!!!!!! [FATAL ERROR] 在 fetch_full_industry_data 中发生未知异常 !!!!!!")
-        import traceback
-        traceback.print_exc()
-        print("="*80 + "\n")
+    except Exception:
+        logger.exception("按行业请求 %s（报告期 %s）失败", industry, period)
         return pd.DataFrame()
 
-    # --- BUG修复：动态检查列是否存在 ---
-    cols_to_check = ['roe', 'netprofit_margin']
-    existing_cols = [col for col in cols_to_check if col in merged.columns]
 
-    # 如果要检查的关键列一个都不存在，就没法做有效清理，直接返回原始合并数据
-    if not existing_cols:
-        print(f"[调试 finance_utils] 警告：关键列 {cols_to_check} 均不存在，无法进行有效清理，将返回原始合并数据。")
-        return merged
+@shared_cache(ttl=MEMORY_TTL)
+def fetch_industry_rankings(industry: str, period: str) -> pd.DataFrame:
+    """每个 (行业, 报告期) 只算一次的排名表，图表和 AI 提示词都复用它"""
+    return compute_industry_rankings(fetch_full_industry_data(industry, period))
 
-    # 只在存在的关键列上进行dropna操作
-    print(f"[调试 finance_utils] 将在存在的关键列 {existing_cols} 上进行dropna操作。")
-    final_df = merged.dropna(subset=existing_cols).reset_index(drop=True)
-    
-    print(f"[调试 finance_utils] 清理空值后，最终返回的数据表大小: {final_df.shape}")
-    print("[调试 finance_utils] 数据获取流程结束。\n")
-    return final_df
+
+def candidate_report_periods(end_year: int, years: int = 5) -> list:
+    """从 end_year 年报往前倒推的报告期候选列表（新到旧），跳过尚未到来的季末。"""
+    today = pd.Timestamp.now()
+    periods = []
+    for year in range(end_year, end_year - years, -1):
+        for month_day in REPORT_PERIOD_ENDS:
+            period = f"{year}{month_day}"
+            if pd.to_datetime(period) <= today:
+                periods.append(period)
+    return periods
+
+
+@shared_cache(ttl=MEMORY_TTL)
+@persistent_cache("period_index", ttl="disclosure")
+def fetch_period_index(industry: str, start_year: int, end_year: int) -> pd.DataFrame:
+    """
+    行业报告期索引：一次 fina_indicator 请求拿到行业样本公司在各报告期是否已有数据。
+    返回列 end_date / companies（已披露的样本公司数）/ sample_size。
+    """
+    basic = lookup_stock_basic()
+    codes = sorted(basic.loc[basic["industry"] == industry, "ts_code"])[:PERIOD_INDEX_SAMPLE]
+    if not codes:
+        return pd.DataFrame()
+    df = pro.query_chunked(
+        "fina_indicator",
+        codes=codes,
+        start_date=f"{start_year}0101",
+        end_date=f"{end_year}1231",
+        fields="ts_code,end_date"
+    )
+    if df.empty:
+        return pd.DataFrame()
+    index = (df.drop_duplicates(["ts_code", "end_date"])
+             .groupby("end_date")["ts_code"].nunique()
+             .rename("companies").reset_index())
+    index["sample_size"] = len(codes)
+    return index
 
 
-@st.cache_data(show_spinner=False)
+def resolve_industry_period(industry: str, end_year: int, years: int = 5):
+    """
+    找到行业最新的有效报告期，返回 (period, full_industry_df)；找不到时返回 (None, 空DataFrame)。
+
+    优先查报告期索引：取样本公司披露比例达到 MIN_PERIOD_COVERAGE 的最新一期，
+    避免只有个别公司披露时就拿来做行业对标；都达不到时退而取有数据的最新一期。
+    索引不可用时才逐期探测，每次并发探测一年的4个季末，新的一年优先。
+    """
+    candidates = candidate_report_periods(end_year, years)
+    try:
+        index = fetch_period_index(industry, end_year - PERIOD_INDEX_YEARS + 1, end_year)
+    except Exception as e:
+        logger.warning("报告期索引获取失败，改为并发探测: %s", e)
+        index = pd.DataFrame()
+
+    if not index.empty:
+        coverage = dict(zip(index["end_date"], index["companies"] / index["sample_size"]))
+        with_data = [p for p in candidates if coverage.get(p, 0) > 0]
+        preferred = [p for p in with_data if coverage[p] >= MIN_PERIOD_COVERAGE]
+        for period in (preferred or with_data)[:2]:
+            full_industry_df = fetch_full_industry_data(industry, period)
+            if not full_industry_df.empty:
+                return period, full_industry_df
+
+    for i in range(0, len(candidates), len(REPORT_PERIOD_ENDS)):
+        batch = candidates[i:i + len(REPORT_PERIOD_ENDS)]
+        for period, full_industry_df, error in fan_out(lambda p: fetch_full_industry_data(industry, p), batch):
+            if error is None and not full_industry_df.empty:
+                return period, full_industry_df
+    return None, pd.DataFrame()
+
+
+@shared_cache(ttl=MEMORY_TTL)
+@persistent_cache("fina_indicator", ttl="disclosure")
 def fetch_all_data(ts_code: str, start: int, end: int) -> pd.DataFrame:
     """
     一次性拉取所需的所有字段...
@@ -121,8 +289,10 @@ def fetch_all_data(ts_code: str, start: int, end: int) -> pd.DataFrame:
         "fcff","fcfe"
     ])
 
-    df = pro.fina_indicator(
-        ts_code=ts_code,
+    # 按 fina_indicator 的行数上限估算日期窗口（单只股票约 20 年一个请求），更长的区间分块拉取后合并
+    df = pro.query_chunked(
+        "fina_indicator",
+        codes=[ts_code],
         start_date=f"{start}0101",
         end_date=f"{end}1231",
         fields=fields
@@ -130,11 +300,13 @@ def fetch_all_data(ts_code: str, start: int, end: int) -> pd.DataFrame:
 
     df["end_date"] = pd.to_datetime(df["end_date"], format="%Y%m%d")
     return df.drop_duplicates("end_date", keep="last").reset_index(drop=True)
-@st.cache_data
+@shared_cache(ttl=MEMORY_TTL)
+@persistent_cache("cashflow", ttl="disclosure")
 def fetch_cash_flow(ts_code: str, start: int, end: int) -> pd.DataFrame:
     """抓取现金流表，获取 interest_paid，用于利息保障倍数"""
-    df = pro.cashflow(
-        ts_code=ts_code,
+    df = pro.query_chunked(
+        "cashflow",
+        codes=[ts_code],
         start_date=f"{start}0101",
         end_date=f"{end}1231",
         fields="ts_code,end_date,interest_paid"
@@ -142,17 +314,57 @@ def fetch_cash_flow(ts_code: str, start: int, end: int) -> pd.DataFrame:
     df["end_date"] = pd.to_datetime(df["end_date"], format="%Y%m%d")
     return df.drop_duplicates("end_date", keep="last").reset_index(drop=True)
 
-@st.cache_data
-def fetch_price(ts_code: str, start: int, end: int) -> pd.DataFrame:
-    """抓取日线收盘价，用于股价时序图"""
-    df = pro.daily(
-        ts_code=ts_code,
-        start_date=f"{start}0101",
-        end_date=f"{end}1231",
+def _fetch_daily_range(ts_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """向 tushare 请求一段日线，供增量价格仓库补齐缺失区间使用"""
+    return pro.query_chunked(
+        "daily",
+        codes=[ts_code],
+        start_date=start_date,
+        end_date=end_date,
         fields="trade_date,close"
-    ).sort_values("trade_date")
+    )
+
+
+price_store = DailySeriesStore("daily", _fetch_daily_range)
+
+
+@shared_cache(ttl=MEMORY_TTL)
+def fetch_price(ts_code: str, start: int, end: int) -> pd.DataFrame:
+    """抓取日线收盘价，用于股价时序图（只增量请求本地仓库中缺失的日期）"""
+    df = price_store.get(ts_code, f"{start}0101", f"{end}1231")
+    if df.empty:
+        return pd.DataFrame(columns=["trade_date", "close"])
+    df = df.copy()
     df["trade_date"] = pd.to_datetime(df["trade_date"], format="%Y%m%d")
-    return df.drop_duplicates("trade_date", keep="last").reset_index(drop=True)
+    df = df.drop_duplicates("trade_date", keep="last").reset_index(drop=True)
+    return ingest_frame("daily", f"{ts_code}:{start}-{end}", df)
+
+
+def _fetch_adj_factor_range(ts_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """向 tushare 请求一段复权因子，供增量复权因子仓库补齐缺失区间使用"""
+    return pro.query_chunked(
+        "adj_factor",
+        codes=[ts_code],
+        start_date=start_date,
+        end_date=end_date,
+        fields="trade_date,adj_factor"
+    )
+
+
+# 复权因子是累积值，历史部分不会改变，和日线一样只需要增量补齐
+adj_factor_store = DailySeriesStore("adj_factor", _fetch_adj_factor_range)
+
+
+@shared_cache(ttl=MEMORY_TTL)
+def fetch_adj_factor(ts_code: str, start: int, end: int) -> pd.DataFrame:
+    """抓取复权因子 (trade_date, adj_factor)，与 fetch_price 的日线一起用于前/后复权"""
+    df = adj_factor_store.get(ts_code, f"{start}0101", f"{end}1231")
+    if df.empty:
+        return pd.DataFrame(columns=["trade_date", "adj_factor"])
+    df = df.copy()
+    df["trade_date"] = pd.to_datetime(df["trade_date"], format="%Y%m%d")
+    df = df.drop_duplicates("trade_date", keep="last").reset_index(drop=True)
+    return ingest_frame("adj_factor", f"{ts_code}:{start}-{end}", df)
 
 def compute_indicators(df: pd.DataFrame) -> pd.Series:
     """
@@ -238,81 +450,23 @@ def calc_cashflow(df: pd.DataFrame) -> pd.Series:
         "FCFE": latest.get("fcfe")
     })
 
-@st.cache_data(show_spinner="AI正在分析，请稍候...")
 def get_ai_analysis(company_name: str, data_summary: str) -> str:
     """
     调用Gemini模型，对输入的公司数据摘要进行分析。
     """
-    # 从secrets.toml中安全地获取API密钥
-    try:
-        api_key = st.secrets["google_ai"]["api_key"]
-        genai.configure(api_key=api_key)
-    except (KeyError, FileNotFoundError):
-        return "错误：未找到Google AI的API密钥。请在.streamlit/secrets.toml中配置。"
+    with st.spinner("AI正在分析，请稍候..."):
+        return ai.generate(build_analysis_prompt(company_name, data_summary))
 
-    # 创建模型实例
-    model = genai.GenerativeModel('gemini-2.0-flash') # 使用最新、速度最快的Flash模型
-
-    # --- 这是最关键的部分：构建高质量的提示词 (Prompt) ---
-    prompt = f"""
-    请你扮演一位专业的金融分析师。我将为你提供一家上市公司“{company_name}”的核心财务数据和行业对标情况，请你基于这些数据，给出一份简明扼要、有洞察力的分析报告。
-
-    你的分析需要包含以下几个方面，并以清晰的要点形式呈现：
-    1.  **总体评价**: 基于所有数据，对该公司的整体财务状况给出一个总体的定性评价（例如：财务状况健康、盈利能力强劲但成长性放缓、高风险高成长型等）。
-    2.  **亮点分析**: 指出该公司最突出的1-2个优点。请结合具体数据进行说明（例如：其ROE高达25%，远超行业平均水平，显示出卓越的股东回报能力）。
-    3.  **风险提示**: 指出该公司最值得关注的1-2个潜在风险或弱点。请结合具体数据进行说明（例如：其资产负债率达到75%，显著高于行业均值，偿债压力较大）。
-    4.  **总结与展望**: 对公司的未来发展给出一个简短的总结和展望。
-
-    以下是需要你分析的原始数据：
-    ---
-    {data_summary}
-    ---
-    请严格基于以上数据进行分析，不要编造数据之外的信息。
-    """
-
-    try:
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        return f"调用AI模型时发生错误: {e}"
-
-@st.cache_data(show_spinner="AI正在分析股价走势，请稍候...")
 def get_ai_price_chart_analysis(chart_data_summary: str) -> str:
     """
     调用Gemini模型，对输入的一段或多段股价时间序列数据进行分析解读。
     """
-    try:
-        api_key = st.secrets["google_ai"]["api_key"]
-        genai.configure(api_key=api_key)
-    except (KeyError, FileNotFoundError):
-        return "错误：未找到Google AI的API密钥。请在.streamlit/secrets.toml中配置。"
-
-    model = genai.GenerativeModel('gemini-2.0-flash')
-
-    # --- 专为图表分析设计的提示词 ---
-    prompt = f"""
-    请你扮演一位专业的图表分析师和市场评论员。我将为你提供一只或多只股票在一段时间内的价格走势数据。请你分析这些数据并给出一份简明的趋势解读报告。
-
-    你的分析应包括：
-    1.  **总体趋势**: 描述每只股票在整个时间段内的主要趋势（例如：震荡上行、长期盘整后突破、稳定下跌等）。
-    2.  **波动性**: 评价股价的波动程度（例如：波动剧烈，换手率高，或走势相对平稳）。
-    3.  **关键节点**: 如果有的话，指出明显的波峰或波谷，并描述其发生的大致时间（例如：“股价在2023年底达到阶段性高点后开始回调”）。
-    4.  **对比分析 (如果有多只股票)**: 这是分析的重点。请比较不同股票的表现。谁的涨幅更大？谁更稳定？它们之间是否存在相关性（比如走势趋同或背离）？
-
-    以下是需要你分析的股价数据（已按月度采样，格式为“月份: 月末收盘价”）：
-    ---
-    {chart_data_summary}
-    ---
-    请基于以上数据进行解读，语言风格要像专业的财经评论员，分析需客观、有条理。
-    """
+    with st.spinner("AI正在分析股价走势，请稍候..."):
+        return ai.generate(build_price_chart_prompt(chart_data_summary))
 
-    try:
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        return f"调用AI模型时发生错误: {e}"
 
-@st.cache_data(show_spinner="正在获取三大报表数据...")
+@shared_cache(ttl=MEMORY_TTL, spinner="正在获取三大报表数据...")
+@persistent_cache("statements", ttl="disclosure")
 def fetch_accounting_data(ts_code: str, start_year: int, end_year: int) -> pd.DataFrame:
     """
     获取指定公司在给定年份范围内的三大报表关键数据，并合并成一张宽表。
@@ -323,15 +477,15 @@ def fetch_accounting_data(ts_code: str, start_year: int, end_year: int) -> pd.Da
     try:
         # 1. 获取利润表关键字段
         income_fields = "ts_code,end_date,revenue,oper_exp,ebit,n_income"
-        income_df = pro.income(ts_code=ts_code, start_date=start_date, end_date=end_date, fields=income_fields)
+        income_df = pro.query_chunked("income", codes=[ts_code], start_date=start_date, end_date=end_date, fields=income_fields)
 
         # 2. 获取资产负债表关键字段
         balance_fields = "ts_code,end_date,total_assets,total_liab,accounts_receiv,inventories"
-        balance_df = pro.balancesheet(ts_code=ts_code, start_date=start_date, end_date=end_date, fields=balance_fields)
+        balance_df = pro.query_chunked("balancesheet", codes=[ts_code], start_date=start_date, end_date=end_date, fields=balance_fields)
 
         # 3. 获取现金流量表关键字段
         cashflow_fields = "ts_code,end_date,n_cashflow_act"
-        cashflow_df = pro.cashflow(ts_code=ts_code, start_date=start_date, end_date=end_date, fields=cashflow_fields)
+        cashflow_df = pro.query_chunked("cashflow", codes=[ts_code], start_date=start_date, end_date=end_date, fields=cashflow_fields)
 
         # 将所有数据表放入一个列表
         data_frames = [income_df, balance_df, cashflow_df]
@@ -356,26 +510,37 @@ def fetch_accounting_data(ts_code: str, start_year: int, end_year: int) -> pd.Da
     except Exception as e:
         st.error(f"获取三大报表数据时发生错误: {e}")
         return pd.DataFrame()
-@st.cache_data(show_spinner="AI正在分析，请稍候...")
 def get_ai_response(prompt: str) -> str:
     """
     一个通用的函数，接收一个完整的prompt，并调用Gemini模型返回结果。
     """
-    # 从secrets.toml中安全地获取API密钥
-    try:
-        api_key = st.secrets["google_ai"]["api_key"]
-        genai.configure(api_key=api_key)
-    except (KeyError, FileNotFoundError):
-        return "错误：未找到Google AI的API密钥。请在.streamlit/secrets.toml中配置。"
+    with st.spinner("AI正在分析，请稍候..."):
+        return ai.generate(prompt)
 
-    # 创建模型实例 (gemini-1.5-flash 是一个真实存在的、速度很快的模型)
-    model = genai.GenerativeModel('gemini-2.0-flash')
 
-    try:
-        response = model.generate_content(prompt)
-        # 增加对安全设置导致返回内容为空的处理
-        if not response.parts:
-            return "AI模型因为安全设置阻止了本次回复。这通常是因为Prompt或返回内容中可能包含了敏感信息。请尝试调整问题或检查数据。"
-        return response.text
-    except Exception as e:
-        return f"调用AI模型时发生错误: {e}"
\ No newline at end of file
+def stream_ai_response(prompt: str):
+    """
+    流式版本的 get_ai_response：逐段产出文本，配合 st.write_stream 使用，
+    首段文字到达即开始显示，不必等整篇报告生成完。
+    """
+    return ai.stream(prompt)
+
+
+def ai_cache_stats() -> dict:
+    """AI回复库的命中/未命中/淘汰次数与容量"""
+    return ai_store.stats()
+
+
+def run_ai_report_jobs(jobs: list):
+    """
+    按依赖关系并发执行一批 ReportJob（见 report_pipeline），按完成顺序产出 (key, 报告文本)。
+    """
+    return run_report_jobs(ai, jobs)
+
+
+def generate_ai_reports(prompts: dict):
+    """
+    并发生成多份报告：prompts 为 {key: 完整prompt}，
+    按完成顺序产出 (key, 报告文本)，总耗时约等于最慢的一份。
+    """
+    return ai.generate_many(prompts)
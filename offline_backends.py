@@ -0,0 +1,442 @@
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from cache_store import CACHE_DIR, read_frame, write_frame
+from tushare_client import ENDPOINT_ROW_LIMITS
+
+# 数据后端：live 真实 tushare / synthetic 合成数据 / replay 只回放录制的数据 / record 请求真实接口并录制
+DATA_BACKENDS = ("live", "synthetic", "replay", "record")
+# AI后端：live 真实 Gemini / fake 确定性的离线模拟回复
+LLM_BACKENDS = ("live", "fake")
+FAKE_MODEL_NAME = "offline-fake-llm"
+
+DEFAULT_BACKEND_CONFIG = {
+    "data": "live",
+    "llm": "live",
+    "fixture_dir": os.path.join(CACHE_DIR, "fixtures"),
+    "latency_ms": 0,
+    "jitter_ms": 0,
+    "synthetic_companies": 5000,
+    "synthetic_industries": 110,
+    "seed": 0,
+}
+# 全部通过环境变量配置，缓存层（cache_store）据此隔离合成数据，两边始终一致
+_ENV_KEYS = {
+    "data": "FINANCE_DATA_BACKEND",
+    "llm": "FINANCE_LLM_BACKEND",
+    "fixture_dir": "FINANCE_FIXTURE_DIR",
+    "latency_ms": "FINANCE_BACKEND_LATENCY_MS",
+    "jitter_ms": "FINANCE_BACKEND_JITTER_MS",
+    "synthetic_companies": "FINANCE_SYNTHETIC_COMPANIES",
+    "synthetic_industries": "FINANCE_SYNTHETIC_INDUSTRIES",
+    "seed": "FINANCE_SYNTHETIC_SEED",
+}
+
+
+def load_backend_config() -> dict:
+    """默认值 <- 环境变量"""
+    config = dict(DEFAULT_BACKEND_CONFIG)
+    for key, env in _ENV_KEYS.items():
+        if os.environ.get(env):
+            config[key] = os.environ[env]
+    for key in ("latency_ms", "jitter_ms", "synthetic_companies", "synthetic_industries", "seed"):
+        config[key] = int(config[key])
+    if config["data"] not in DATA_BACKENDS:
+        raise ValueError(f"未知的数据后端: {config['data']}，可选 {DATA_BACKENDS}")
+    if config["llm"] not in LLM_BACKENDS:
+        raise ValueError(f"未知的AI后端: {config['llm']}，可选 {LLM_BACKENDS}")
+    return config
+
+
+class LatencyInjector:
+    """每次调用前等待 latency_ms ± jitter_ms，用来模拟网络往返"""
+
+    def __init__(self, latency_ms: int = 0, jitter_ms: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    def delay(self) -> float:
+        return max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def sleep(self) -> None:
+        seconds = self.delay()
+        if seconds:
+            time.sleep(seconds)
+
+
+# ---------------------------------------------------------------------------
+# 合成行情：所有数值都是 (种子, 公司序号, 期数, 指标) 的确定性哈希，
+# 不需要预先生成和保存整张表，任意切片都可以向量化地即时算出来。
+# ---------------------------------------------------------------------------
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _hash_uniform(seed: int, *keys) -> np.ndarray:
+    """splitmix64 风格的计数器哈希，返回 [0, 1) 的均匀分布；keys 可以是可广播的整数数组"""
+    with np.errstate(over="ignore"):
+        x = np.full(np.broadcast(*keys).shape, np.uint64(seed) * _GOLDEN + np.uint64(1), dtype=np.uint64)
+        for key in keys:
+            x = (x ^ np.asarray(key, dtype=np.uint64)) * _GOLDEN
+            x ^= x >> np.uint64(30)
+            x *= np.uint64(0xBF58476D1CE4E5B9)
+            x ^= x >> np.uint64(27)
+            x *= np.uint64(0x94D049BB133111EB)
+            x ^= x >> np.uint64(31)
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def _hash_normal(seed: int, *keys) -> np.ndarray:
+    """Box-Muller，把两路均匀哈希转成标准正态"""
+    u1 = np.clip(_hash_uniform(seed, *keys, 1), 1e-12, 1.0)
+    u2 = _hash_uniform(seed, *keys, 2)
+    return np.sqrt(-2 * np.log(u1)) * np.cos(2 * np.pi * u2)
+
+
+# 指标: (行业均值中心, 公司间离散度, 季度噪声, 季节性幅度)
+_FINA_PROFILE = {
+    "roe": (8.0, 5.0, 1.5, 2.0),
+    "netprofit_margin": (12.0, 8.0, 2.0, 1.0),
+    "grossprofit_margin": (30.0, 12.0, 2.0, 1.0),
+    "debt_to_assets": (50.0, 15.0, 2.0, 0.5),
+    "current_ratio": (1.8, 0.6, 0.15, 0.05),
+    "quick_ratio": (1.3, 0.5, 0.12, 0.05),
+    "or_yoy": (10.0, 10.0, 8.0, 0.0),
+    "netprofit_yoy": (8.0, 15.0, 15.0, 0.0),
+    "basic_eps_yoy": (8.0, 15.0, 15.0, 0.0),
+    "inv_turn": (5.0, 3.0, 0.6, 1.0),
+    "ar_turn": (8.0, 4.0, 0.8, 1.5),
+    "assets_turn": (0.6, 0.3, 0.05, 0.1),
+    "interst_income": (1e7, 5e6, 2e6, 0.0),
+    "ebit": (8e8, 6e8, 1e8, 5e7),
+    "fcff": (5e8, 8e8, 3e8, 2e8),
+    "fcfe": (3e8, 6e8, 3e8, 1.5e8),
+}
+# 三大报表科目：(规模中心, 离散度, 季度噪声, 季节性幅度) —— 再乘以公司规模因子
+_STATEMENT_PROFILE = {
+    "income": {"revenue": (5e9, 3e9, 4e8, 5e8), "oper_exp": (4e9, 2.5e9, 3e8, 4e8),
+               "ebit": (8e8, 6e8, 1e8, 5e7), "n_income": (6e8, 5e8, 1e8, 5e7)},
+    "balancesheet": {"total_assets": (2e10, 1e10, 5e8, 0.0), "total_liab": (1e10, 6e9, 4e8, 0.0),
+                     "accounts_receiv": (1.5e9, 1e9, 2e8, 1e8), "inventories": (2e9, 1.5e9, 3e8, 1e8)},
+    "cashflow": {"n_cashflow_act": (7e8, 6e8, 3e8, 2e8), "interest_paid": (5e7, 3e7, 1e7, 0.0)},
+}
+_METRIC_IDS = {name: i for i, name in enumerate(
+    list(_FINA_PROFILE) + [m for table in _STATEMENT_PROFILE.values() for m in table] + ["pe", "pb", "close", "adj_factor"])}
+
+# 合成数据的起点；定期报告在期末后约 4 个月内披露完毕，之前的报告期视为“尚未披露”
+SYNTHETIC_START = pd.Timestamp("2000-01-01")
+DISCLOSURE_LAG_DAYS = 120
+# 除权除息事件：每个交易日分红除息的概率（约每年一次，复权因子 +1%~4%）和送转股的概率（约每 8 年一次，×1.5~2）
+EX_DIVIDEND_PROB = 1 / 250
+BONUS_SHARE_PROB = 1 / 2000
+_INDUSTRY_WORDS = ["银行", "证券", "保险", "白酒", "医药", "软件", "电力", "汽车", "钢铁", "煤炭", "化工", "建材",
+                   "家电", "食品", "半导体", "通信", "传媒", "地产", "航空", "物流", "农业", "纺织"]
+_NAME_CHARS = list("中国华东方新科技电子能源医药生物股份银行证券汽车电力通信建设材料食品长城海天宏远恒瑞光明")
+
+
+def _filter_fields(df: pd.DataFrame, fields: str) -> pd.DataFrame:
+    if not fields:
+        return df
+    columns = [f for f in fields.split(",") if f in df.columns]
+    return df[columns]
+
+
+def _page(df: pd.DataFrame, endpoint: str, limit=None, offset=None) -> pd.DataFrame:
+    """模拟 tushare 的 limit/offset 翻页和单次返回行数上限"""
+    offset = int(offset or 0)
+    cap = ENDPOINT_ROW_LIMITS.get(endpoint)
+    limit = int(limit) if limit else cap
+    if cap:
+        limit = min(limit, cap)
+    return df.iloc[offset:offset + limit] if limit else df.iloc[offset:]
+
+
+def _codes(ts_code) -> list:
+    return [c for c in ts_code.split(",") if c] if ts_code else []
+
+
+class SyntheticTushare:
+    """
+    合成的 tushare pro 客户端，接口名、参数和返回列与真实接口一致：
+    stock_basic / fina_indicator / fina_indicator_vip / daily / adj_factor / daily_basic / income / balancesheet / cashflow。
+    数据完全由 seed 决定，可重复；单次返回行数上限与 ENDPOINT_ROW_LIMITS 一致，翻页和分块逻辑都能被真实地走到。
+    """
+
+    def __init__(self, n_companies: int = 5000, n_industries: int = 110, seed: int = 0, latency: LatencyInjector = None):
+        self.seed = seed
+        self.latency = latency or LatencyInjector()
+        ids = np.arange(n_companies)
+        self.codes = [f"{600000 + i:06d}.SH" if i % 2 else f"{i:06d}.SZ" for i in ids]
+        self.code_index = {code: i for i, code in enumerate(self.codes)}
+        self.industries = [f"{_INDUSTRY_WORDS[j % len(_INDUSTRY_WORDS)]}{'' if j < len(_INDUSTRY_WORDS) else j // len(_INDUSTRY_WORDS)}"
+                           for j in range(n_industries)]
+        # 行业规模不均匀：少数大行业、很多小行业
+        weights = 1 / (1 + np.arange(n_industries)) ** 0.5
+        cumulative = np.cumsum(weights / weights.sum())
+        self.industry_of = np.searchsorted(cumulative, _hash_uniform(seed, ids, 7), side="right").clip(0, n_industries - 1)
+        name_picks = (_hash_uniform(seed, ids[:, None], 8, np.arange(4)[None, :]) * len(_NAME_CHARS)).astype(int)
+        self.names = ["".join(_NAME_CHARS[k] for k in row[:2 + i % 3]) + str(i) for i, row in enumerate(name_picks)]
+        self.size_factor = np.exp(_hash_normal(seed, ids, 9) * 0.8)
+        self.calendar = pd.bdate_range(SYNTHETIC_START, pd.Timestamp.now().normalize())
+
+    # ---- 工具 ----
+
+    def _disclosed_quarters(self) -> pd.DatetimeIndex:
+        last = pd.Timestamp.now().normalize() - pd.Timedelta(days=DISCLOSURE_LAG_DAYS)
+        return pd.date_range(SYNTHETIC_START, last, freq="QE")
+
+    def _periods(self, period=None, start_date=None, end_date=None) -> pd.DatetimeIndex:
+        quarters = self._disclosed_quarters()
+        if period:
+            return quarters[quarters == pd.Timestamp(period)]
+        start = pd.Timestamp(start_date) if start_date else quarters[0]
+        end = pd.Timestamp(end_date) if end_date else quarters[-1]
+        return quarters[(quarters >= start) & (quarters <= end)]
+
+    def _code_ids(self, ts_code) -> np.ndarray:
+        codes = _codes(ts_code)
+        if not codes:
+            return np.arange(len(self.codes))
+        return np.array([self.code_index[c] for c in codes if c in self.code_index], dtype=int)
+
+    def _quarterly_values(self, ids: np.ndarray, quarters: pd.DatetimeIndex, metric: str, profile: tuple, scaled: bool) -> np.ndarray:
+        """(公司 × 季度) 的指标矩阵：公司水平 + 行业偏移 + 季节性 + 噪声"""
+        center, spread, noise, seasonal = profile
+        metric_id = _METRIC_IDS[metric]
+        q_ids = ((quarters.year - SYNTHETIC_START.year) * 4 + quarters.quarter - 1).to_numpy()
+        level = center + spread * (0.6 * _hash_normal(self.seed, ids, metric_id, 11)
+                                   + 0.4 * _hash_normal(self.seed, self.industry_of[ids], metric_id, 12))
+        values = (level[:, None]
+                  + seasonal * np.sin(np.pi / 2 * quarters.quarter.to_numpy())[None, :]
+                  + noise * _hash_normal(self.seed, ids[:, None], q_ids[None, :], metric_id))
+        if scaled:
+            values = values * self.size_factor[ids][:, None]
+        return values
+
+    def _quarterly_frame(self, endpoint: str, profile: dict, scaled: bool, ts_code=None, period=None,
+                         start_date=None, end_date=None, fields=None, limit=None, offset=None, **_) -> pd.DataFrame:
+        self.latency.sleep()
+        ids = self._code_ids(ts_code)
+        quarters = self._periods(period, start_date, end_date)[::-1]  # tushare 按报告期倒序返回
+        grid_codes = np.repeat(np.array(self.codes, dtype=object)[ids], len(quarters))
+        grid_dates = np.tile(quarters.strftime("%Y%m%d").to_numpy(), len(ids))
+        data = {"ts_code": grid_codes, "end_date": grid_dates}
+        wanted = set(fields.split(",")) if fields else set(profile)
+        for metric, metric_profile in profile.items():
+            if metric in wanted:
+                data[metric] = self._quarterly_values(ids, quarters, metric, metric_profile, scaled).ravel()
+        df = pd.DataFrame(data)
+        return _page(_filter_fields(df, fields), endpoint, limit, offset).reset_index(drop=True)
+
+    # ---- 接口 ----
+
+    def stock_basic(self, exchange="", list_status="L", fields=None, **_):
+        self.latency.sleep()
+        df = pd.DataFrame({
+            "ts_code": self.codes,
+            "symbol": [c.split(".")[0] for c in self.codes],
+            "name": self.names,
+            "industry": [self.industries[j] for j in self.industry_of],
+            "list_status": "L",
+        })
+        return _filter_fields(df, fields)
+
+    def fina_indicator(self, **kwargs):
+        return self._quarterly_frame("fina_indicator", _FINA_PROFILE, scaled=False, **kwargs)
+
+    def fina_indicator_vip(self, **kwargs):
+        kwargs.pop("ts_code", None)
+        return self._quarterly_frame("fina_indicator_vip", _FINA_PROFILE, scaled=False, **kwargs)
+
+    def income(self, **kwargs):
+        return self._quarterly_frame("income", _STATEMENT_PROFILE["income"], scaled=True, **kwargs)
+
+    def balancesheet(self, **kwargs):
+        return self._quarterly_frame("balancesheet", _STATEMENT_PROFILE["balancesheet"], scaled=True, **kwargs)
+
+    def cashflow(self, **kwargs):
+        return self._quarterly_frame("cashflow", _STATEMENT_PROFILE["cashflow"], scaled=True, **kwargs)
+
+    def _adj_factor_matrix(self, ids: np.ndarray, stop: int) -> np.ndarray:
+        """(公司 × 交易日) 复权因子：从 1 开始，在每次除权除息日按分红或送转比例累乘（与 tushare 的口径一致，只增不减）"""
+        day_ids = np.arange(stop)
+        metric_id = _METRIC_IDS["adj_factor"]
+        events = _hash_uniform(self.seed, ids[:, None], day_ids[None, :], metric_id)
+        size = _hash_uniform(self.seed, ids[:, None], day_ids[None, :], metric_id, 1)
+        jumps = np.where(events < EX_DIVIDEND_PROB, 1.01 + 0.03 * size, 1.0)
+        jumps = np.where(events < BONUS_SHARE_PROB, 1.5 + 0.5 * size, jumps)
+        return np.cumprod(jumps, axis=1)
+
+    def _close_matrix(self, ids: np.ndarray, stop: int) -> np.ndarray:
+        """
+        (公司 × 交易日) 不复权收盘价：先生成对数收益率的随机游走（相当于后复权价格），
+        再除以复权因子，除权除息日会出现与分红、送转对应的跳空
+        """
+        day_ids = np.arange(stop)
+        drift = 0.0002 + 0.0003 * _hash_normal(self.seed, ids, 21)
+        vol = 0.015 + 0.01 * _hash_uniform(self.seed, ids, 22)
+        returns = drift[:, None] + vol[:, None] * _hash_normal(self.seed, ids[:, None], day_ids[None, :], _METRIC_IDS["close"])
+        base = 5 + 45 * _hash_uniform(self.seed, ids, 23)
+        return base[:, None] * np.exp(np.cumsum(returns, axis=1)) / self._adj_factor_matrix(ids, stop)
+
+    def daily(self, ts_code=None, trade_date=None, start_date=None, end_date=None, fields=None, limit=None, offset=None, **_):
+        self.latency.sleep()
+        ids = self._code_ids(ts_code)
+        start = pd.Timestamp(trade_date or start_date or self.calendar[0])
+        end = pd.Timestamp(trade_date or end_date or self.calendar[-1])
+        lo, hi = self.calendar.searchsorted(start), self.calendar.searchsorted(end, side="right")
+        if hi <= lo or len(ids) == 0:
+            return _filter_fields(pd.DataFrame(columns=["ts_code", "trade_date", "close"]), fields)
+        closes = self._close_matrix(ids, hi)[:, lo:hi][:, ::-1]  # 日期倒序，与 tushare 一致
+        dates = self.calendar[lo:hi][::-1].strftime("%Y%m%d").to_numpy()
+        df = pd.DataFrame({
+            "ts_code": np.repeat(np.array(self.codes, dtype=object)[ids], len(dates)),
+            "trade_date": np.tile(dates, len(ids)),
+            "close": closes.ravel().round(2),
+        })
+        return _page(_filter_fields(df, fields), "daily", limit, offset).reset_index(drop=True)
+
+    def adj_factor(self, ts_code=None, trade_date=None, start_date=None, end_date=None, fields=None, limit=None, offset=None, **_):
+        self.latency.sleep()
+        ids = self._code_ids(ts_code)
+        start = pd.Timestamp(trade_date or start_date or self.calendar[0])
+        end = pd.Timestamp(trade_date or end_date or self.calendar[-1])
+        lo, hi = self.calendar.searchsorted(start), self.calendar.searchsorted(end, side="right")
+        if hi <= lo or len(ids) == 0:
+            return _filter_fields(pd.DataFrame(columns=["ts_code", "trade_date", "adj_factor"]), fields)
+        factors = self._adj_factor_matrix(ids, hi)[:, lo:hi][:, ::-1]
+        dates = self.calendar[lo:hi][::-1].strftime("%Y%m%d").to_numpy()
+        df = pd.DataFrame({
+            "ts_code": np.repeat(np.array(self.codes, dtype=object)[ids], len(dates)),
+            "trade_date": np.tile(dates, len(ids)),
+            "adj_factor": factors.ravel().round(3),
+        })
+        return _page(_filter_fields(df, fields), "adj_factor", limit, offset).reset_index(drop=True)
+
+    def daily_basic(self, ts_code=None, trade_date=None, fields=None, limit=None, offset=None, **_):
+        self.latency.sleep()
+        ids = self._code_ids(ts_code)
+        day = pd.Timestamp(trade_date) if trade_date else self.calendar[-1]
+        if day not in self.calendar or len(ids) == 0:
+            return _filter_fields(pd.DataFrame(columns=["ts_code", "trade_date", "pe", "pb"]), fields)
+        day_id = self.calendar.get_loc(day)
+        df = pd.DataFrame({
+            "ts_code": np.array(self.codes, dtype=object)[ids],
+            "trade_date": day.strftime("%Y%m%d"),
+            "pe": (20 + 12 * _hash_normal(self.seed, ids, 31) + 2 * _hash_normal(self.seed, ids, day_id, _METRIC_IDS["pe"])).round(2),
+            "pb": (2 + 1.2 * np.abs(_hash_normal(self.seed, ids, 32)) + 0.1 * _hash_normal(self.seed, ids, day_id, _METRIC_IDS["pb"])).round(2),
+        })
+        return _page(_filter_fields(df, fields), "daily_basic", limit, offset).reset_index(drop=True)
+
+
+class FixtureTushare:
+    """
+    录制 / 回放 tushare 响应：以 (接口, 参数) 的哈希为文件名，存成 fixture_dir/<接口>/<hash>.parquet。
+    - upstream 不为空：请求真实（或合成）接口并写入录制文件（record 模式）；
+    - upstream 为空：只回放，没有录制过的请求直接报错（replay 模式）。
+    """
+
+    def __init__(self, fixture_dir: str, upstream=None, latency: LatencyInjector = None):
+        self.fixture_dir = fixture_dir
+        self.upstream = upstream
+        self.latency = latency or LatencyInjector()
+
+    def _path(self, endpoint: str, kwargs: dict) -> str:
+        raw = json.dumps(sorted(kwargs.items()), default=str, ensure_ascii=False)
+        return os.path.join(self.fixture_dir, endpoint, hashlib.sha1(raw.encode("utf-8")).hexdigest() + ".parquet")
+
+    def call(self, endpoint: str, **kwargs) -> pd.DataFrame:
+        path = self._path(endpoint, kwargs)
+        if self.upstream is None:
+            self.latency.sleep()
+            df = read_frame(path)
+            if df is None:
+                raise LookupError(f"没有录制过的请求: {endpoint} {kwargs}（请先用 record 模式录制）")
+            return df
+        df = getattr(self.upstream, endpoint)(**kwargs)
+        write_frame(path, df, user_metadata={"endpoint": endpoint, "params": {k: str(v) for k, v in kwargs.items()}})
+        return df
+
+    def __getattr__(self, endpoint: str):
+        if endpoint.startswith("_"):
+            raise AttributeError(endpoint)
+        return lambda **kwargs: self.call(endpoint, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# 离线 AI：确定性的模拟回复，支持同步 / 流式 / 异步三种调用方式
+# ---------------------------------------------------------------------------
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = [text] if text else []
+
+
+class FakeGenerativeModel:
+    """
+    与 genai.GenerativeModel 接口一致的离线模型：回复内容由提示词哈希决定（同样的提示词回复完全相同），
+    首字延迟 latency，之后每段再等待 latency / chunks，用于压测流式与并发路径。
+    """
+
+    def __init__(self, model_name: str = FAKE_MODEL_NAME, latency: LatencyInjector = None, chunks: int = 8):
+        self.model_name = model_name
+        self.latency = latency or LatencyInjector()
+        self.chunks = chunks
+
+    def _reply(self, prompt: str) -> str:
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+        data_lines = [line.strip() for line in prompt.splitlines() if "|" in line]
+        lines = [
+            f"### 离线模拟报告（{digest[:8]}）",
+            f"- 提示词长度 {len(prompt)} 字符，其中表格数据 {len(data_lines)} 行。",
+        ]
+        if data_lines:
+            lines.append(f"- 数据表头：{data_lines[0]}")
+        lines += [f"- 要点 {i + 1}：这是用于离线测试的确定性回复片段 {digest[i * 4:i * 4 + 4]}。" for i in range(self.chunks - len(lines))]
+        return "\n".join(lines)
+
+    def _split(self, text: str) -> list:
+        lines = text.split("\n")
+        return [line + "\n" for line in lines]
+
+    def generate_content(self, prompt: str, stream: bool = False, **_):
+        text = self._reply(prompt)
+        if not stream:
+            self.latency.sleep()
+            return _FakeResponse(text)
+
+        def chunks():
+            self.latency.sleep()
+            for piece in self._split(text):
+                yield _FakeResponse(piece)
+                time.sleep(self.latency.delay() / self.chunks)
+        return chunks()
+
+    async def generate_content_async(self, prompt: str, **_):
+        await asyncio.sleep(self.latency.delay())
+        return _FakeResponse(self._reply(prompt))
+
+
+def create_data_client(config: dict, live_factory):
+    """按配置创建 tushare 客户端；live_factory 负责创建真实客户端（需要 token）"""
+    latency = LatencyInjector(config["latency_ms"], config["jitter_ms"])
+    backend = config["data"]
+    if backend == "live":
+        return live_factory()
+    if backend == "synthetic":
+        return SyntheticTushare(config["synthetic_companies"], config["synthetic_industries"], config["seed"], latency)
+    if backend == "replay":
+        return FixtureTushare(config["fixture_dir"], latency=latency)
+    return FixtureTushare(config["fixture_dir"], upstream=live_factory())
+
+
+def create_fake_model(config: dict) -> FakeGenerativeModel:
+    return FakeGenerativeModel(latency=LatencyInjector(config["latency_ms"], config["jitter_ms"]))
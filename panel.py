@@ -0,0 +1,127 @@
+import pandas as pd
+
+from parallel import fan_out
+from analytics import adjust_prices
+from finance_utils import fetch_accounting_data, fetch_adj_factor, fetch_all_data, fetch_price
+
+# 行业内历史趋势图的线型，按公司在所选列表中的位置循环使用
+LINE_STYLES = ['solid', 'dashed', 'dotted', 'dotdash']
+PANEL_INDEX = ["ts_code", "end_date"]
+PRICE_COLUMNS = ["ts_code", "name", "trade_date", "close"]
+
+
+class BasketPanel:
+    """
+    一次页面运行里所有选中公司的数据面板：build() 并发拉取一次，页面各区块都从这里读取，
+    不再各自重复 fetch / concat。
+    - panel：以 (ts_code, end_date) 为索引的长表，包含财务指标、报告期末收盘价 close、公司名 name，
+      以及 load_statements() 之后并入的三大报表科目（与财务指标重名的科目以财务指标为准）；
+    - prices：日线长表 (ts_code, name, trade_date, close)，供股价图使用，按 adjust（none / qfq / hfq）复权，
+      复权因子和日线在同一个 fan_out 里拉取，之后对所有公司一次性向量化复权；
+    - errors：{(数据集, ts_code): 异常}，由各区块按需展示。
+    """
+
+    def __init__(self, codes: list, start_year: int, end_year: int, code_to_name: dict, adjust: str = "none"):
+        self.codes = list(codes)
+        self.start_year = start_year
+        self.end_year = end_year
+        self.code_to_name = code_to_name
+        self.adjust = adjust
+        self.errors = {}
+        self.panel = pd.DataFrame(index=pd.MultiIndex.from_tuples([], names=PANEL_INDEX))
+        self.prices = pd.DataFrame(columns=PRICE_COLUMNS)
+        self.indicator_columns = []
+        self.statement_columns = []
+        self._statement_codes = set()
+
+    def _fetch(self, loaders: dict, codes: list) -> dict:
+        """所有 (数据集, 公司) 组合放进同一个 fan_out 并发拉取，返回非空结果 {(数据集, ts_code): df}"""
+        tasks = [(name, code) for name in loaders for code in codes]
+        frames = {}
+        for task, df, error in fan_out(lambda t: loaders[t[0]](t[1]), tasks):
+            if error is not None:
+                self.errors[task] = error
+            elif df is not None and not df.empty:
+                frames[task] = df
+        return frames
+
+    def _stack(self, frames: dict, dataset: str) -> pd.DataFrame:
+        """按 codes 顺序把同一数据集各公司的结果拼成一张长表，加上 ts_code 列"""
+        codes = [code for code in self.codes if (dataset, code) in frames]
+        if not codes:
+            return pd.DataFrame()
+        return pd.concat([frames[(dataset, code)] for code in codes], keys=codes,
+                         names=["ts_code", None]).reset_index(level="ts_code").reset_index(drop=True)
+
+    def build(self) -> "BasketPanel":
+        start, end = self.start_year, self.end_year
+        loaders = {
+            "fina_indicator": lambda code: fetch_all_data(code, start, end),
+            "daily": lambda code: fetch_price(code, start, end),
+        }
+        if self.adjust != "none":
+            loaders["adj_factor"] = lambda code: fetch_adj_factor(code, start, end)
+        frames = self._fetch(loaders, self.codes)
+
+        # 报告期末收盘价始终用不复权价格（与当期的每股指标口径一致）
+        raw_prices = self._stack(frames, "daily")
+        if not raw_prices.empty:
+            raw_prices["name"] = raw_prices["ts_code"].map(self.code_to_name).fillna(raw_prices["ts_code"])
+            raw_prices = raw_prices[PRICE_COLUMNS]
+            self.prices = adjust_prices(raw_prices, self._stack(frames, "adj_factor"), self.adjust)
+
+        indicator_codes = [code for code in self.codes if ("fina_indicator", code) in frames]
+        if not indicator_codes:
+            return self
+        indicators = pd.concat([frames[("fina_indicator", code)] for code in indicator_codes], ignore_index=True)
+        indicators["ts_code"] = indicators["ts_code"].astype(object)
+        self.indicator_columns = [c for c in indicators.columns if c not in PANEL_INDEX]
+        if not raw_prices.empty:
+            # 报告期末（或之前最近一个交易日）的收盘价
+            period_close = raw_prices[["ts_code", "trade_date", "close"]].sort_values("trade_date")
+            indicators = pd.merge_asof(indicators.sort_values("end_date"), period_close, left_on="end_date",
+                                       right_on="trade_date", by="ts_code").drop(columns="trade_date")
+        indicators["name"] = indicators["ts_code"].map(self.code_to_name).fillna(indicators["ts_code"])
+        self.panel = indicators.set_index(PANEL_INDEX).sort_index()
+        return self
+
+    def load_statements(self, codes: list = None) -> None:
+        """拉取三大报表并并入面板；已经并入过的公司不会重复请求"""
+        start, end = self.start_year, self.end_year
+        codes = [code for code in (codes or self.codes) if code not in self._statement_codes]
+        if not codes:
+            return
+        frames = self._fetch({"statements": lambda code: fetch_accounting_data(code, start, end)}, codes)
+        self._statement_codes.update(codes)
+        if not frames:
+            return
+        statements = pd.concat(frames.values(), ignore_index=True)
+        statements["ts_code"] = statements["ts_code"].astype(object)
+        statements = statements.drop(columns=[c for c in statements.columns if c in self.indicator_columns])
+        statements = statements.set_index(PANEL_INDEX)
+        self.statement_columns += [c for c in statements.columns if c not in self.statement_columns]
+        self.panel = self.panel.combine_first(statements)
+
+    def history(self, codes: list = None, styles: bool = False) -> pd.DataFrame:
+        """
+        指定公司（默认全部，按给定顺序）的历史财务指标宽表，列为 ts_code / end_date / 各指标 / close / name；
+        styles=True 时按公司顺序附加折线图线型列 style。只含有财务指标的报告期。
+        """
+        codes = list(codes or self.codes)
+        present = [code for code in codes if code in self.panel.index.get_level_values("ts_code")]
+        if not present:
+            return pd.DataFrame()
+        columns = [c for c in self.panel.columns if c not in self.statement_columns]
+        history = self.panel.loc[present, columns].dropna(subset=self.indicator_columns, how="all").reset_index()
+        if styles:
+            line_styles = {code: LINE_STYLES[i % len(LINE_STYLES)] for i, code in enumerate(codes)}
+            history["style"] = history["ts_code"].map(line_styles)
+        return history
+
+    def statements(self, code: str) -> pd.DataFrame:
+        """单家公司的三大报表宽表（fetch_accounting_data 的列），首次访问时才拉取"""
+        self.load_statements([code])
+        if not self.statement_columns or code not in self.panel.index.get_level_values("ts_code"):
+            return pd.DataFrame()
+        statements = self.panel.loc[[code], self.statement_columns].dropna(how="all")
+        return statements.reset_index()
@@ -0,0 +1,43 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# 并发上限：既要让多家公司的请求重叠，又不能一下子把 tushare 的频率配额打满
+DEFAULT_MAX_WORKERS = 8
+
+
+def fan_out(func, items, max_workers: int = DEFAULT_MAX_WORKERS) -> list:
+    """
+    用有界线程池并发执行 func(item)。
+
+    返回与 items 顺序一致的 [(item, result, error)] 列表：
+    某一项抛出异常时 result 为 None、error 为异常对象，不影响其他项。
+    工作线程会挂上当前的 ScriptRunContext，这样缓存加载时的
+    spinner 和 st.error 在线程里也能正常工作；同时复制调用方的 contextvars，
+    埋点事件（telemetry）能归到发起它的那次页面运行。
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    parent_context = contextvars.copy_context()
+
+    def call(item):
+        if ctx is not None:
+            add_script_run_ctx(ctx=ctx)
+        try:
+            return item, func(item), None
+        except Exception as e:
+            return item, None, e
+
+    def run(item):
+        # 同一个 Context 不能被多个线程同时进入，每一项各用一份副本
+        return parent_context.copy().run(call, item)
+
+    if len(items) == 1 or max_workers <= 1:
+        return [run(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(run, items))
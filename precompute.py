@@ -0,0 +1,146 @@
+"""
+无界面批量预热：复用 finance_utils 的数据层（不启动 Streamlit 页面），把应用会读取的数据
+提前写入本地持久化缓存（CACHE_DIR），当天第一位用户打开页面时就不必再等冷启动请求。
+
+依次完成：
+1. 全市场股票列表 stock_basic；
+2. 每个行业解析最新有效报告期，并生成行业对标数据（报告期索引 + 全市场快照切片）；
+3. 自选股（watchlist）的历史财务指标、日线行情、复权因子和三大报表。
+
+自选股来源：--watchlist 参数、--watchlist-file 文件（每行一个代码，# 开头为注释）、
+环境变量 FINANCE_WATCHLIST（逗号分隔）。年份默认与 app.py 侧边栏滑块的默认值一致，
+这样写入的缓存键和页面实际请求的完全相同。
+
+用法（在仓库根目录，可放进每晚的定时任务）:
+    python precompute.py
+    python precompute.py --watchlist 600519.SH 000001.SZ
+    python precompute.py --watchlist-file watchlist.txt --industries 银行 白酒
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+# 与 app.py 侧边栏的默认值一致：最新期为今年，历史区间从 (今年 - 1) - 5 年开始
+DEFAULT_HISTORY_YEARS = 6
+# 按行业预热时的并发数（请求仍然受 RateLimitedPro 的每分钟配额限制）
+INDUSTRY_WORKERS = 4
+
+
+def load_watchlist(codes: list, path: str = None) -> list:
+    watchlist = list(codes or [])
+    if path:
+        with open(path, encoding="utf-8") as f:
+            watchlist += [line.split("#")[0].strip() for line in f]
+    watchlist += os.environ.get("FINANCE_WATCHLIST", "").split(",")
+    # 去重并保持顺序
+    return list(dict.fromkeys(code.strip().upper() for code in watchlist if code.strip()))
+
+
+def _step(title: str):
+    print(f"\n== {title}")
+    return time.perf_counter()
+
+
+def _done(started: float, message: str) -> None:
+    print(f"   {message}（{time.perf_counter() - started:.1f}s）")
+
+
+def precompute(industries: list, watchlist: list, end_year: int, history_start: int) -> list:
+    """执行预热，返回失败项 [(步骤, 对象, 错误)]"""
+    from parallel import fan_out
+    from finance_utils import (
+        fetch_accounting_data,
+        fetch_adj_factor,
+        fetch_all_data,
+        fetch_price,
+        lookup_stock_basic,
+        resolve_industry_period,
+    )
+    failures = []
+
+    started = _step("股票列表 stock_basic")
+    basic = lookup_stock_basic()
+    all_industries = sorted(basic["industry"].dropna().unique())
+    _done(started, f"{len(basic)} 家公司，{len(all_industries)} 个行业")
+
+    targets = [i for i in industries if i in all_industries] if industries else all_industries
+    unknown = sorted(set(industries or []) - set(all_industries))
+    if unknown:
+        print(f"   忽略不存在的行业: {', '.join(unknown)}")
+
+    started = _step(f"行业对标数据（{len(targets)} 个行业，截至 {end_year} 年）")
+    periods = {}
+    for industry, result, error in fan_out(lambda ind: resolve_industry_period(ind, end_year), targets,
+                                           max_workers=INDUSTRY_WORKERS):
+        if error is not None:
+            failures.append(("industry", industry, error))
+            continue
+        period, industry_df = result
+        if period is None:
+            failures.append(("industry", industry, "最近5年内没有有效报告期"))
+            continue
+        periods.setdefault(period, []).append(industry)
+    summary = "，".join(f"{p}: {len(inds)} 个行业" for p, inds in sorted(periods.items(), reverse=True))
+    _done(started, f"报告期分布 {summary or '无'}")
+
+    unknown = [code for code in watchlist if code not in set(basic["ts_code"])]
+    if unknown:
+        print(f"\n   忽略不在股票列表中的代码: {', '.join(unknown)}")
+    codes = [code for code in watchlist if code not in unknown]
+    if codes:
+        started = _step(f"自选股历史数据（{len(codes)} 家，{history_start}~{end_year} 年）")
+        loaders = {
+            "fina_indicator": lambda c: fetch_all_data(c, history_start, end_year),
+            "daily": lambda c: fetch_price(c, history_start, end_year),
+            "adj_factor": lambda c: fetch_adj_factor(c, history_start, end_year),
+            "statements": lambda c: fetch_accounting_data(c, history_start, end_year),
+        }
+        for name, loader in loaders.items():
+            for code, df, error in fan_out(loader, codes):
+                if error is not None or df is None or df.empty:
+                    failures.append((name, code, error or "返回空数据"))
+        _done(started, f"{len(codes) * len(loaders)} 项")
+    return failures
+
+
+def print_upstream_summary() -> None:
+    """打印本次预热的上游调用与缓存命中统计（来自 telemetry）"""
+    from telemetry import telemetry
+    summary = pd.DataFrame(telemetry.process_summary())
+    if summary.empty:
+        return
+    columns = ["kind", "name", "calls", "errors", "duration_s", "rows", "retries", "wait_s", "hits", "misses"]
+    print("\n== 上游调用与缓存统计")
+    print(summary[columns].round(2).to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    current_year = pd.Timestamp.now().year
+    parser.add_argument("--end-year", type=int, default=current_year, help="最新期年份（默认今年）")
+    parser.add_argument("--history-start", type=int, help=f"历史区间起始年份（默认 end-year - {DEFAULT_HISTORY_YEARS}）")
+    parser.add_argument("--industries", nargs="*", help="只预热这些行业（默认全部）")
+    parser.add_argument("--watchlist", nargs="*", default=[], help="自选股代码，例如 600519.SH")
+    parser.add_argument("--watchlist-file", help="自选股文件，每行一个代码")
+    args = parser.parse_args()
+
+    # 不在 Streamlit 运行时里时，spinner 和工作线程会反复打印 bare mode 警告，这里静默掉
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+    watchlist = load_watchlist(args.watchlist, args.watchlist_file)
+    history_start = args.history_start or args.end_year - DEFAULT_HISTORY_YEARS
+
+    started = time.perf_counter()
+    failures = precompute(args.industries, watchlist, args.end_year, history_start)
+    print_upstream_summary()
+    print(f"\n预热完成，总耗时 {time.perf_counter() - started:.1f}s，失败 {len(failures)} 项")
+    for step, target, error in failures:
+        print(f"   [{step}] {target}: {error}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+import time
+import threading
+
+import pandas as pd
+
+from cache_store import CACHE_DIR, DAILY_UPDATE_HOUR, read_frame, read_metadata, write_frame, _now
+from telemetry import telemetry, frame_size
+
+DATE_FMT = "%Y%m%d"
+
+
+def _to_ts(date_str: str) -> pd.Timestamp:
+    return pd.Timestamp(date_str)
+
+
+def _to_str(ts: pd.Timestamp) -> str:
+    return ts.strftime(DATE_FMT)
+
+
+def last_settled_date() -> str:
+    """最近一个“日线已入库”的日期：当天收盘数据入库之前算作昨天。"""
+    now = _now()
+    settled = now.normalize() if now.hour >= DAILY_UPDATE_HOUR else now.normalize() - pd.Timedelta(days=1)
+    return _to_str(settled)
+
+
+def merge_intervals(intervals: list) -> list:
+    """合并 [start, end]（YYYYMMDD，闭区间）列表，相邻的日期也会被合并。"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and _to_ts(start) <= _to_ts(merged[-1][1]) + pd.Timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_intervals(start: str, end: str, covered: list) -> list:
+    """求 [start, end] 中尚未被 covered 覆盖的日期区间，可能出现在前、后或中间。"""
+    gaps = []
+    cursor = _to_ts(start)
+    stop = _to_ts(end)
+    for c_start, c_end in merge_intervals(covered):
+        c_start, c_end = _to_ts(c_start), _to_ts(c_end)
+        if c_end < cursor:
+            continue
+        if c_start > stop:
+            break
+        if c_start > cursor:
+            gaps.append([_to_str(cursor), _to_str(c_start - pd.Timedelta(days=1))])
+        cursor = max(cursor, c_end + pd.Timedelta(days=1))
+        if cursor > stop:
+            break
+    if cursor <= stop:
+        gaps.append([_to_str(cursor), _to_str(stop)])
+    return gaps
+
+
+class DailySeriesStore:
+    """
+    按 ts_code 存储的增量日频数据仓库（追加写）。
+
+    每只股票一个 Parquet 文件，元数据里记录已经覆盖过的日期区间 (covered)。
+    请求某个窗口时只向上游拉取缺失的区间，然后在本地切片返回。
+    注意：覆盖区间按“已请求过”记录，而不是按“有数据”记录，
+    这样停牌、节假日这类本来就没有行情的日子不会被反复请求。
+    """
+
+    def __init__(self, name: str, fetch_func, date_col: str = "trade_date"):
+        # fetch_func(ts_code, start_date, end_date) -> DataFrame，日期为 YYYYMMDD 字符串
+        self.name = name
+        self.fetch_func = fetch_func
+        self.date_col = date_col
+        self.root = os.path.join(CACHE_DIR, name)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, ts_code: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(ts_code, threading.Lock())
+
+    def _path(self, ts_code: str) -> str:
+        return os.path.join(self.root, f"{ts_code}.parquet")
+
+    def get(self, ts_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """返回 [start_date, end_date] 窗口内的数据，只为缺失的区间请求上游。"""
+        settled = last_settled_date()
+        today = _to_str(_now())
+        fetch_end = min(end_date, today)
+        started = time.perf_counter()
+
+        with self._lock_for(ts_code):
+            path = self._path(ts_code)
+            stored = read_frame(path)
+            covered = read_metadata(path).get("covered", []) if stored is not None else []
+            if stored is None:
+                stored = pd.DataFrame()
+
+            gaps = missing_intervals(start_date, fetch_end, covered) if start_date <= fetch_end else []
+            if gaps:
+                new_parts = [self.fetch_func(ts_code, gap_start, gap_end) for gap_start, gap_end in gaps]
+                new_parts = [df for df in new_parts if df is not None and not df.empty]
+                if new_parts:
+                    stored = pd.concat([stored] + new_parts, ignore_index=True)
+                    stored = (stored.sort_values(self.date_col)
+                              .drop_duplicates(self.date_col, keep="last")
+                              .reset_index(drop=True))
+
+                # 尚未入库的日期不计入覆盖区间，下次访问时会再补一次
+                newly_covered = [[s, min(e, settled)] for s, e in gaps if s <= settled]
+                covered = merge_intervals(covered + newly_covered)
+                # 上游一行都没有返回（整段停牌、全是非交易日）时也要写入，否则覆盖区间丢失，之后每次都会重新请求
+                if new_parts or newly_covered:
+                    write_frame(path, stored, user_metadata={"covered": covered})
+
+        # 命中 = 窗口已全部覆盖，不需要请求上游
+        rows, size = frame_size(stored)
+        telemetry.record("cache", f"store:{self.name}", time.perf_counter() - started,
+                         rows=rows, bytes=size, cache="miss" if gaps else "hit")
+        if stored.empty:
+            return stored
+        mask = (stored[self.date_col] >= start_date) & (stored[self.date_col] <= end_date)
+        return stored.loc[mask].reset_index(drop=True)
@@ -0,0 +1,86 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# 数据块统一保留的小数位数，以及缺失值的记法
+DECIMALS = 2
+MISSING = "-"
+
+
+def format_values(values, decimals: int = DECIMALS, scale: float = 1.0) -> np.ndarray:
+    """
+    整列格式化：固定小数位，缺失值记为 “-”。
+    先按原始精度除以 scale，再统一转成 float64 格式化。
+    """
+    numbers = pd.to_numeric(np.asarray(values), errors="coerce")
+    if scale != 1.0:
+        numbers = numbers / scale
+    numbers = numbers.astype(float)
+    text = np.char.mod(f"%.{decimals}f", numbers).astype(object)
+    text[np.isnan(numbers)] = MISSING
+    return text
+
+
+class HistoryTables:
+    """
+    多家公司的“季度 × 指标”历史表：构造时一次性完成筛选、取每家公司最近 depth 期、
+    生成季度标签和格式化全部单元格；render(code, depth) 只拼接已经格式化好的行，
+    因此 fit_to_budget 逐期缩减深度时不会重复格式化。
+    """
+
+    def __init__(self, history_df: pd.DataFrame, codes: list, metrics: dict, depth: int, scale: float = 1.0):
+        self.header = "|".join(["季度"] + list(metrics.values()))
+        self._lines = defaultdict(list)
+        if history_df.empty:
+            return
+        # 每行属于第几家公司（不在 codes 里为 -1），按公司稳定排序后，只保留每家公司的最后 depth 行
+        codes = pd.Index(list(dict.fromkeys(codes)))
+        positions = codes.get_indexer(history_df["ts_code"].to_numpy(dtype=object))
+        selected = np.flatnonzero(positions >= 0)
+        order = selected[np.argsort(positions[selected], kind="stable")]
+        groups = positions[order]
+        rows_from_end = np.cumsum(np.bincount(groups, minlength=len(codes)))[groups] - np.arange(len(order))
+        keep = rows_from_end <= depth
+        rows, row_codes = order[keep], codes.to_numpy()[groups[keep]]
+
+        dates = pd.DatetimeIndex(pd.to_datetime(history_df["end_date"].to_numpy()[rows]))
+        quarters = [f"{year}Q{quarter}" for year, quarter in zip(dates.year, dates.quarter)]
+        columns = [format_values(history_df[metric].to_numpy()[rows] if metric in history_df.columns
+                                 else np.full(len(rows), np.nan), scale=scale)
+                   for metric in metrics]
+        for code, *cells in zip(row_codes, quarters, *columns):
+            self._lines[code].append("|".join(cells))
+
+    def render(self, code: str, depth: int) -> str:
+        lines = self._lines.get(code, [])
+        return "\n".join([self.header] + lines[max(len(lines) - depth, 0):])
+
+
+def rank_labels(rankings: pd.DataFrame, codes: list, metrics: list) -> pd.DataFrame:
+    """
+    “排名/总数”文本表（公司 × 指标），排名表里没有的记为 N/A（与 analytics.format_rank 一致）。
+    一次 reindex 取出全部 (公司, 指标)，代替逐个 .loc 查找。
+    """
+    index = pd.MultiIndex.from_product([codes, metrics], names=["ts_code", "metric"])
+    if rankings is None or rankings.empty:
+        table = pd.DataFrame({"rank": np.nan, "total": np.nan}, index=index)
+    else:
+        table = rankings[["rank", "total"]].reindex(index)
+    labels = [f"{int(rank)}/{int(total)}" if pd.notna(rank) else "N/A"
+              for rank, total in zip(table["rank"].to_numpy(), table["total"].to_numpy())]
+    return pd.DataFrame(np.array(labels, dtype=object).reshape(len(codes), len(metrics)), index=codes, columns=metrics)
+
+
+def latest_values(frame: pd.DataFrame, codes: list, metrics: list, first: bool = True) -> pd.DataFrame:
+    """
+    每家公司一行（first=True 取第一条，否则取最后一条）的格式化数值表（公司 × 指标），
+    只包含 frame 里有数据的公司（按 codes 顺序）和存在的指标。
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=[m for m in metrics if m in frame.columns])
+    rows = frame.drop_duplicates("ts_code", keep="first" if first else "last").set_index("ts_code")
+    present = [code for code in codes if code in rows.index]
+    columns = [m for m in metrics if m in rows.columns]
+    rows = rows.loc[present, columns]
+    return pd.DataFrame({metric: format_values(rows[metric]) for metric in columns}, index=present)
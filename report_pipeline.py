@@ -0,0 +1,128 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from report_prompts import (
+    CAPABILITY_LABELS,
+    build_analysis_prompt,
+    build_strategy_prompt,
+    build_accounting_prompt,
+    build_capability_prompt,
+    build_cashflow_prompt,
+    build_prospect_prompt,
+)
+
+# 行业内对比的四项能力报告（现金流是单公司报告，单独处理）
+COMPARISON_CAPABILITIES = ("profit", "solvency", "growth", "operating")
+ACCOUNTING_MISSING_MESSAGE = "错误：未能获取到足够的会计数据进行分析。"
+
+
+class ReportJob:
+    """
+    一键生成报告中的一个AI任务。
+    - key：结果在 results 里的键，例如 ("strategy", "银行")、("accounting", "000001.SZ")；
+    - build_prompt(results)：依赖全部完成后才调用，可以把前序报告拼进提示词；
+    - depends_on：需要先完成的任务 key 列表；
+    - result：不需要调用模型时直接给出结果（例如数据缺失时的提示文本）。
+    """
+
+    def __init__(self, key, build_prompt=None, depends_on=(), result: str = None):
+        self.key = key
+        self.build_prompt = build_prompt
+        self.depends_on = tuple(depends_on)
+        self.result = result
+
+
+def run_report_jobs(client, jobs: list):
+    """
+    按依赖关系调度报告任务：依赖已满足的任务立即提交给 client.submit()（并发上限由客户端控制），
+    每完成一个就检查是否有新任务可以开始。按完成顺序产出 (key, 报告文本)。
+    """
+    keys = {job.key for job in jobs}
+    for job in jobs:
+        missing = [dep for dep in job.depends_on if dep not in keys]
+        if missing:
+            raise ValueError(f"报告任务 {job.key} 依赖了不存在的任务: {missing}")
+
+    results = {}
+    pending = {job.key: job for job in jobs}
+    running = {}
+    while pending or running:
+        # 直接给出结果的任务可能让其它任务就绪，因此反复扫描直到没有新任务可以开始
+        ready = True
+        while ready:
+            ready = [key for key, job in pending.items() if all(dep in results for dep in job.depends_on)]
+            for key in ready:
+                job = pending.pop(key)
+                if job.result is not None:
+                    results[key] = job.result
+                    yield key, job.result
+                else:
+                    running[client.submit(job.build_prompt(results))] = key
+        if not running:
+            if pending:
+                raise ValueError(f"报告任务存在循环依赖: {list(pending)}")
+            break
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            key = running.pop(future)
+            results[key] = future.result()
+            yield key, results[key]
+
+
+def build_harvard_report_jobs(industry_contexts: dict, code_to_name: dict, accounting_frames: dict,
+                              cross_industry_prompt: str = None) -> list:
+    """
+    由页面上已经准备好的数据构建完整哈佛分析报告的全部任务。除前景分析外，提示词与各单项按钮完全一致
+    （因此单项按钮之后会直接命中AI回复库）；前景分析有意在末尾附上前序报告的结论（prior_reports），
+    提示词与单项按钮不同，两者在AI回复库中各存一份，互不复用。
+
+    industry_contexts：{行业: {"codes", "company_names_str", 以及财务数据就绪时的
+    "historical_df", "selected_data", "rankings", "period"}}
+    accounting_frames：{ts_code: fetch_accounting_data() 的结果}
+    依赖关系：每个行业的前景分析等待本行业的战略分析和四项能力报告完成，并参考它们的结论。
+    """
+    jobs = []
+    for industry, context in industry_contexts.items():
+        codes = context["codes"]
+        jobs.append(ReportJob(("strategy", industry),
+                              lambda results, industry=industry, names=context["company_names_str"]:
+                                  build_strategy_prompt(industry, names)))
+
+        for code in codes:
+            company_name = code_to_name.get(code, code)
+            accounting_df = accounting_frames.get(code)
+            if accounting_df is None or accounting_df.empty:
+                jobs.append(ReportJob(("accounting", code), result=ACCOUNTING_MISSING_MESSAGE))
+            else:
+                jobs.append(ReportJob(("accounting", code),
+                                      lambda results, name=company_name, code=code, df=accounting_df:
+                                          build_analysis_prompt(name, build_accounting_prompt(name, code, df))))
+
+        # 财务数据没有就绪的行业，页面上也不会显示财务分析和前景分析
+        if "historical_df" not in context:
+            continue
+        for capability in COMPARISON_CAPABILITIES:
+            jobs.append(ReportJob((capability, industry),
+                                  lambda results, capability=capability, industry=industry, context=context:
+                                      build_analysis_prompt("对比报告", build_capability_prompt(
+                                          capability, industry, context["codes"], code_to_name,
+                                          context["historical_df"], context["selected_data"],
+                                          context["rankings"], context["period"]))))
+        for code in codes:
+            company_name = code_to_name.get(code, code)
+            jobs.append(ReportJob(("cashflow", code),
+                                  lambda results, name=company_name, code=code, context=context:
+                                      build_analysis_prompt(name, build_cashflow_prompt(name, code, context["historical_df"]))))
+
+        prior_keys = [("strategy", industry)] + [(capability, industry) for capability in COMPARISON_CAPABILITIES]
+
+        def build_prospect(results, context=context, prior_keys=prior_keys):
+            prior_reports = {("战略分析" if kind == "strategy" else CAPABILITY_LABELS[kind]): results[(kind, industry)]
+                             for kind, industry in prior_keys}
+            return build_prospect_prompt(context["codes"], code_to_name, context["selected_data"],
+                                         context["rankings"], prior_reports=prior_reports)
+
+        jobs.append(ReportJob(("prospect", industry), build_prospect, depends_on=prior_keys))
+
+    if cross_industry_prompt:
+        jobs.append(ReportJob(("cross_industry", None), lambda results: cross_industry_prompt))
+    return jobs
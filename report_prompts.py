@@ -0,0 +1,460 @@
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+from prompt_tables import MISSING, HistoryTables, format_values, latest_values, rank_labels
+
+# 各项能力分析用到的指标（图表与AI提示词共用）
+CAPABILITY_METRICS = {
+    "profit": {'roe': 'ROE', 'netprofit_margin': '净利率', 'grossprofit_margin': '毛利率'},
+    "solvency": {'debt_to_assets': '资产负债率 (%)', 'current_ratio': '流动比率', 'quick_ratio': '速动比率'},
+    "growth": {'or_yoy': '营收同比 (%)', 'netprofit_yoy': '净利同比 (%)'},
+    "operating": {'assets_turn': '总资产周转率', 'inv_turn': '存货周转率', 'ar_turn': '应收账款周转率'},
+    "cashflow": {'fcff': '企业自由现金流', 'fcfe': '股权自由现金流'},
+}
+CAPABILITY_LABELS = {"profit": "盈利能力", "solvency": "偿债能力", "growth": "成长能力", "operating": "运营能力", "cashflow": "现金流"}
+
+# 各项能力报告默认带入的历史期数，以及行业对标数值的单位
+CAPABILITY_SUMMARY_STYLE = {
+    "profit": {"depth": 8, "unit": "%"},
+    "solvency": {"depth": 5, "unit": ""},
+    "growth": {"depth": 5, "unit": "%"},
+    "operating": {"depth": 8, "unit": ""},
+    "cashflow": {"depth": 8, "unit": "亿元"},
+}
+
+# 每个提示词数据块的 token 预算（不含指令部分）；超出时自动减少历史期数，最少保留 MIN_HISTORY_DEPTH 期
+PROMPT_DATA_TOKEN_BUDGET = 2000
+MIN_HISTORY_DEPTH = 2
+# 金额统一换算为亿元（数据块的小数位数 DECIMALS 见 prompt_tables）
+YI = 1e8
+# 中日韩文字和全角标点（按 1 个 token/字 估算）
+_WIDE_CHARS = re.compile("[\u2e80-\U0010ffff]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算 token 数：中日韩文字和全角标点约 1 个 token/字，其余字符约 4 个字符/token。
+    只用于预算控制和基准对比，不追求与模型分词器完全一致。
+    """
+    wide = len(_WIDE_CHARS.findall(text))
+    return wide + math.ceil((len(text) - wide) / 4)
+
+
+def encode_table(header: list, rows: list) -> str:
+    """
+    紧凑表格编码：首行为表头，之后每行一条记录，列以 “|” 分隔。
+    同一列的数值小数位一致；不做空格补齐，避免空白字符额外占用 token。
+    """
+    lines = ["|".join(header)]
+    lines += ["|".join(str(cell) for cell in row) for row in rows]
+    return "\n".join(lines)
+
+
+def fit_to_budget(build, depth: int, budget: int = PROMPT_DATA_TOKEN_BUDGET) -> str:
+    """
+    build(depth) 生成数据块；估算 token 超出预算时逐期减少历史深度，直到满足预算或降到 MIN_HISTORY_DEPTH。
+    """
+    summary = build(depth)
+    while estimate_tokens(summary) > budget and depth > MIN_HISTORY_DEPTH:
+        depth -= 1
+        summary = build(depth)
+    return summary
+
+
+def build_analysis_prompt(company_name: str, data_summary: str) -> str:
+    """
+    构建“专业金融分析师”提示词：把输入的公司数据摘要包装成完整的分析任务。
+    """
+    # --- 这是最关键的部分：构建高质量的提示词 (Prompt) ---
+    return f"""
+    请你扮演一位专业的金融分析师。我将为你提供一家上市公司“{company_name}”的核心财务数据和行业对标情况，请你基于这些数据，给出一份简明扼要、有洞察力的分析报告。
+
+    你的分析需要包含以下几个方面，并以清晰的要点形式呈现：
+    1.  **总体评价**: 基于所有数据，对该公司的整体财务状况给出一个总体的定性评价（例如：财务状况健康、盈利能力强劲但成长性放缓、高风险高成长型等）。
+    2.  **亮点分析**: 指出该公司最突出的1-2个优点。请结合具体数据进行说明（例如：其ROE高达25%，远超行业平均水平，显示出卓越的股东回报能力）。
+    3.  **风险提示**: 指出该公司最值得关注的1-2个潜在风险或弱点。请结合具体数据进行说明（例如：其资产负债率达到75%，显著高于行业均值，偿债压力较大）。
+    4.  **总结与展望**: 对公司的未来发展给出一个简短的总结和展望。
+
+    以下是需要你分析的原始数据：
+    ---
+    {data_summary}
+    ---
+    请严格基于以上数据进行分析，不要编造数据之外的信息。
+    """
+
+
+def build_price_chart_prompt(chart_data_summary: str) -> str:
+    """
+    专为图表分析设计的提示词（数据为基于日线收盘价计算的统计结果）。
+    """
+    return f"""
+    请你扮演一位专业的图表分析师和市场评论员。我将为你提供一只或多只股票在一段时间内基于日线收盘价计算的走势统计。请你分析这些数据并给出一份简明的趋势解读报告。
+
+    你的分析应包括：
+    1.  **总体趋势**: 结合区间涨跌幅、年化收益和各年度涨跌幅，描述每只股票在整个时间段内的主要趋势（例如：震荡上行、长期盘整后突破、稳定下跌等）。
+    2.  **波动性与风险**: 根据年化波动率和最大回撤评价股价的波动程度和下行风险。
+    3.  **关键节点**: 结合最大回撤的峰值、谷底和修复日期以及年度涨跌幅，指出明显的波峰或波谷及其发生的大致时间（例如：“股价在2023年底达到阶段性高点后开始回调”）。
+    4.  **对比分析 (如果有多只股票)**: 这是分析的重点。请比较不同股票的表现。谁的涨幅更大？谁更稳定？结合相关系数和贝塔，说明它们之间的走势是趋同还是背离，谁对整体涨跌更敏感。
+
+    以下是需要你分析的股价统计（表格格式：首行为表头，列以 | 分隔，“-”表示缺失）：
+    ---
+    {chart_data_summary}
+    ---
+    请基于以上数据进行解读，语言风格要像专业的财经评论员，分析需客观、有条理。
+    """
+
+
+# 股价区间统计表的列：(summary 列, 表头, 是否为百分比)
+PRICE_STAT_COLUMNS = [
+    ("first_close", "首日收盘", False), ("last_close", "末日收盘", False),
+    ("period_return", "区间涨跌(%)", True), ("annual_return", "年化收益(%)", True),
+    ("volatility", "年化波动率(%)", True), ("max_drawdown", "最大回撤(%)", True),
+]
+PRICE_DATE_COLUMNS = [("peak_date", "回撤峰值日"), ("trough_date", "回撤谷底日"), ("recovery_date", "修复日")]
+# 公司不超过这个数时给出完整相关系数矩阵，否则只列出相关性最高和最低的若干对
+CORRELATION_MATRIX_MAX = 8
+CORRELATION_PAIRS = 5
+
+
+def _format_dates(values: pd.Series) -> np.ndarray:
+    return values.dt.strftime("%Y-%m-%d").fillna(MISSING).to_numpy(dtype=object)
+
+
+def _correlation_table(correlation: pd.DataFrame) -> str:
+    names = [str(name) for name in correlation.columns]
+    values = correlation.to_numpy()
+    if len(names) <= CORRELATION_MATRIX_MAX:
+        cells = [format_values(values[:, i]) for i in range(len(names))]
+        return "\n".join(["|".join(["相关系数"] + names)] + ["|".join(row) for row in zip(names, *cells)])
+    # 上三角的所有公司对，按相关系数从高到低，只保留最高和最低的 CORRELATION_PAIRS 对
+    first, second = np.triu_indices(len(names), k=1)
+    known = ~np.isnan(values[first, second])
+    first, second = first[known], second[known]
+    pairs = values[first, second]
+    order = np.argsort(-pairs)
+    if len(order) > 2 * CORRELATION_PAIRS:
+        order = np.concatenate([order[:CORRELATION_PAIRS], order[-CORRELATION_PAIRS:]])
+    text = format_values(pairs[order])
+    lines = [f"{names[first[i]]}|{names[second[i]]}|{cell}" for i, cell in zip(order, text)]
+    return "\n".join(["公司A|公司B|相关系数（最高与最低各若干对）"] + lines)
+
+
+def build_price_analytics_summary(analytics: dict, price_basis: str = None) -> str:
+    """
+    股价数据块（analytics.compute_price_analytics 的结果）：区间统计（每家公司一行）、
+    各自然年涨跌幅（年份 × 公司）和日收益率相关系数。超出预算时从最早的年份开始缩减年度表。
+    price_basis 为价格口径（如“前复权”），给出时写在数据块开头。
+    """
+    summary = analytics["summary"]
+    names = [str(name) for name in summary.index]
+    span = [f"{start}~{end}" for start, end in zip(_format_dates(summary["start_date"]), _format_dates(summary["end_date"]))]
+    stat_cells = [format_values(summary[column], scale=0.01 if percent else 1.0) for column, _, percent in PRICE_STAT_COLUMNS]
+    stat_cells += [_format_dates(summary[column]) for column, _ in PRICE_DATE_COLUMNS]
+    stat_cells.append(format_values(summary["beta"]))
+    header = ["公司", "区间"] + [label for _, label, _ in PRICE_STAT_COLUMNS] + [label for _, label in PRICE_DATE_COLUMNS] + ["贝塔"]
+    stats = "\n".join(["|".join(header)] + ["|".join(row) for row in zip(names, span, *stat_cells)])
+
+    annual = analytics["annual_returns"]
+    annual_header = "|".join(["年份"] + names)
+    annual_lines = ["|".join(cells) for cells in zip(annual.index.astype(str),
+                                                     *(format_values(annual[name].to_numpy(), scale=0.01) for name in annual.columns))]
+    sections = [
+        f"价格口径：{price_basis}" if price_basis else "",
+        "【区间统计】（贝塔相对所选股票的等权组合）\n" + stats,
+        None,
+        "【日收益率相关系数】\n" + _correlation_table(analytics["correlation"]) if len(names) > 1 else "",
+    ]
+
+    def build(depth):
+        sections[2] = "【年度涨跌幅(%)】\n" + "\n".join([annual_header] + annual_lines[max(len(annual_lines) - depth, 0):])
+        return "\n\n".join(section for section in sections if section)
+
+    return fit_to_budget(build, depth=len(annual_lines))
+
+
+_CAPABILITY_TEMPLATES = {
+    "profit": """
+    你是一位顶尖的金融分析师，对商业的季节性（Seasonality）有深刻理解。我将为你提供【{industry}】行业中几家公司的盈利能力数据。
+
+    你的任务是生成一份专业的**对比分析报告**。分析时必须注意：这些数据有强烈的季节性特征，因此简单的环比（如Q1对比前一年的Q4）可能具有误导性。请你重点进行**同比增长**的对比分析。
+
+    报告需包含以下要点：
+    1.  **综合诊断**: 结合行业排名和历史数据，谁的综合盈利能力最强？它们的盈利能力是否表现出相似的季节性规律？
+    2.  **趋势解读**: 在剔除季节性因素后（比如观察同比数据），哪家公司的盈利能力是在真实地改善？谁的行业地位在逐年巩固？
+    3.  **投资观点**: 基于以上分析，从盈利能力和其稳定性的角度看，你会更青睐哪家公司？
+
+    以下是需要你分析的原始数据（表格格式：首行为表头，列以 | 分隔，“-”表示缺失）:
+    ---
+    {full_summary}
+    ---
+    请确保你的分析是基于公司之间的横向对比，而不仅仅是罗列各家公司的情况。
+    """,
+    "solvency": """
+    你是一位顶尖的金融风控专家，擅长评估公司的财务健康状况和偿债风险。我将为你提供【{industry}】行业中几家公司的偿债能力数据。
+
+    你的任务是生成一份专业的**偿债能力对比分析报告**。请务必使用**“行业排名”**来衡量它们的相对风险水平。
+    1.  **风险评级**: 谁的财务杠杆最合理，偿债风险最低？谁的风险最高？请结合**资产负债率的行业排名**进行评级。
+    2.  **长短期风险分析**: 对比它们的短期流动性（流动比率）和长期债务负担（资产负债率），是否存在风险错配？
+    3.  **战略推断**: 从财务杠杆的使用和排名看，可以看出这几家公司的经营战略有何不同吗？（例如：一家是利用高杠杆获取高排名的激进派，另一家是低杠杆稳健派）
+    4.  **贷方视角**: 如果你是银行审批官，谁的**行业排名和财务数据**更能让你放心批复贷款？
+
+    以下是需要你分析的几家公司的原始数据（表格格式：首行为表头，列以 | 分隔，“-”表示缺失）：
+    ---
+    {full_summary}
+    ---
+    请确保你的分析紧扣“偿债能力”这个主题，并充分利用所给的全部数据进行对比。
+    """,
+    "growth": """
+    你是一位顶尖的成长股投资分析师。我将为你提供【{industry}】行业中几家公司的成长能力数据。
+
+    你的任务是生成一份专业的**成长能力对比分析报告**。
+    1.  **成长质量评估**: 谁是真正的成长领袖？请结合**营收增速和净利增速的绝对值与行业排名**进行判断。是否存在“增收不增利”的伪成长？
+    2.  **趋势与持续性**: 结合历史数据，谁的增长趋势更稳定、更具持续性？谁的行业领先地位是新晋获得的？
+    3.  **未来潜力**: 基于当前的增长态势和行业排名，你认为哪家公司未来的增长潜力更大？
+
+    以下是需要你分析的几家公司的原始数据（表格格式：首行为表头，列以 | 分隔，“-”表示缺失）：
+    ---
+    {full_summary}
+    ---
+    请围绕“成长性”这个核心进行深入对比分析。
+    """,
+    "operating": """
+    你是一位顶尖的企业运营管理顾问，非常清楚运营效率会受季节性需求波动的影响。我将为你提供【{industry}】行业中几家公司的运营效率数据。
+
+    你的任务是生成一份专业的**运营能力对比分析报告**。分析时请务必考虑季节性因素。
+    1.  **效率评级**: 谁是最高效的运营者？请对其运营效率进行排序。
+    2.  **季节性管理**: 从各项周转率的季度变化中，能否看出哪家公司对季节性波动的管理能力更强（例如，在旺季能快速清空库存）？
+    3.  **真实效率趋势**: 剔除季节性影响后，谁的运营效率在持续、真实地提升？
+
+    以下是需要你分析的原始数据（表格格式：首行为表头，列以 | 分隔，“-”表示缺失）:
+    ---
+    {full_summary}
+    ---
+    请围绕“运营效率”这个核心进行深入对比分析。
+    """,
+}
+
+_CASHFLOW_TEMPLATE = """
+    你是一位顶尖的价值投资分析师，将“现金流”视为企业价值的基石，并深知其季节性波动规律。我将为你提供“{company_name}”这家公司的历史现金流数据。
+
+    你的任务是生成一份专业的**单公司现金流深度分析报告**。请务必在分析中考虑季节性。
+    1.  **“造血”能力评估**: 综合来看，这家公司的现金流状况如何？是否存在明显的季节性流入（如年末回款）和流出（如年初采购）？
+    2.  **趋势解读**: 在剔除季节性因素后（例如进行同比增长对比），它的核心“造血”能力（特别是FCFF）是在增长、稳定还是萎缩？这可能反映出公司正处于哪个发展阶段？
+    3.  **财务健康度总结**: 基于以上分析，对该公司的现金流健康度给出一个总结性评价。
+
+    以下是需要你分析的原始数据（表格格式：首行为表头，列以 | 分隔，“-”表示缺失）:
+    ---
+    {single_company_summary}
+    ---
+    请仅围绕这家公司的历史现金流数据进行深入分析。
+    """
+
+
+def build_capability_summary(capability: str, codes: list, code_to_name: dict, historical_df: pd.DataFrame,
+                             selected_data: pd.DataFrame, rankings: pd.DataFrame, period: str,
+                             depth: int = None) -> str:
+    """
+    为盈利/偿债/成长/运营能力对比报告拼接数据摘要：
+    每家公司一张历史趋势表 + 全部公司一张最新报告期的行业对标表（数值与排名）。
+    """
+    metrics = CAPABILITY_METRICS[capability]
+    style = CAPABILITY_SUMMARY_STYLE[capability]
+    depth = depth or style["depth"]
+    history = HistoryTables(historical_df, codes, metrics, depth)
+
+    # 行业对标表与历史深度无关，只生成一次（排名方向已在排名表中配置，例如资产负债率越小越好）
+    compared = [metric for metric in metrics if metric in selected_data.columns]
+    values = latest_values(selected_data, codes, compared)
+    cells = values + "(" + rank_labels(rankings, list(values.index), compared) + ")"
+    comparison_rows = [[code_to_name.get(code, code)] + list(row) for code, row in zip(cells.index, cells.to_numpy())]
+    comparison_header = ["公司"] + [metrics[metric] for metric in compared]
+    unit_note = f"，单位{style['unit']}" if style["unit"] else ""
+    comparison = (f"\n行业对标 (报告期 {period}，数值(行业排名){unit_note}):\n" + encode_table(comparison_header, comparison_rows)
+                  if comparison_rows else "")
+
+    def build(depth):
+        blocks = [f"\n--- 公司: {code_to_name.get(code, code)} ({code}) 历史趋势 (近{depth}期) ---\n"
+                  + history.render(code, depth) for code in codes]
+        return "\n".join(blocks) + comparison
+
+    return fit_to_budget(build, depth)
+
+
+def build_capability_prompt(capability: str, industry: str, codes: list, code_to_name: dict,
+                            historical_df: pd.DataFrame, selected_data: pd.DataFrame,
+                            rankings: pd.DataFrame, period: str) -> str:
+    """盈利/偿债/成长/运营能力的行业内对比分析提示词"""
+    full_summary = build_capability_summary(capability, codes, code_to_name, historical_df,
+                                            selected_data, rankings, period)
+    return _CAPABILITY_TEMPLATES[capability].format(industry=industry, full_summary=full_summary)
+
+
+def build_cashflow_prompt(company_name: str, code: str, historical_df: pd.DataFrame) -> str:
+    """单公司现金流纵向分析提示词（现金流绝对值受规模影响大，不做横向对比）"""
+    depth = CAPABILITY_SUMMARY_STYLE["cashflow"]["depth"]
+    history = HistoryTables(historical_df, [code], CAPABILITY_METRICS["cashflow"], depth, scale=YI)
+
+    def build(depth):
+        return (f"公司: {company_name} ({code})\n历史现金流数据 (近{depth}期，单位：亿元):\n"
+                + history.render(code, depth))
+
+    summary = fit_to_budget(build, depth)
+    return _CASHFLOW_TEMPLATE.format(company_name=company_name, single_company_summary=summary)
+
+
+_STRATEGY_TEMPLATE = """
+    请你扮演一位顶级的战略顾问（如麦肯锡、波士顿咨询）。我将为你提供【{industry}】行业中的几家公司，你的任务是为它们生成一份全面的战略对比分析报告。
+
+    请严格按照以下**两个部分**来构建你的报告：
+
+    **第一部分：各公司独立深度分析**
+    请对以下每一家公司，都独立进行完整的分析。使用清晰的三级标题（###）来分隔每家公司。在每家公司的分析中，都应包含：
+    1.  **PEST分析**: 影响该行业的宏观政治(Political)、经济(Economic)、社会(Social)和技术(Technological)因素。
+    2.  **波特五力模型**: 该行业的五种竞争力分析。
+    3.  **SWOT分析**: 总结该公司自身的优势(Strengths)、劣势(Weaknesses)、机会(Opportunities)和威胁(Threats)。
+
+    **第二部分：横向对比与战略总结**
+    在完成所有公司的独立分析后，请撰写一个总结性的对比部分。使用清晰的二级标题（##）来标识。在这个部分，请回答以下核心问题：
+    1.  **战略定位差异**: 这几家公司的核心战略定位有何不同？（例如：一家聚焦高端市场，另一家主打性价比？）
+    2.  **竞争优势对比**: 谁拥有更强的竞争护城河？它们的优势分别体现在哪里（品牌、成本、技术、渠道）？
+    3.  **前景展望**: 结合宏观（PEST）和行业（五力）环境，哪家公司处于更有利的竞争地位，未来发展潜力更大？
+
+    需要分析的公司列表如下：
+    - {company_names_str}
+
+    请确保你的报告结构清晰、逻辑严谨，直接输出最终的分析报告。
+    """
+
+_ACCOUNTING_TEMPLATE = """
+    你是一位经验丰富的四大会计师事务所资深审计合伙人，擅长通过财务数据洞察企业真实的经营状况和会计质量。你的任务是为“{company_name}”撰写一份专业的会计质量评估报告。
+
+    请严格按照以下三步进行分析，就像在准备审计委员会的汇报材料一样：
+    1.  **商业模式与关键会计估计的识别**: 
+        -   根据“营业收入”、“应收账款”和“存货”等数据的相对关系和变化趋势，推断该公司的核心商业模式是什么？(例如：是重资产的制造业，还是轻资产的服务业？是快速周转的零售业，还是项目周期长的工程业？)
+        -   对于这种商业模式，其最重要的会计估计是什么？(例如，对于游戏公司是虚拟道具收入的确认周期；对于制造业是存货跌价准备的计提；对于软件公司是收入确认的时点)。
+
+    2.  **会计政策稳健性与风险评估**:
+        -   **收入确认质量**: 对比“净利润”与“经营活动现金流”。是否存在“增收不增利”或“有利润没现金”的情况？这是否暗示了过于激进的收入确认政策？
+        -   **资产质量风险**: “应收账款”和“存货”的增长速度是否显著超过了“营业收入”的增速？这是否可能预示着回款困难或产品积压的风险？
+        -   结合以上分析，你认为该公司的会计政策是偏向“稳健保守”还是“激进冒险”？请说明理由。
+
+    3.  **综合结论**:
+        -   综合上述分析，对该公司的整体会计质量给出一个明确的结论。其财务报表是否能够“真实、准确地反映企业的经营现实”？财务数据是否具有可靠的可比性？
+
+    以下是你需要分析的核心数据（表格格式：首行为表头，列以 | 分隔，“-”表示缺失）：
+    ---
+    {full_summary}
+    ---
+    请直接输出你的专业评估报告，语言要严谨、客观，直指核心。
+    """
+
+# 会计分析关注的三大报表科目
+ACCOUNTING_METRICS = {
+    'n_income': '净利润',
+    'n_cashflow_act': '经营活动现金流净额',
+    'accounts_receiv': '应收账款',
+    'inventories': '存货',
+    'revenue': '营业收入'  # 新增营收，为AI提供更直接的对比基准
+}
+ACCOUNTING_HISTORY_DEPTH = 8
+# 前景分析快照表的指标（ROE 另附行业排名）
+PROSPECT_METRICS = ["roe", "debt_to_assets", "or_yoy"]
+
+_PROSPECT_TEMPLATE = """
+    你是一位经验丰富的基金经理和行业首席分析师。你的任务是结合我提供的【公司最新财务快照】和你自己知识库中的【宏观及行业趋势】，为选中的公司撰写一份**前景对比分析报告**。
+
+    你的报告需要包含：
+    1.  **短期展望 (1-2年)**: 基于公司最新的财务表现（如增长率、利润率），分析并对比它们近期的机遇和挑战。
+    2.  **长期展望 (3-5年)**: 结合它们的行业地位（可参考ROE排名）和你对行业变革、技术趋势的知识，分析并对比它们的长期增长潜力和护城河。
+    3.  **关键驱动与风险**: 对比指出各公司未来发展的核心驱动力及主要风险点。
+    4.  **综合投资评级**: 为每家公司给出一个明确的投资评级（例如：强烈看好、谨慎看好、中性、看淡），并附上一句核心的投资逻辑总结。
+
+    以下是【公司最新财务快照】（表格格式：首行为表头，列以 | 分隔，“-”表示缺失）：
+    ---
+    {data_summary}
+    ---
+    请基于这些数据锚点，并结合你的专业知识，开始你的分析。
+    """
+
+# 一键生成完整报告时，前景分析会附上前序环节（战略、财务）的结论；每份只取开头这么多字，控制提示词长度
+PRIOR_REPORT_CHARS = 1500
+
+_CROSS_INDUSTRY_TEMPLATE = """
+    你是一位顶尖的基金经理，正在评估一个由几家来自不同行业的公司组成的投资组合。你的任务是基于我提供的核心财务数据，撰写一份专业的**跨行业对比研判报告**。
+
+    你的分析必须体现出专业性，要认识到直接对比不同行业公司的财务指标需要非常谨慎。请聚焦于以下几个方面：
+    1.  **盈利能力与效率**: 谁的净利率最高？这是否反映了其独特的商业模式或品牌溢价？
+    2.  **成长性**: 谁的营收增长最快？这是否是可持续的？
+    3.  **财务健康度**: 对比它们的资产负债率。请务必结合它们的行业特性来评论这个指标的合理性（例如，金融行业的高负债率是正常的，而科技公司则通常较低）。
+    4.  **综合投资价值**: 结合以上所有信息，从一个寻求“核心资产”的投资者角度出发，你会更青睐哪家公司？请给出一个明确的排序或选择，并提供你的核心投资逻辑。
+
+    以下是你需要分析的几家公司的最新数据（表格格式：首行为表头，列以 | 分隔，“-”表示缺失）：
+    ---
+    {full_summary}
+    ---
+    请直接输出你的专业分析报告，展现出你对不同商业模式的深刻理解。
+    """
+
+CROSS_INDUSTRY_METRICS = {
+    'netprofit_margin': '净利率 (%)',
+    'or_yoy': '营收同比 (%)',
+    'debt_to_assets': '资产负-债率 (%)'
+}
+
+
+def build_strategy_prompt(industry: str, company_names_str: str) -> str:
+    """行业内多家公司的战略对比（PEST / 波特五力 / SWOT）提示词"""
+    return _STRATEGY_TEMPLATE.format(industry=industry, company_names_str=company_names_str)
+
+
+def build_accounting_prompt(company_name: str, code: str, accounting_df: pd.DataFrame) -> str:
+    """单公司会计质量评估提示词，accounting_df 为 fetch_accounting_data() 的结果"""
+    # 整列缺失的科目单独注明，不占表格列
+    available = {metric: label for metric, label in ACCOUNTING_METRICS.items()
+                 if metric in accounting_df.columns and not accounting_df[metric].isnull().all()}
+    missing = [label for metric, label in ACCOUNTING_METRICS.items() if metric not in available]
+    history = HistoryTables(accounting_df, [code], available, ACCOUNTING_HISTORY_DEPTH, scale=YI)
+
+    def build(depth):
+        summary = (f"公司: {company_name} ({code})\n三大报表核心数据 (近{depth}个季度，单位：亿元):\n"
+                   + history.render(code, depth))
+        if missing:
+            summary += "\n数据缺失: " + "、".join(missing)
+        return summary
+
+    return _ACCOUNTING_TEMPLATE.format(company_name=company_name, full_summary=fit_to_budget(build, ACCOUNTING_HISTORY_DEPTH))
+
+
+def build_prospect_prompt(codes: list, code_to_name: dict, selected_data: pd.DataFrame,
+                          rankings: pd.DataFrame, prior_reports: dict = None) -> str:
+    """
+    行业内多家公司的前景对比提示词（基于最新一期财务快照）。
+    prior_reports 为 {环节名称: 报告文本}，提供时附在提示词末尾，供AI参考前序分析的结论。
+    """
+    snapshot = latest_values(selected_data, codes, PROSPECT_METRICS).reindex(columns=PROSPECT_METRICS, fill_value="-")
+    # 从行业排名表读取ROE排名
+    roe_ranks = rank_labels(rankings, list(snapshot.index), ["roe"])["roe"]
+    rows = [[f"{code_to_name.get(code, code)}({code})", roe, roe_rank, debt, growth]
+            for code, (roe, debt, growth), roe_rank in zip(snapshot.index, snapshot.to_numpy(), roe_ranks)]
+    data_summary = encode_table(["公司", "ROE(%)", "ROE行业排名", "资产负债率(%)", "营收同比(%)"], rows) if rows else ""
+
+    prompt = _PROSPECT_TEMPLATE.format(data_summary=data_summary)
+    if prior_reports:
+        sections = [f"【{label}】\n{text[:PRIOR_REPORT_CHARS]}" for label, text in prior_reports.items() if text]
+        prompt += "\n    以下是本行业前序分析环节的结论摘要（哈佛分析框架：战略 → 会计 → 财务 → 前景），请在展望时与之保持一致：\n    ---\n"
+        prompt += "\n\n".join(sections) + "\n    ---\n"
+    return prompt
+
+
+def build_cross_industry_prompt(codes: list, code_to_name: dict, code_to_industry: dict,
+                                historical_df: pd.DataFrame) -> str:
+    """跨行业综合研判提示词（各公司最新一期的核心指标）"""
+    metrics = list(CROSS_INDUSTRY_METRICS)
+    latest = latest_values(historical_df, codes, metrics, first=False).reindex(index=codes, columns=metrics).fillna("-")
+    rows = [[f"{code_to_name.get(code, code)}({code})", code_to_industry.get(code, "")] + list(values)
+            for code, values in zip(latest.index, latest.to_numpy())]
+    full_summary = encode_table(["公司", "行业"] + [f"最新{label}" for label in CROSS_INDUSTRY_METRICS.values()], rows)
+    return _CROSS_INDUSTRY_TEMPLATE.format(full_summary=full_summary)
@@ -0,0 +1,160 @@
+from bisect import bisect_right
+from collections import Counter
+
+import pandas as pd
+
+# 名称 n-gram 命中比例低于该分数的结果不返回（与原 thefuzz 路径的阈值 75 对应）
+MIN_SCORE = 75
+DEFAULT_TOP_K = 20
+
+
+def _ngrams(text: str) -> list:
+    """单字 + 相邻双字，中文名称很短，这两种就足够区分"""
+    grams = list(text)
+    grams += [text[i:i + 2] for i in range(len(text) - 1)]
+    return grams
+
+
+class _PrefixTrie:
+    """代码前缀树：每个节点记录经过它的所有条目下标，前缀查询是 O(前缀长度)。"""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, key: str, item_id: int) -> None:
+        node = self.root
+        for ch in key:
+            node = node.setdefault(ch, {})
+            node.setdefault("$ids", []).append(item_id)
+
+    def lookup(self, prefix: str) -> list:
+        node = self.root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return []
+        return node.get("$ids", [])
+
+
+class _SubstringScanner:
+    """把所有字符串用分隔符拼成一整段，子串查找交给 str.find（C 实现），再按偏移量换算回下标。"""
+
+    def __init__(self, strings: list):
+        self.text = "\n".join(strings)
+        self.offsets = []
+        position = 0
+        for string in strings:
+            self.offsets.append(position)
+            position += len(string) + 1
+
+    def find(self, query: str) -> list:
+        item_ids = []
+        start = self.text.find(query)
+        while start != -1:
+            item_id = bisect_right(self.offsets, start) - 1
+            item_ids.append(item_id)
+            # 跳到下一条，避免同一条记录重复命中
+            next_offset = self.offsets[item_id + 1] if item_id + 1 < len(self.offsets) else len(self.text)
+            start = self.text.find(query, next_offset)
+        return item_ids
+
+
+class StockSearchIndex:
+    """
+    侧边栏公司搜索的预计算索引，由 lookup_stock_basic() 的结果一次性构建。
+
+    支持：
+    - 股票代码前缀（"600519"、"600519.sh"）
+    - 名称子串 / 字符 n-gram 模糊匹配（“中石油”也能命中“中国石油”）
+    - 拼音全拼与首字母（"zhongguopingan"、"zgpa"）
+    search() 返回按得分排序的 [(ts_code, name, score)]。
+    """
+
+    def __init__(self, basic_df: pd.DataFrame):
+        self.codes = basic_df["ts_code"].astype(str).tolist()
+        self.names = basic_df["name"].astype(str).tolist()
+        self.names_lower = [name.lower() for name in self.names]
+
+        # pypinyin 的词典较大，构建索引时才导入
+        from pypinyin import lazy_pinyin, Style
+
+        self.pinyin_full = []
+        self.pinyin_initials = []
+        for name in self.names:
+            syllables = lazy_pinyin(name)
+            initials = lazy_pinyin(name, style=Style.FIRST_LETTER)
+            self.pinyin_full.append("".join(syllables).lower())
+            self.pinyin_initials.append("".join(initials).lower())
+
+        self.gram_postings = {}
+        for item_id, name in enumerate(self.names_lower):
+            for gram in set(_ngrams(name)):
+                self.gram_postings.setdefault(gram, []).append(item_id)
+
+        self.code_trie = _PrefixTrie()
+        self.initials_trie = _PrefixTrie()
+        self.full_pinyin_trie = _PrefixTrie()
+        for item_id, code in enumerate(self.codes):
+            self.code_trie.insert(code.lower(), item_id)
+            self.initials_trie.insert(self.pinyin_initials[item_id], item_id)
+            self.full_pinyin_trie.insert(self.pinyin_full[item_id], item_id)
+
+        self.code_scanner = _SubstringScanner(self.codes)
+        self.initials_scanner = _SubstringScanner(self.pinyin_initials)
+        self.full_pinyin_scanner = _SubstringScanner(self.pinyin_full)
+
+    def _score_names(self, query: str) -> dict:
+        """按 n-gram 命中比例打分；整段子串命中记满分"""
+        query_grams = _ngrams(query)
+        hits = Counter()
+        for gram in set(query_grams):
+            for item_id in self.gram_postings.get(gram, ()):
+                hits[item_id] += query_grams.count(gram)
+        scores = {}
+        for item_id, matched in hits.items():
+            if query in self.names_lower[item_id]:
+                scores[item_id] = 100
+            else:
+                score = int(100 * matched / len(query_grams))
+                if score >= MIN_SCORE:
+                    scores[item_id] = score
+        return scores
+
+    def _score_pinyin(self, query: str) -> dict:
+        """拼音打分：首字母前缀 > 全拼前缀 > 首字母子串 > 全拼子串"""
+        scores = {}
+
+        def bump(item_ids, score):
+            for item_id in item_ids:
+                if scores.get(item_id, 0) < score:
+                    scores[item_id] = score
+
+        bump(self.initials_trie.lookup(query), 98)
+        if len(query) >= 2:
+            bump(self.full_pinyin_trie.lookup(query), 96)
+            bump(self.initials_scanner.find(query), 90)
+        if len(query) >= 4:
+            bump(self.full_pinyin_scanner.find(query), 85)
+        return scores
+
+    def search(self, query: str, top_k: int = DEFAULT_TOP_K) -> list:
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        scores = {}
+        for item_id in self.code_trie.lookup(query):
+            scores[item_id] = 100
+        if query.isdigit() and len(query) >= 3:
+            # 代码中段匹配（如 "519" -> 600519.SH），排在前缀匹配之后
+            for item_id in self.code_scanner.find(query):
+                scores.setdefault(item_id, 80)
+        for item_id, score in self._score_names(query).items():
+            scores[item_id] = max(scores.get(item_id, 0), score)
+        if query.isascii() and query.isalpha():
+            for item_id, score in self._score_pinyin(query).items():
+                scores[item_id] = max(scores.get(item_id, 0), score)
+
+        # 同分时名称越短越相关，再按代码保证顺序稳定
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], len(self.names[kv[0]]), self.codes[kv[0]]))
+        return [(self.codes[i], self.names[i], score) for i, score in ranked[:top_k]]
@@ -0,0 +1,168 @@
+import time
+import functools
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+
+from telemetry import telemetry
+
+# 仓库最多保存的条目数，超出时淘汰最久未访问的条目（键里带有公司代码和年份区间，数量会随使用不断增加）
+SHARED_MAX_ENTRIES = 1024
+# 空结果（公司没有这类数据、行业探测不到报告期等）也缓存，但只保留较短时间，之后重新确认
+EMPTY_RESULT_TTL = 300
+
+
+def freeze_frame(df: pd.DataFrame):
+    """
+    生成共享数据：转成不可变的 pyarrow.Table（一次性拷贝），之后任何会话都改不到这份数据。
+    浮点列的 NaN 按数值保存而不是转成 Arrow 的 null，这样 share_frame 取出时不需要再拷贝一份填充 NaN。
+    Arrow 无法表示的表（混合类型的 object 列、重复列名等）退回为保存一份私有拷贝。
+    """
+    try:
+        table = pa.Table.from_pandas(df)
+    except (pa.ArrowException, TypeError, ValueError):
+        return df.copy()
+    # from_pandas 按 DataFrame 的列顺序排列数据列，索引列（如有）排在最后
+    for position, dtype in enumerate(df.dtypes):
+        if dtype.kind == "f" and table.column(position).null_count:
+            values = pa.array(df.iloc[:, position].to_numpy(), from_pandas=False)
+            table = table.set_column(position, table.field(position), values)
+    return table
+
+
+def share_frame(frozen) -> pd.DataFrame:
+    """
+    从共享数据取出一份 DataFrame（与原表的列、dtype 和索引一致），无论怎样修改都改不到共享数据本身：
+    - 数值列和 category 列直接引用 Arrow 缓冲区（零拷贝、只读），原地赋值（.loc/.iloc/.values[...] = ...）
+      抛出 ValueError；没有缺失值的日期列同样零拷贝只读，但 pandas 在这里抛出的是内部的 AssertionError；
+    - Arrow 字符串列（string[pyarrow]）的包装对象每次新建，object 列、含缺失值的日期列每次转换出新数组，
+      这些列的原地赋值可以成功，只改到调用方自己的副本；
+    - 新增/替换整列、sort_values(inplace=True)、drop(inplace=True) 等替换调用方内部数据的操作都可以正常使用。
+    退回为私有拷贝的表每次命中复制一份，可以随意修改。
+    """
+    if isinstance(frozen, pd.DataFrame):
+        return frozen.copy()
+    # 表的 pandas 元数据只记录了“string”，按 pyarrow 存储还原，保持 compact_frame 的 string[pyarrow]
+    with pd.option_context("mode.string_storage", "pyarrow"):
+        return frozen.to_pandas(split_blocks=True)
+
+
+def _frozen_bytes(frozen) -> int:
+    if isinstance(frozen, pd.DataFrame):
+        return int(frozen.memory_usage(index=True, deep=True).sum())
+    return frozen.nbytes
+
+
+class SharedFrameStore:
+    """
+    进程内所有会话共享的只读 DataFrame 仓库，替代 st.cache_data 的“每次命中都反序列化一份新副本”：
+    - 每个键只保存一份不可变的 pyarrow.Table（freeze_frame），命中时转回 DataFrame（share_frame）：
+      数值列直接引用 Arrow 缓冲区，不拷贝数据；
+    - 调用方拿到的 DataFrame 怎么改都不会影响共享数据（哪些原地修改会报错见 share_frame）；
+    - 每个键各有一把锁，同一份数据并发未命中时只加载一次；
+    - 条目超过 ttl 秒后重新加载（通常回落到磁盘缓存层），过期条目和它的锁在访问时删除；
+      空 DataFrame 同样缓存，有效期取 ttl 与 EMPTY_RESULT_TTL 中较短的一个；
+    - 条目数超过 max_entries 时按最近最少使用（LRU）淘汰。
+    """
+
+    def __init__(self, max_entries: int = SHARED_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _drop(self, key) -> None:
+        """删除条目；没有线程持有的锁一并删除（调用方持有 _guard）"""
+        self._entries.pop(key, None)
+        lock = self._locks.get(key)
+        if lock is not None and not lock.locked():
+            del self._locks[key]
+
+    def _fresh(self, key):
+        with self._guard:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _store(self, key, frame, ttl: float) -> None:
+        with self._guard:
+            self._entries[key] = (frame, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            now = time.monotonic()
+            for stale in [k for k, (_, expires) in self._entries.items() if expires <= now]:
+                self._drop(stale)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def get(self, key, loader, ttl: float, name: str = "shared") -> pd.DataFrame:
+        started = time.perf_counter()
+        frame = self._fresh(key)
+        if frame is None:
+            with self._lock_for(key):
+                frame = self._fresh(key)
+                if frame is None:
+                    df = loader()
+                    # 只共享 DataFrame，其他类型的结果原样返回、不缓存
+                    if not isinstance(df, pd.DataFrame):
+                        telemetry.record("cache", f"shared:{name}", time.perf_counter() - started, cache="miss")
+                        with self._guard:
+                            self._locks.pop(key, None)
+                        return df
+                    frame = freeze_frame(df)
+                    self._store(key, frame, min(ttl, EMPTY_RESULT_TTL) if df.empty else ttl)
+                    telemetry.record("cache", f"shared:{name}", time.perf_counter() - started,
+                                     rows=len(frame), cache="miss")
+                    return share_frame(frame)
+        telemetry.record("cache", f"shared:{name}", time.perf_counter() - started, rows=len(frame), cache="hit")
+        return share_frame(frame)
+
+    def clear(self) -> None:
+        with self._guard:
+            self._entries.clear()
+            self._locks = {key: lock for key, lock in self._locks.items() if lock.locked()}
+
+    def stats(self) -> dict:
+        """entries / rows / bytes（共享数据的实际内存，只算一份）"""
+        with self._guard:
+            entries = [entry[0] for entry in self._entries.values()]
+        return {
+            "entries": len(entries),
+            "rows": sum(len(frozen) for frozen in entries),
+            "bytes": sum(_frozen_bytes(frozen) for frozen in entries),
+        }
+
+
+# 整个进程共享的仓库
+shared_store = SharedFrameStore()
+
+
+def shared_cache(ttl: float, spinner: str = None):
+    """
+    装饰器：用法与 @st.cache_data 相同（参数需可哈希），结果放进 shared_store。
+    spinner 不为空时，未命中加载期间显示加载提示。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+
+            def load():
+                if spinner is None:
+                    return func(*args, **kwargs)
+                import streamlit as st
+                with st.spinner(spinner):
+                    return func(*args, **kwargs)
+            return shared_store.get(key, load, ttl, name=func.__name__)
+        return wrapper
+    return decorator
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from collections import OrderedDict, defaultdict, deque
+
+logger = logging.getLogger(__name__)
+
+# 保留在内存里的最近事件数（用于导出 JSON lines）和最近几次页面运行的统计
+MAX_EVENTS = 5000
+MAX_RUNS = 20
+# 设置后每个事件都会追加写入这个 JSON lines 文件，便于长期收集
+TELEMETRY_LOG_PATH = os.environ.get("FINANCE_TELEMETRY_LOG")
+METRIC_PREFIX = "finance"
+
+# 当前页面运行 / 页面区块；fan_out 的工作线程会复制调用方的上下文，事件能归到发起它的那次运行
+_current_run = contextvars.ContextVar("telemetry_run", default=None)
+_current_section = contextvars.ContextVar("telemetry_section", default="")
+
+_AGGREGATE_FIELDS = ("calls", "errors", "duration_s", "rows", "bytes", "retries", "wait_s", "hits", "misses")
+# Prometheus 指标名 -> (聚合字段, 说明)
+_PROMETHEUS_METRICS = {
+    "calls_total": ("calls", "调用次数"),
+    "errors_total": ("errors", "失败次数"),
+    "duration_seconds_total": ("duration_s", "累计耗时（秒）"),
+    "rows_total": ("rows", "返回行数"),
+    "bytes_total": ("bytes", "返回字节数"),
+    "retries_total": ("retries", "重试次数"),
+    "wait_seconds_total": ("wait_s", "限流排队与退避等待（秒）"),
+    "cache_hits_total": ("hits", "缓存命中次数"),
+    "cache_misses_total": ("misses", "缓存未命中次数"),
+}
+
+
+def frame_size(df) -> tuple:
+    """DataFrame 的 (行数, 字节数)；不是 DataFrame 时返回 (0, 0)"""
+    if df is None or not hasattr(df, "memory_usage"):
+        return 0, 0
+    return len(df), int(df.memory_usage(index=False, deep=True).sum())
+
+
+def _empty_aggregate() -> dict:
+    return dict.fromkeys(_AGGREGATE_FIELDS, 0)
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Telemetry:
+    """
+    上游调用与缓存的埋点：
+    - record(kind, name, ...)：记录一次事件，kind 为 tushare / gemini / cache，name 为接口名或缓存名；
+    - 同时按进程和按页面运行（start_run 开始，set_section 标记页面区块）聚合；
+    - export_jsonl() / prometheus_text() 导出最近的事件和进程累计指标。
+    """
+
+    def __init__(self, max_events: int = MAX_EVENTS, max_runs: int = MAX_RUNS, log_path: str = TELEMETRY_LOG_PATH):
+        self.log_path = log_path
+        self.max_runs = max_runs
+        self._events = deque(maxlen=max_events)
+        self._process = defaultdict(_empty_aggregate)
+        self._runs = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---- 运行与区块 ----
+
+    def start_run(self, label: str = "") -> str:
+        """每次页面脚本运行开始时调用，之后本线程（及 fan_out 派生的线程）的事件都归到这次运行"""
+        run_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._runs[run_id] = {"label": label, "started_at": time.time(), "stats": defaultdict(_empty_aggregate)}
+            while len(self._runs) > self.max_runs:
+                self._runs.popitem(last=False)
+        _current_run.set(run_id)
+        _current_section.set("")
+        return run_id
+
+    def set_section(self, section: str) -> None:
+        """标记当前所在的页面区块（例如“股价概览”、“行业:银行/财务分析”），直到下一次调用"""
+        _current_section.set(section)
+
+    def scope(self) -> tuple:
+        """当前的 (运行, 区块)；在其他线程里记录事件时（例如AI后台事件循环）显式传回 record"""
+        return _current_run.get(), _current_section.get()
+
+    # ---- 记录 ----
+
+    def record(self, kind: str, name: str, duration: float = 0.0, rows: int = 0, bytes: int = 0,
+               cache: str = None, retries: int = 0, wait: float = 0.0, error: bool = False, scope: tuple = None) -> None:
+        run_id, section = scope or self.scope()
+        event = {
+            "ts": round(time.time(), 3), "run": run_id, "section": section, "kind": kind, "name": name,
+            "duration_s": round(duration, 6), "rows": rows, "bytes": bytes, "cache": cache,
+            "retries": retries, "wait_s": round(wait, 6), "error": error,
+        }
+        deltas = {
+            "calls": 1, "errors": int(error), "duration_s": duration, "rows": rows, "bytes": bytes,
+            "retries": retries, "wait_s": wait, "hits": int(cache == "hit"), "misses": int(cache == "miss"),
+        }
+        with self._lock:
+            self._events.append(event)
+            targets = [self._process[(kind, name)]]
+            run = self._runs.get(run_id)
+            if run is not None:
+                targets.append(run["stats"][(section, kind, name)])
+            for aggregate in targets:
+                for field, value in deltas.items():
+                    aggregate[field] += value
+            if self.log_path:
+                try:
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+                except OSError as e:
+                    logger.warning("写入事件日志失败: %s", e)
+
+    # ---- 查询与导出 ----
+
+    def process_summary(self) -> list:
+        """进程启动以来按 (kind, name) 的累计统计"""
+        with self._lock:
+            return [{"kind": kind, "name": name, **aggregate} for (kind, name), aggregate in sorted(self._process.items())]
+
+    def recent_runs(self) -> list:
+        """最近的页面运行（新到旧）：run / label / started_at / calls / duration_s"""
+        with self._lock:
+            runs = [{
+                "run": run_id, "label": run["label"], "started_at": run["started_at"],
+                "calls": sum(a["calls"] for a in run["stats"].values()),
+                "duration_s": sum(a["duration_s"] for a in run["stats"].values()),
+            } for run_id, run in self._runs.items()]
+        return runs[::-1]
+
+    def run_summary(self, run_id: str = None) -> list:
+        """某次页面运行（默认当前运行）按 (区块, kind, name) 的统计"""
+        run_id = run_id or _current_run.get()
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is None:
+                return []
+            return [{"section": section, "kind": kind, "name": name, **aggregate}
+                    for (section, kind, name), aggregate in sorted(run["stats"].items())]
+
+    def export_jsonl(self) -> str:
+        with self._lock:
+            events = list(self._events)
+        return "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+
+    def prometheus_text(self) -> str:
+        """Prometheus 文本格式（进程累计计数器）"""
+        summary = self.process_summary()
+        lines = []
+        for metric, (field, help_text) in _PROMETHEUS_METRICS.items():
+            full_name = f"{METRIC_PREFIX}_{metric}"
+            lines += [f"# HELP {full_name} {help_text}", f"# TYPE {full_name} counter"]
+            for row in summary:
+                labels = f'kind="{_escape_label(row["kind"])}",name="{_escape_label(row["name"])}"'
+                lines.append(f"{full_name}{{{labels}}} {row[field]:g}")
+        return "\n".join(lines) + "\n"
+
+
+# 整个进程共享的埋点实例
+telemetry = Telemetry()
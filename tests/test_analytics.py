@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import adjust_prices
+
+
+def reference_adjust(prices: pd.DataFrame, factors: pd.DataFrame, mode: str) -> pd.Series:
+    """逐步用 pandas 写出的参考实现：按股票 as-of 匹配因子，之前没有因子时取之后最近的"""
+    left = prices.reset_index(names="row").sort_values("trade_date")
+    right = factors.sort_values("trade_date")
+    backward = pd.merge_asof(left, right, on="trade_date", by="ts_code", direction="backward")
+    forward = pd.merge_asof(left, right, on="trade_date", by="ts_code", direction="forward")
+    merged = backward.set_index("row").sort_index()
+    factor = merged["adj_factor"].fillna(forward.set_index("row").sort_index()["adj_factor"])
+    if mode == "qfq":
+        latest = merged.assign(factor=factor).sort_values("trade_date").groupby("ts_code")["factor"].transform("last")
+        factor = factor / latest
+    return (merged["close"] * factor.fillna(1.0)).rename("close")
+
+
+@pytest.fixture
+def sample():
+    rng = np.random.default_rng(7)
+    days = pd.bdate_range("2020-01-01", "2021-12-31")
+    prices, factors = [], []
+    for code in ["600519.SH", "000001.SZ", "300750.SZ", "688981.SH"]:
+        traded = days[rng.random(len(days)) > 0.05]          # 随机停牌
+        prices.append(pd.DataFrame({"ts_code": code, "trade_date": traded,
+                                    "close": rng.uniform(5, 50, len(traded))}))
+        if code == "688981.SH":
+            continue                                          # 完全没有因子
+        start = 30 if code == "300750.SZ" else 0              # 区间开头缺因子
+        dated = traded[start:][rng.random(len(traded) - start) > 0.2]
+        steps = np.where(rng.random(len(dated)) < 0.02, rng.uniform(1.01, 1.2, len(dated)), 1.0)
+        factors.append(pd.DataFrame({"ts_code": code, "trade_date": dated, "adj_factor": np.cumprod(steps)}))
+    # 输入顺序不影响结果
+    prices = pd.concat(prices, ignore_index=True).sample(frac=1, random_state=1).reset_index(drop=True)
+    factors = pd.concat(factors, ignore_index=True).sample(frac=1, random_state=2).reset_index(drop=True)
+    return prices, factors
+
+
+@pytest.mark.parametrize("mode", ["qfq", "hfq"])
+def test_adjust_prices_matches_reference(sample, mode):
+    prices, factors = sample
+    adjusted = adjust_prices(prices, factors, mode)
+    pd.testing.assert_series_equal(adjusted["close"], reference_adjust(prices, factors, mode),
+                                   check_names=False, check_index_type=False)
+    pd.testing.assert_frame_equal(adjusted.drop(columns="close"), prices.drop(columns="close"))
+
+
+def test_qfq_keeps_latest_close_and_no_factor_stocks(sample):
+    prices, factors = sample
+    adjusted = adjust_prices(prices, factors, "qfq")
+    latest = prices.groupby("ts_code")["trade_date"].idxmax()
+    np.testing.assert_allclose(adjusted.loc[latest, "close"], prices.loc[latest, "close"])
+    untouched = prices["ts_code"] == "688981.SH"
+    np.testing.assert_array_equal(adjusted.loc[untouched, "close"], prices.loc[untouched, "close"])
+
+
+def test_none_mode_returns_prices_unchanged(sample):
+    prices, factors = sample
+    assert adjust_prices(prices, factors, "none") is prices
+    assert adjust_prices(prices, factors.iloc[0:0], "hfq") is prices
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+import cache_store
+from cache_store import MARKET_TZ, expire_after_close, expire_daily, expire_on_disclosure, persistent_cache
+
+
+def at(text: str) -> pd.Timestamp:
+    return pd.Timestamp(text, tz=MARKET_TZ)
+
+
+def test_expire_daily_at_next_midnight():
+    assert expire_daily(at("2024-03-05 09:30")) == at("2024-03-06")
+    assert expire_daily(at("2024-12-31 23:59")) == at("2025-01-01")
+
+
+@pytest.mark.parametrize("written, expected", [
+    ("2024-03-05 09:30", "2024-03-05 17:00"),   # 当天收盘数据尚未入库
+    ("2024-03-05 17:00", "2024-03-06 17:00"),
+    ("2024-03-05 20:00", "2024-03-06 17:00"),
+])
+def test_expire_after_close(written, expected):
+    assert expire_after_close(at(written)) == at(expected)
+
+
+@pytest.mark.parametrize("written, expected", [
+    # 披露窗口内按天过期（年报+一季报 / 半年报 / 三季报）
+    ("2024-01-02 10:00", "2024-01-03"),
+    ("2024-04-30 23:00", "2024-05-01"),
+    ("2024-08-31 12:00", "2024-09-01"),
+    ("2024-10-15 12:00", "2024-10-16"),
+    # 窗口之间一直有效到下一个窗口开始
+    ("2024-05-01 00:00", "2024-07-01"),
+    ("2024-09-10 12:00", "2024-10-01"),
+    # 当年最后一个窗口之后等到明年年初
+    ("2024-11-01 00:00", "2025-01-01"),
+])
+def test_expire_on_disclosure(written, expected):
+    assert expire_on_disclosure(at(written)) == at(expected)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_store, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def make_fetcher(result):
+    calls = []
+
+    @persistent_cache("test_dataset", ttl="daily")
+    def fetch(code: str) -> pd.DataFrame:
+        calls.append(code)
+        return result.copy()
+    return fetch, calls
+
+
+def test_persistent_cache_reuses_disk_until_expiry(cache_dir, monkeypatch):
+    frame = pd.DataFrame({"ts_code": ["600519.SH"], "roe": [31.25]})
+    fetch, calls = make_fetcher(frame)
+    monkeypatch.setattr(cache_store, "_now", lambda: at("2024-03-05 10:00"))
+
+    first = fetch("600519.SH")
+    second = fetch("600519.SH")
+    assert calls == ["600519.SH"]
+    pd.testing.assert_frame_equal(second, first)
+    assert list((cache_dir / "test_dataset").glob("*.parquet"))
+
+    # "daily" 策略在次日零点过期，之后重新请求上游
+    monkeypatch.setattr(cache_store, "_now", lambda: at("2024-03-06 00:00"))
+    fetch("600519.SH")
+    assert calls == ["600519.SH", "600519.SH"]
+
+
+def test_persistent_cache_does_not_store_empty_results(cache_dir, monkeypatch):
+    fetch, calls = make_fetcher(pd.DataFrame())
+    monkeypatch.setattr(cache_store, "_now", lambda: at("2024-03-05 10:00"))
+
+    assert fetch("000001.SZ").empty
+    assert fetch("000001.SZ").empty
+    assert calls == ["000001.SZ", "000001.SZ"]
+    assert not (cache_dir / "test_dataset").exists()
@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+
+import price_store
+from cache_store import MARKET_TZ
+from price_store import DailySeriesStore, merge_intervals, missing_intervals
+
+
+def test_merge_intervals_joins_overlapping_and_adjacent_days():
+    merged = merge_intervals([["20240110", "20240120"], ["20240101", "20240105"], ["20240106", "20240108"]])
+    assert merged == [["20240101", "20240108"], ["20240110", "20240120"]]
+
+
+@pytest.mark.parametrize("covered, expected", [
+    ([], [["20240101", "20240131"]]),
+    ([["20240101", "20240131"]], []),
+    ([["20231201", "20240310"]], []),
+    ([["20240110", "20240120"]], [["20240101", "20240109"], ["20240121", "20240131"]]),
+    ([["20240101", "20240105"], ["20240106", "20240110"], ["20240120", "20240125"]],
+     [["20240111", "20240119"], ["20240126", "20240131"]]),
+])
+def test_missing_intervals(covered, expected):
+    assert missing_intervals("20240101", "20240131", covered) == expected
+
+
+def fake_daily(suspended_from: str = None):
+    """工作日都有行情，suspended_from 之后停牌（返回空）；记录每次请求的区间"""
+    calls = []
+
+    def fetch(ts_code, start_date, end_date):
+        calls.append((start_date, end_date))
+        days = pd.bdate_range(start_date, end_date).strftime("%Y%m%d")
+        if suspended_from:
+            days = days[days < suspended_from]
+        return pd.DataFrame({"trade_date": days, "close": 10.0})
+    return fetch, calls
+
+
+@pytest.fixture
+def make_store(tmp_path, monkeypatch):
+    def make(fetch, now: str):
+        monkeypatch.setattr(price_store, "_now", lambda: pd.Timestamp(now, tz=MARKET_TZ))
+        store = DailySeriesStore("daily_test", fetch)
+        store.root = str(tmp_path)
+        return store
+    return make
+
+
+def test_only_missing_intervals_are_fetched(make_store):
+    fetch, calls = fake_daily()
+    store = make_store(fetch, "2024-06-20 18:00")
+
+    store.get("600519.SH", "20240603", "20240607")
+    result = store.get("600519.SH", "20240601", "20240614")
+    assert calls == [("20240603", "20240607"), ("20240601", "20240602"), ("20240608", "20240614")]
+    assert result["trade_date"].tolist() == pd.bdate_range("20240603", "20240614").strftime("%Y%m%d").tolist()
+
+    store.get("600519.SH", "20240605", "20240612")
+    assert len(calls) == 3
+
+
+def test_unsettled_today_is_fetched_again(make_store, monkeypatch):
+    fetch, calls = fake_daily()
+    # 17 点前当天的日线尚未入库，只有到昨天为止的区间记为已覆盖
+    store = make_store(fetch, "2024-06-14 10:00")
+
+    store.get("600519.SH", "20240610", "20240614")
+    store.get("600519.SH", "20240610", "20240614")
+    assert calls == [("20240610", "20240614"), ("20240614", "20240614")]
+
+    # 请求区间超过今天时只取到今天
+    store.get("600519.SH", "20240610", "20240630")
+    assert calls[-1] == ("20240614", "20240614")
+
+    # 收盘数据入库后再补一次，之后当天也算已覆盖
+    monkeypatch.setattr(price_store, "_now", lambda: pd.Timestamp("2024-06-14 18:00", tz=MARKET_TZ))
+    store.get("600519.SH", "20240610", "20240614")
+    store.get("600519.SH", "20240610", "20240614")
+    assert len(calls) == 4 and calls[-1] == ("20240614", "20240614")
+
+
+def test_empty_gap_fetch_is_recorded_as_covered(make_store):
+    # 6 月 6 日起停牌：之后的区间请求返回空，也要记为已覆盖，不再反复请求
+    fetch, calls = fake_daily(suspended_from="20240606")
+    store = make_store(fetch, "2024-06-20 18:00")
+
+    first = store.get("600519.SH", "20240603", "20240612")
+    second = store.get("600519.SH", "20240603", "20240612")
+    assert calls == [("20240603", "20240612")]
+    assert first["trade_date"].max() == "20240605"
+    pd.testing.assert_frame_equal(second, first)
+
+    store.get("600519.SH", "20240603", "20240614")
+    assert calls[-1] == ("20240613", "20240614")
+
+
+def test_fully_empty_fetch_is_recorded_as_covered(make_store):
+    # 整个窗口都停牌（或只有非交易日）：上游没有返回任何行，也不能在下次访问时重新请求
+    fetch, calls = fake_daily(suspended_from="20240101")
+    store = make_store(fetch, "2024-06-20 18:00")
+
+    assert store.get("600519.SH", "20240603", "20240612").empty
+    assert store.get("600519.SH", "20240603", "20240612").empty
+    assert calls == [("20240603", "20240612")]
+
+    # 之后复牌，新的区间照常补齐并与空的历史合并
+    fetch_resumed, resumed_calls = fake_daily()
+    store.fetch_func = fetch_resumed
+    result = store.get("600519.SH", "20240603", "20240614")
+    assert resumed_calls == [("20240613", "20240614")]
+    assert result["trade_date"].tolist() == ["20240613", "20240614"]
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import shared_store
+from shared_store import EMPTY_RESULT_TTL, SharedFrameStore, freeze_frame, share_frame
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "ts_code": pd.array(["600519.SH", "000001.SZ", None], dtype="string[pyarrow]"),
+        "industry": pd.Categorical(["白酒", "银行", "白酒"]),
+        "trade_date": pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04"]),
+        "close": [1700.5, np.nan, 10.25],
+        "roe": np.array([30.1, 9.5, np.nan], dtype="float32"),
+        "volume": np.array([100, 200, 300], dtype="int32"),
+        "note": ["a", None, "c"],
+    }, index=pd.Index([3, 1, 2], name="row"))
+
+
+def test_round_trip_keeps_columns_dtypes_and_index(frame):
+    frozen = freeze_frame(frame)
+    assert isinstance(frozen, pa.Table)
+    # NaN 按数值保存，取出时不需要再拷贝
+    assert frozen.column("close").null_count == 0
+    pd.testing.assert_frame_equal(share_frame(frozen), frame)
+
+
+@pytest.mark.parametrize("column, value", [
+    ("ts_code", "300750.SZ"), ("industry", "银行"), ("close", 1.0), ("roe", 1.0),
+    ("volume", 1), ("note", "z"), ("trade_date", pd.Timestamp("2020-01-01")),
+])
+def test_in_place_writes_never_reach_shared_data(frame, column, value):
+    frozen = freeze_frame(frame)
+    view = share_frame(frozen)
+    try:
+        view.loc[3, column] = value
+    except (ValueError, AssertionError):
+        pass
+    view.sort_values("close", inplace=True)
+    view["close"] = 0.0
+    pd.testing.assert_frame_equal(share_frame(frozen), frame)
+
+
+def test_numeric_columns_are_read_only_views(frame):
+    view = share_frame(freeze_frame(frame))
+    with pytest.raises(ValueError):
+        view.loc[3, "close"] = 1.0
+    with pytest.raises(ValueError):
+        view["volume"].to_numpy()[0] = 1
+
+
+@pytest.mark.parametrize("odd", [
+    pd.DataFrame({"mixed": [1, "x"]}),
+    pd.DataFrame([[1, 2]], columns=["a", "a"]),
+])
+def test_frames_arrow_cannot_hold_fall_back_to_private_copies(odd):
+    frozen = freeze_frame(odd)
+    assert isinstance(frozen, pd.DataFrame)
+    view = share_frame(frozen)
+    view.iloc[0, 0] = 99
+    pd.testing.assert_frame_equal(share_frame(frozen), odd)
+
+
+def test_store_loads_once_and_keeps_empty_results_briefly(frame, monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(shared_store.time, "monotonic", lambda: clock[0])
+    store = SharedFrameStore(max_entries=2)
+    calls = []
+
+    def loader(result):
+        def load():
+            calls.append(len(result))
+            return result
+        return load
+
+    pd.testing.assert_frame_equal(store.get("full", loader(frame), ttl=3600), frame)
+    pd.testing.assert_frame_equal(store.get("full", loader(frame), ttl=3600), frame)
+    assert store.get("empty", loader(pd.DataFrame()), ttl=3600).empty
+    assert store.get("empty", loader(pd.DataFrame()), ttl=3600).empty
+    assert calls == [3, 0]
+    assert store.stats()["entries"] == 2
+
+    # 空结果只保留 EMPTY_RESULT_TTL 秒
+    clock[0] = EMPTY_RESULT_TTL + 1
+    store.get("empty", loader(pd.DataFrame()), ttl=3600)
+    store.get("full", loader(frame), ttl=3600)
+    assert calls == [3, 0, 0]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from tushare_client import RATE_WINDOW_SECONDS, SlidingWindowLimiter
+
+
+class FakeClock:
+    """假时钟：sleep 直接推进时间，不真正等待"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def max_calls_in_window(times: list) -> int:
+    times = np.asarray(times)
+    # 以每次调用为窗口起点，统计 [t, t + 窗口) 内的调用数
+    return int((np.searchsorted(times, times + RATE_WINDOW_SECONDS, side="left") - np.arange(len(times))).max())
+
+
+@pytest.mark.parametrize("per_minute", [1, 30, 150])
+def test_never_exceeds_quota_in_any_window(per_minute):
+    clock = FakeClock()
+    limiter = SlidingWindowLimiter(per_minute, clock=clock, sleep=clock.sleep)
+    rng = np.random.default_rng(per_minute)
+    times = []
+    waited = 0.0
+    for i in range(per_minute * 6):
+        # 平均到达速度是配额的两倍（会排队），每隔一段时间空闲一分半让窗口清空后再突发
+        clock.now += 90.0 if i % (per_minute * 2) == 0 else rng.uniform(0, 30 / per_minute)
+        waited += limiter.acquire()
+        times.append(clock.now)
+    assert waited > 0
+    assert max_calls_in_window(times) <= per_minute
+
+
+def test_full_burst_then_waits_for_the_window():
+    clock = FakeClock()
+    limiter = SlidingWindowLimiter(10, clock=clock, sleep=clock.sleep)
+    assert [limiter.acquire() for _ in range(10)] == [0.0] * 10
+
+    # 窗口已满：第 11 次要等到第一批调用移出窗口（令牌桶在这里已补满，会再放行一整批）
+    clock.now += 15
+    assert limiter.acquire() == pytest.approx(RATE_WINDOW_SECONDS - 15)
+    assert clock.now == pytest.approx(1000.0 + RATE_WINDOW_SECONDS)
+
+
+def test_waits_for_each_call_to_leave_the_window():
+    clock = FakeClock()
+    limiter = SlidingWindowLimiter(3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        limiter.acquire()
+        clock.now += 10
+    # 三次调用在 1000 / 1010 / 1020，之后的调用依次等到 1060 / 1070 / 1080
+    started = clock.now
+    assert [limiter.acquire() for _ in range(3)] == pytest.approx([1060 - started, 10, 10])
@@ -0,0 +1,269 @@
+import time
+import random
+import logging
+import threading
+from collections import defaultdict, deque
+
+import pandas as pd
+
+from parallel import fan_out
+from telemetry import telemetry, frame_size
+
+logger = logging.getLogger(__name__)
+
+# 各接口每分钟允许的调用次数（按 2000 积分档位保守设置，可按自己的积分调整）
+ENDPOINT_LIMITS = {
+    "fina_indicator": 150,
+    "daily": 400,
+    "adj_factor": 400,
+    "daily_basic": 150,
+    "income": 150,
+    "balancesheet": 150,
+    "cashflow": 150,
+    "stock_basic": 30,
+}
+DEFAULT_LIMIT = 100
+# 限流的统计窗口（秒）：任意这么长的时间内调用次数不超过上面的配额
+RATE_WINDOW_SECONDS = 60.0
+
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0   # 秒
+BACKOFF_CAP = 30.0   # 秒
+
+# 各接口单次请求返回的最大行数；返回行数触顶时说明结果可能被截断，需要继续拆分
+ENDPOINT_ROW_LIMITS = {
+    "fina_indicator": 100,
+    "fina_indicator_vip": 5000,
+    "daily": 6000,
+    "adj_factor": 6000,
+    "daily_basic": 6000,
+}
+# 各接口每只股票每年大约返回的行数（季度数据 4 行，日频数据约 250 个交易日），
+# 与 ENDPOINT_ROW_LIMITS 一起估算单次请求能覆盖多少年
+ENDPOINT_ROWS_PER_YEAR = {
+    "fina_indicator": 4,
+    "fina_indicator_vip": 4,
+    "daily": 250,
+    "adj_factor": 250,
+    "daily_basic": 250,
+}
+# 估算窗口时只用到行数上限的这个比例，给更正公告等重复记录留出余量
+WINDOW_FILL_RATIO = 0.9
+# 拼接 ts_code 时每批的代码数
+CODE_BATCH_SIZE = 50
+
+# tushare 超频/网络抖动时的典型报错关键字，命中则退避重试
+RETRYABLE_MESSAGES = ("最多访问", "每分钟", "频率", "timed out", "timeout", "Connection", "502", "503", "504")
+
+
+class SlidingWindowLimiter:
+    """
+    线程安全的滑动窗口限流：记录最近 RATE_WINDOW_SECONDS 秒内每次放行的时间，任意这么长的时间内
+    最多放行 per_minute 次（令牌桶在“满桶突发 + 一分钟补满”时一分钟内可能放行接近两倍配额）。
+    clock / sleep 可替换，便于测试。
+    """
+
+    def __init__(self, per_minute: int, clock=time.monotonic, sleep=time.sleep):
+        self.limit = per_minute
+        self.calls = deque()
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """登记一次调用，窗口内已满时阻塞到最早的一次调用移出窗口。返回排队等待的秒数。"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = self.clock()
+                while self.calls and self.calls[0] <= now - RATE_WINDOW_SECONDS:
+                    self.calls.popleft()
+                if len(self.calls) < self.limit:
+                    self.calls.append(now)
+                    return waited
+                sleep_for = self.calls[0] + RATE_WINDOW_SECONDS - now
+            self.sleep(sleep_for)
+            waited += sleep_for
+
+
+def split_codes(codes: list, batch_size: int = CODE_BATCH_SIZE) -> list:
+    return [codes[i:i + batch_size] for i in range(0, len(codes), batch_size)]
+
+
+def window_years_for(endpoint: str, n_codes: int):
+    """
+    单个请求的日期窗口年数：行数上限 × WINDOW_FILL_RATIO / (每年行数 × 代码数)，至少 1 年。
+    不知道行数上限或每年行数的接口返回 None（不按日期预先拆分，触顶时仍由 _query_chunk 对半拆分）。
+    """
+    row_limit, rows_per_year = ENDPOINT_ROW_LIMITS.get(endpoint), ENDPOINT_ROWS_PER_YEAR.get(endpoint)
+    if not row_limit or not rows_per_year:
+        return None
+    return max(1, int(row_limit * WINDOW_FILL_RATIO // (rows_per_year * max(n_codes, 1))))
+
+
+def split_dates(start_date: str, end_date: str, years: int) -> list:
+    """把 [start_date, end_date]（YYYYMMDD）按 years 年切成互不重叠的窗口。"""
+    windows = []
+    cursor = pd.Timestamp(start_date)
+    stop = pd.Timestamp(end_date)
+    while cursor <= stop:
+        window_end = min(cursor + pd.DateOffset(years=years) - pd.Timedelta(days=1), stop)
+        windows.append((cursor.strftime("%Y%m%d"), window_end.strftime("%Y%m%d")))
+        cursor = window_end + pd.Timedelta(days=1)
+    return windows
+
+
+def is_retryable(error: Exception) -> bool:
+    message = str(error)
+    return any(keyword in message for keyword in RETRYABLE_MESSAGES)
+
+
+def backoff_delay(attempt: int) -> float:
+    """带抖动的指数退避 (full jitter)。"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class RateLimitedPro:
+    """
+    包装 tushare 的 pro 客户端：
+    - 每个接口一个滑动窗口限流器，任意 60 秒内的调用次数不超过配额；
+    - 遇到超频或网络类错误时按抖动指数退避重试；
+    - 记录每个接口的调用次数、重试次数和排队等待时间，可通过 stats() 查看。
+    用法与原 pro 完全一致，例如 pro.daily(ts_code=..., ...)。
+    client_factory 在第一次请求时才被调用，用来延迟导入 tushare 和创建客户端。
+    """
+
+    def __init__(self, client_factory):
+        self._client_factory = client_factory
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._limiters = {}
+        self._limiters_lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"calls": 0, "retries": 0, "errors": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0})
+        self._stats_lock = threading.Lock()
+
+    def _limiter(self, endpoint: str) -> SlidingWindowLimiter:
+        with self._limiters_lock:
+            if endpoint not in self._limiters:
+                self._limiters[endpoint] = SlidingWindowLimiter(ENDPOINT_LIMITS.get(endpoint, DEFAULT_LIMIT))
+            return self._limiters[endpoint]
+
+    def _record(self, endpoint: str, **deltas) -> None:
+        with self._stats_lock:
+            stat = self._stats[endpoint]
+            for key, value in deltas.items():
+                if key == "max_wait_seconds":
+                    stat[key] = max(stat[key], value)
+                else:
+                    stat[key] += value
+
+    def _get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                self._client = self._client_factory()
+            return self._client
+
+    def call(self, endpoint: str, **kwargs):
+        method = getattr(self._get_client(), endpoint)
+        attempt = 0
+        total_wait = 0.0
+        started = time.perf_counter()
+        while True:
+            waited = self._limiter(endpoint).acquire()
+            total_wait += waited
+            self._record(endpoint, calls=1, wait_seconds=waited, max_wait_seconds=waited)
+            if waited > 1:
+                logger.info("%s 排队等待 %.1fs（触及每分钟配额）", endpoint, waited)
+            try:
+                df = method(**kwargs)
+            except Exception as e:
+                if attempt >= MAX_RETRIES or not is_retryable(e):
+                    self._record(endpoint, errors=1)
+                    telemetry.record("tushare", endpoint, time.perf_counter() - started,
+                                     retries=attempt, wait=total_wait, error=True)
+                    raise
+                delay = backoff_delay(attempt)
+                self._record(endpoint, retries=1, wait_seconds=delay)
+                logger.warning("%s 第%d次重试，%.1fs 后再试: %s", endpoint, attempt + 1, delay, e)
+                time.sleep(delay)
+                total_wait += delay
+                attempt += 1
+                continue
+            rows, size = frame_size(df)
+            telemetry.record("tushare", endpoint, time.perf_counter() - started,
+                             rows=rows, bytes=size, retries=attempt, wait=total_wait)
+            return df
+
+    def _query_chunk(self, endpoint: str, codes, start_date, end_date, params: dict) -> pd.DataFrame:
+        """请求一个分块；返回行数触顶时对半拆分（先拆代码，再拆日期）后递归请求。"""
+        kwargs = dict(params)
+        if codes:
+            kwargs["ts_code"] = ",".join(codes)
+        if start_date:
+            kwargs["start_date"] = start_date
+        if end_date:
+            kwargs["end_date"] = end_date
+        df = self.call(endpoint, **kwargs)
+
+        row_limit = ENDPOINT_ROW_LIMITS.get(endpoint)
+        if row_limit is None or len(df) < row_limit:
+            return df
+        if codes and len(codes) > 1:
+            middle = len(codes) // 2
+            parts = [(codes[:middle], start_date, end_date), (codes[middle:], start_date, end_date)]
+        elif start_date and end_date and start_date < end_date:
+            start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+            middle = start + (end - start) // 2
+            parts = [(codes, start_date, middle.strftime("%Y%m%d")),
+                     (codes, (middle + pd.Timedelta(days=1)).strftime("%Y%m%d"), end_date)]
+        else:
+            logger.warning("%s 返回 %d 行已触顶且无法再拆分，结果可能不完整", endpoint, len(df))
+            return df
+        return pd.concat([self._query_chunk(endpoint, c, s, e, params) for c, s, e in parts], ignore_index=True)
+
+    def query_chunked(self, endpoint: str, codes: list = None, start_date: str = None, end_date: str = None,
+                      code_batch: int = CODE_BATCH_SIZE, window_years: int = None, **params) -> pd.DataFrame:
+        """
+        透明分块查询：按代码批次 × 日期窗口拆成多个请求并发执行（仍受每个接口的限流器约束），
+        单块结果触顶时自动继续拆分，最后合并并去除重复行。
+        window_years 默认按接口的行数上限估算（见 window_years_for），区间能一次取完时只发一个请求。
+        """
+        code_chunks = split_codes(list(codes), code_batch) if codes else [None]
+        if window_years is None:
+            window_years = window_years_for(endpoint, max(len(chunk) for chunk in code_chunks) if codes else 1)
+        if start_date and end_date and window_years:
+            date_chunks = split_dates(start_date, end_date, window_years)
+        else:
+            date_chunks = [(start_date, end_date)]
+        tasks = [(c, s, e) for c in code_chunks for s, e in date_chunks]
+
+        results = fan_out(lambda task: self._query_chunk(endpoint, task[0], task[1], task[2], params), tasks)
+        frames = []
+        for _, df, error in results:
+            if error is not None:
+                raise error
+            frames.append(df)
+        return pd.concat(frames, ignore_index=True).drop_duplicates().reset_index(drop=True)
+
+    def query_paged(self, endpoint: str, page_size: int = None, **params) -> pd.DataFrame:
+        """用 limit/offset 翻页拉取全量结果（用于全市场类的大查询）。"""
+        page_size = page_size or ENDPOINT_ROW_LIMITS.get(endpoint, 5000)
+        frames = []
+        offset = 0
+        while True:
+            page = self.call(endpoint, limit=page_size, offset=offset, **params)
+            frames.append(page)
+            if len(page) < page_size:
+                break
+            offset += page_size
+        return pd.concat(frames, ignore_index=True).drop_duplicates().reset_index(drop=True)
+
+    def stats(self) -> dict:
+        """各接口的调用统计：calls / retries / errors / wait_seconds / max_wait_seconds"""
+        with self._stats_lock:
+            return {endpoint: dict(stat) for endpoint, stat in self._stats.items()}
+
+    def __getattr__(self, endpoint: str):
+        if endpoint.startswith("_"):
+            raise AttributeError(endpoint)
+        return lambda **kwargs: self.call(endpoint, **kwargs)